@@ -0,0 +1,14 @@
+"""
+Benchmarks for the data structures and trail algorithms.
+
+Run them from the repository root: `python -m bench` for the suite in
+bench/suite.py, or one on its own, e.g. `python -m bench.dkt_bulk_load`.
+"""
+import time
+
+
+def timed(func, *args) -> tuple[object, float]:
+    """func(*args), and how many seconds it took."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
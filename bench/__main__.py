@@ -0,0 +1,61 @@
+"""
+Run the benchmark suite in bench/suite.py, without a window.
+
+    python -m bench [--cases dkt_* follow_path] [--sizes 1000 5000] [--shapes series wide]
+                    [--repeat 5] [--out results.json] [--compare baseline.json --threshold 0.2]
+
+Trail cases are run on a trail of each shape (series, deep, wide) at each size.
+With --compare, results more than --threshold slower than the baseline's are
+listed and the exit status is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from fnmatch import fnmatch
+
+from bench.suite import CASES, SHAPES, compare, run
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="python -m bench", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cases", nargs="+", default=["*"], help="names or patterns of the cases to run")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    p.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="write the results to this JSON file")
+    p.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    p.add_argument("--threshold", type=float, default=0.2, help="how much slower counts as a regression, 0.2 being 20%%")
+    p.add_argument("--list", action="store_true", help="list the cases and stop")
+    args = p.parse_args()
+    # Long series are deep for serialize, which recurses through dataclasses.asdict.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * max(args.sizes) + 1000))
+
+    names = [name for name in CASES if any(fnmatch(name, pattern) for pattern in args.cases)]
+    if not names:
+        print(f"no cases match {args.cases}, the cases are:", file=sys.stderr)
+    if args.list or not names:
+        for name, (_, on_trails) in CASES.items():
+            print(f"{name:<20} {'trail' if on_trails else ''}")
+        return 0 if args.list else 2
+
+    results = run(names, args.sizes, args.shapes, args.repeat, args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before * 1e3:.2f} ms -> {after * 1e3:.2f} ms ({after / before - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions over {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Branch curves (101 points each) worked out per second:
+    - recursive: the bezier utils used to have, where every point of a curve
+      works out both smaller curves again for x and again for y,
+    - bezier: the curve as a polynomial, worked out once per curve,
+    - polyline: utils.bezier_polyline, remembered for curves seen before, as
+      the same branch is drawn every frame.
+
+    python -m bench.bezier_curves [--degrees 3 5 7] [--curves 200]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from utils import bezier, bezier_polyline
+
+TS = [i / 100 for i in range(101)]
+
+
+def recursive_bezier(*points):
+    if len(points) == 1:
+        return lambda t: points[0]
+    p1 = recursive_bezier(*points[:-1])
+    p2 = recursive_bezier(*points[1:])
+    return lambda t: (
+        (1-t) * p1(t)[0] + t * p2(t)[0],
+        (1-t) * p1(t)[1] + t * p2(t)[1]
+    )
+
+
+def curves_per_second(make_curve, curves: list) -> float:
+    start = time.perf_counter()
+    for points in curves:
+        make_curve(points)
+    return len(curves) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--degrees", type=int, nargs="+", default=[3, 5, 7])
+    p.add_argument("--curves", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'degree':>6} {'recursive':>10} {'bezier':>10} {'polyline':>10}   (curves per second)")
+    for degree in args.degrees:
+        curves = [
+            tuple((rng.uniform(0, 700), rng.uniform(0, 700)) for _ in range(degree + 1))
+            for _ in range(args.curves)
+        ]
+        for points in curves:
+            slow, fast = recursive_bezier(*points), bezier(*points)
+            assert all(abs(a - b) < 1e-6 for t in TS for a, b in zip(slow(t), fast(t)))
+        recursive = curves_per_second(lambda points: [*map(recursive_bezier(*points), TS)], curves)
+        closed_form = curves_per_second(lambda points: [*map(bezier(*points), TS)], curves)
+        bezier_polyline.cache_clear()
+        for points in curves:
+            bezier_polyline(points)
+        remembered = curves_per_second(bezier_polyline, curves)
+        print(f"{degree:>6} {recursive:>10.0f} {closed_form:>10.0f} {remembered:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
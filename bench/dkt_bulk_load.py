@@ -0,0 +1,55 @@
+"""
+Compare `DoubleKeyTable.from_items` against inserting one item at a time.
+
+    python -m bench.dkt_bulk_load [--sizes 10000 100000 1000000] [--difficulties 100]
+"""
+from __future__ import annotations
+
+import argparse
+
+from bench import timed
+from double_key_table import DoubleKeyTable
+from mountain import Mountain
+
+
+def make_items(n: int, difficulties: int) -> list[tuple[tuple[str, str], Mountain]]:
+    """n (difficulty, name) -> Mountain rows spread evenly over the difficulty levels."""
+    items = []
+    for i in range(n):
+        mountain = Mountain(f"mountain-{i}", i % difficulties, i % 97)
+        items.append(((str(mountain.difficulty_level), mountain.name), mountain))
+    return items
+
+
+def load_one_at_a_time(items) -> DoubleKeyTable:
+    table = DoubleKeyTable()
+    for key, mountain in items:
+        table[key] = mountain
+    return table
+
+
+def load_bulk(items, difficulties: int) -> DoubleKeyTable:
+    return DoubleKeyTable.from_items(
+        items,
+        expected_outer=difficulties,
+        expected_inner=-(-len(items) // difficulties),
+    )
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--difficulties", type=int, default=100)
+    args = p.parse_args()
+
+    print(f"{'entries':>10} {'__setitem__ (s)':>16} {'from_items (s)':>15} {'speedup':>8}")
+    for n in args.sizes:
+        items = make_items(n, args.difficulties)
+        loop_table, loop_time = timed(load_one_at_a_time, items)
+        bulk_table, bulk_time = timed(load_bulk, items, args.difficulties)
+        assert len(loop_table) == len(bulk_table) == n
+        print(f"{n:>10} {loop_time:>16.3f} {bulk_time:>15.3f} {loop_time / bulk_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
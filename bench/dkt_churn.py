@@ -0,0 +1,78 @@
+"""
+Insert/delete churn on the top level of DoubleKeyTable, reporting probe lengths
+after every round to show they stay bounded.
+
+    python -m bench.dkt_churn [--keys 20000] [--rounds 10] [--churn 0.5] [--load-factor 0.5]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from double_key_table import DoubleKeyTable, TOMBSTONE
+
+
+def probe_lengths(table: DoubleKeyTable) -> tuple[float, int, float]:
+    """
+    Average and maximum number of slots looked at to find each top level key,
+    and the average number looked at before giving up on a missing key.
+    """
+    size = table.table_size
+    found = []
+    for pos, entry in enumerate(table.table):
+        if entry is not None and entry is not TOMBSTONE:
+            found.append((pos - table.hash1(entry[0])) % size + 1)
+    missing = []
+    for start in range(0, size, max(1, size // 1000)):
+        length = 1
+        while table.table[(start + length - 1) % size] is not None and length <= size:
+            length += 1
+        missing.append(length)
+    return sum(found) / max(1, len(found)), max(found, default=0), sum(missing) / len(missing)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--keys", type=int, default=20_000)
+    p.add_argument("--rounds", type=int, default=10)
+    p.add_argument("--churn", type=float, default=0.5, help="Fraction of keys deleted and replaced each round.")
+    p.add_argument("--load-factor", type=float, default=0.5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    table = DoubleKeyTable(max_load_factor=args.load_factor)
+    live = []
+    next_key = 0
+    for _ in range(args.keys):
+        live.append(f"range-{next_key}")
+        table[live[-1], "peak"] = next_key
+        next_key += 1
+
+    print(f"{'round':>5} {'keys':>7} {'size':>8} {'tombstones':>10} {'avg hit':>8} {'max hit':>8} {'avg miss':>9} {'time (s)':>9}")
+    for round_number in range(args.rounds + 1):
+        start = time.perf_counter()
+        if round_number > 0:
+            rng.shuffle(live)
+            changed = int(len(live) * args.churn)
+            for key1 in live[:changed]:
+                del table[key1, "peak"]
+            del live[:changed]
+            for _ in range(changed):
+                live.append(f"range-{next_key}")
+                table[live[-1], "peak"] = next_key
+                next_key += 1
+        elapsed = time.perf_counter() - start
+        avg_hit, max_hit, avg_miss = probe_lengths(table)
+        print(f"{round_number:>5} {len(live):>7} {table.table_size:>8} {table.deleted_count:>10} "
+              f"{avg_hit:>8.2f} {max_hit:>8} {avg_miss:>9.2f} {elapsed:>9.3f}")
+
+    # Mass delete, the table should shrink back down.
+    for key1 in live:
+        del table[key1, "peak"]
+    print(f"after deleting everything: size {table.table_size}, tombstones {table.deleted_count}")
+
+
+if __name__ == "__main__":
+    main()
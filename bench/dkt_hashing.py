@@ -0,0 +1,65 @@
+"""
+Lookups per second in DoubleKeyTable with the cached key digest against the
+original per-character hash, which is installed on the table as an override.
+
+    python -m bench.dkt_hashing [--entries 100000] [--lookups 200000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from double_key_table import DoubleKeyTable
+from bench.dkt_bulk_load import make_items
+
+
+def legacy_hash(key: str, table_size: int) -> int:
+    """The hash DoubleKeyTable used before key digests were cached."""
+    value = 0
+    a = 31415
+    for char in key:
+        value = (ord(char) + a * value) % table_size
+        a = a * DoubleKeyTable.HASH_BASE % (table_size - 1)
+    return value
+
+
+def make_table(items, legacy: bool) -> DoubleKeyTable:
+    table = DoubleKeyTable()
+    if legacy:
+        table.hash1 = lambda k: legacy_hash(k, table.table_size)
+        table.hash2 = lambda k, sub_table: legacy_hash(k, sub_table.table_size)
+    for key, mountain in items:
+        table[key] = mountain
+    return table
+
+
+def lookups_per_second(table: DoubleKeyTable, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        table[key]
+    return len(keys) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--entries", type=int, default=100_000)
+    p.add_argument("--difficulties", type=int, default=100)
+    p.add_argument("--lookups", type=int, default=200_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    items = make_items(args.entries, args.difficulties)
+    rng = random.Random(args.seed)
+    keys = [rng.choice(items)[0] for _ in range(args.lookups)]
+
+    print(f"{'hash':>8} {'build (s)':>10} {'lookups/s':>12}")
+    for name, legacy in (("legacy", True), ("digest", False)):
+        start = time.perf_counter()
+        table = make_table(items, legacy)
+        build = time.perf_counter() - start
+        print(f"{name:>8} {build:>10.3f} {lookups_per_second(table, keys):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
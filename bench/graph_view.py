@@ -0,0 +1,113 @@
+"""
+The graph view's computation from main.on_graph_clicked, without arcade:
+mountains are added to a MountainOrganiser one difficulty group at a time,
+and after each group every mountain added so far has its rank recorded.
+
+Timed with MountainOrganiser's binary search cur_position, and with the
+linear scan it used to do. The scan makes the whole computation cubic, so it
+is only run on a smaller set of mountains.
+
+Then timed with MountainGraph, which main now uses: the first graph, a click
+when nothing changed, and a click after editing one mountain of a random
+difficulty, each checked against the computation above.
+
+    python -m bench.graph_view [--mountains 50000] [--groups 100] [--old-mountains 3000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from copy import copy
+
+from bench import timed
+from double_key_table import DoubleKeyTable
+from mountain import Mountain
+from mountain_graph import MountainGraph
+from mountain_manager import MountainManager
+from mountain_organiser import MountainOrganiser
+
+
+class ScanningOrganiser(MountainOrganiser):
+    """MountainOrganiser with the old linear scan cur_position."""
+
+    def cur_position(self, mountain: Mountain) -> int:
+        for i in range(len(self.mountain_organizer)):
+            if self.mountain_organizer[i] == mountain:
+                return i
+        raise KeyError(mountain)
+
+
+def graph_data(manager: MountainManager, organiser: MountainOrganiser) -> list[list]:
+    """main.on_graph_clicked's graph_data, without the colours."""
+    groups = manager.group_by_difficulty()
+    positions = DoubleKeyTable()
+    positions.hash1 = lambda k: (k % positions.table_size)
+    all_mountains = []
+    for group in groups:
+        organiser.add_mountains(group)
+        for mountain in group:
+            positions[mountain.difficulty_level, mountain.name] = []
+        all_mountains.extend(group)
+        for mountain in all_mountains:
+            positions[mountain.difficulty_level, mountain.name].append(organiser.cur_position(mountain))
+    return [
+        [
+            len(groups) - len(positions[mountain.difficulty_level, mountain.name]),
+            mountain.name,
+            positions[mountain.difficulty_level, mountain.name],
+        ]
+        for mountain in all_mountains
+    ]
+
+
+def make_manager(mountains: int, groups: int, seed: int) -> MountainManager:
+    rng = random.Random(seed)
+    manager = MountainManager()
+    for i in range(mountains):
+        manager.add_mountain(Mountain(f"m{i}", rng.randrange(groups), rng.randrange(1, 1000)))
+    return manager
+
+
+def edit_one(manager: MountainManager, rng: random.Random) -> None:
+    """Change the length of a mountain of a random difficulty, as the edit window does."""
+    mountain = rng.choice(manager.mountains_with_difficulty(rng.choice(manager.difficulties)))
+    old = copy(mountain)
+    mountain.length = rng.randrange(1, 1000)
+    manager.edit_mountain(old, mountain)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--mountains", type=int, default=50_000)
+    p.add_argument("--groups", type=int, default=100)
+    p.add_argument("--old-mountains", type=int, default=3_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'mountains':>9} {'cur_position':>13} {'seconds':>9}")
+    for n in sorted({args.old_mountains, args.mountains}):
+        manager = make_manager(n, args.groups, args.seed)
+        data, search_time = timed(graph_data, manager, MountainOrganiser())
+        print(f"{n:>9} {'bisect':>13} {search_time:>9.3f}")
+        if n <= args.old_mountains:
+            scanned, scan_time = timed(graph_data, manager, ScanningOrganiser())
+            assert scanned == data
+            print(f"{n:>9} {'linear scan':>13} {scan_time:>9.3f}")
+
+        graph = MountainGraph(manager)
+        first, first_time = timed(graph.graph_data)
+        assert [entry[1:] for entry in first] == data
+        _, unchanged_time = timed(graph.graph_data)
+        rng = random.Random(args.seed)
+        edit_times = []
+        for _ in range(5):
+            edit_one(manager, rng)
+            edit_times.append(timed(graph.graph_data)[1])
+        assert [entry[1:] for entry in graph.graph_data()] == graph_data(manager, MountainOrganiser())
+        print(f"{n:>9} {'graph, first':>13} {first_time:>9.3f}")
+        print(f"{n:>9} {'unchanged':>13} {unchanged_time:>9.6f}")
+        print(f"{n:>9} {'after an edit':>13} {sum(edit_times) / len(edit_times):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+InfiniteHashTable's get_many/set_many/delete_many against looping over the
+single key methods, on mountain-like names which share long prefixes.
+
+    python -m bench.iht_batch [--keys 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+
+from bench import timed
+from infinite_hash_table import InfiniteHashTable
+
+STEMS = ["mount", "mountain", "peak", "ben", "glen", "mauna", "kilimanjaro", "everest", "lhotse", "cerro", "pico", "monte"]
+
+
+def make_names(n: int, seed: int) -> list[str]:
+    """Lowercase names made of a stem, a range name and a number, e.g. mountblanc12."""
+    rng = random.Random(seed)
+    ranges = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 8))) for _ in range(200)]
+    names = set()
+    while len(names) < n:
+        names.add(f"{rng.choice(STEMS)}{rng.choice(ranges)}{rng.randint(0, 999)}")
+    names = list(names)
+    rng.shuffle(names)
+    return names
+
+
+def loop_set(table, items):
+    for key, value in items:
+        table[key] = value
+
+
+def loop_get(table, keys):
+    return [table[key] for key in keys]
+
+
+def loop_delete(table, keys):
+    for key in keys:
+        del table[key]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--keys", type=int, default=100_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    names = make_names(args.keys, args.seed)
+    items = [(name, index) for index, name in enumerate(names)]
+    doomed = names[::2]
+
+    single = InfiniteHashTable()
+    batch = InfiniteHashTable()
+    results = [
+        ("set", timed(loop_set, single, items)[1], timed(batch.set_many, items)[1]),
+        ("get", timed(loop_get, single, names)[1], timed(batch.get_many, names)[1]),
+        ("delete", timed(loop_delete, single, doomed)[1], timed(batch.delete_many, doomed)[1]),
+    ]
+    assert list(single.items()) == list(batch.items())
+
+    print(f"{'op':>6} {'single (us/key)':>16} {'batch (us/key)':>15} {'speedup':>8}")
+    for name, single_time, batch_time in results:
+        n = len(doomed) if name == "delete" else len(names)
+        print(f"{name:>6} {single_time / n * 1e6:>16.2f} {batch_time / n * 1e6:>15.2f} {single_time / batch_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
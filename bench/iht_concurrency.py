@@ -0,0 +1,121 @@
+"""
+Stress test and reader throughput for ConcurrentInfiniteHashTable.
+
+The stress test runs one writer thread inserting and deleting keys while
+reader threads check that keys which are never deleted are always found
+with the right value.
+
+The throughput benchmark measures lookups per second against the number of
+reader threads, with and without a writer running.
+
+    python -m bench.iht_concurrency [--keys 20000] [--threads 1 2 4 8] [--seconds 2]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+from infinite_hash_table import ConcurrentInfiniteHashTable
+
+
+def make_names(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        names.add("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 12))))
+    return sorted(names)
+
+
+def writer(table, churn_keys: list[str], stop: threading.Event, seed: int) -> int:
+    """Keep inserting and deleting the churn keys until stopped."""
+    rng = random.Random(seed)
+    present = set()
+    writes = 0
+    while not stop.is_set():
+        key = rng.choice(churn_keys)
+        if key in present:
+            del table[key]
+            present.discard(key)
+        else:
+            table[key] = key.upper()
+            present.add(key)
+        writes += 1
+    return writes
+
+
+def reader(table, stable_keys: list[str], churn_keys: list[str], stop: threading.Event, seed: int, results: list) -> None:
+    """Look keys up until stopped, recording (lookups, errors)."""
+    rng = random.Random(seed)
+    lookups = 0
+    errors = []
+    while not stop.is_set():
+        key = rng.choice(stable_keys)
+        try:
+            if table[key] != key.upper():
+                errors.append(f"wrong value for {key}")
+        except KeyError:
+            errors.append(f"lost {key}")
+        key = rng.choice(churn_keys)
+        try:
+            if table[key] != key.upper():
+                errors.append(f"wrong value for {key}")
+        except KeyError:
+            pass  # may have just been deleted
+        lookups += 2
+    results.append((lookups, errors))
+
+
+def run(table, stable: list[str], churn: list[str], readers: int, seconds: float, with_writer: bool) -> tuple[float, list[str], int]:
+    stop = threading.Event()
+    results = []
+    threads = [
+        threading.Thread(target=reader, args=(table, stable, churn, stop, i, results))
+        for i in range(readers)
+    ]
+    writes = []
+    if with_writer:
+        threads.append(threading.Thread(target=lambda: writes.append(writer(table, churn, stop, -1))))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    lookups = sum(r[0] for r in results)
+    errors = [e for r in results for e in r[1]]
+    return lookups / elapsed, errors, sum(writes)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--keys", type=int, default=20_000)
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--seconds", type=float, default=2.0)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    names = make_names(args.keys, args.seed)
+    stable, churn = names[::2], names[1::2]
+    table = ConcurrentInfiniteHashTable()
+    for key in stable:
+        table[key] = key.upper()
+
+    print(f"{'readers':>7} {'writer':>6} {'lookups/s':>12} {'writes':>8} {'errors':>6}")
+    failed = False
+    for with_writer in (False, True):
+        for readers in args.threads:
+            rate, errors, writes = run(table, stable, churn, readers, args.seconds, with_writer)
+            print(f"{readers:>7} {'yes' if with_writer else 'no':>6} {rate:>12,.0f} {writes:>8} {len(errors):>6}")
+            for error in errors[:5]:
+                print("   ", error)
+            failed = failed or bool(errors)
+    if failed:
+        raise SystemExit("stress test failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Mixed inserts and deletes against the two InfiniteHashTable layouts,
+checking InfiniteHashTable's invariants as it goes.
+
+Each round deletes a random share of the keys in the table and inserts as
+many fresh ones, so the tables keep being split and collapsed.
+
+    python -m bench.iht_delete_churn [--keys 50000] [--rounds 10] [--churn 0.3]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from infinite_hash_table import InfiniteHashTable
+from compact_infinite_hash_table import CompactInfiniteHashTable
+from bench.iht_batch import make_names
+
+
+def churn(table, names: list[str], keys: int, rounds: int, share: float, seed: int, check: bool) -> tuple[float, float]:
+    """Run the rounds, returning the microseconds per insert and per delete."""
+    rng = random.Random(seed)
+    present = names[:keys]
+    spare = names[keys:]
+    for key in present:
+        table[key] = key
+    insert_time = delete_time = 0.0
+    operations = 0
+    for _ in range(rounds):
+        rng.shuffle(present)
+        n = int(len(present) * share)
+        doomed, present = present[:n], present[n:]
+        fresh, spare = spare[:n], spare[n:] + doomed
+
+        start = time.perf_counter()
+        for key in doomed:
+            del table[key]
+        delete_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in fresh:
+            table[key] = key
+        insert_time += time.perf_counter() - start
+
+        present += fresh
+        operations += n
+        if check:
+            table.check_invariants()
+    assert len(table) == len(present)
+    return insert_time / operations * 1e6, delete_time / operations * 1e6
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--keys", type=int, default=50_000)
+    p.add_argument("--rounds", type=int, default=10)
+    p.add_argument("--churn", type=float, default=0.3, help="share of the keys replaced each round")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    names = make_names(int(args.keys * (1 + args.churn)) + 1, args.seed)
+    print(f"{'layout':>26} {'insert (us)':>12} {'delete (us)':>12}")
+    for cls in (InfiniteHashTable, CompactInfiniteHashTable):
+        table = cls()
+        check = hasattr(table, "check_invariants")
+        insert_us, delete_us = churn(table, names, args.keys, args.rounds, args.churn, args.seed, check)
+        print(f"{cls.__name__:>26} {insert_us:>12.2f} {delete_us:>12.2f}")
+    print("InfiniteHashTable.check_invariants passed after every round")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Memory per key and lookups per second for the two InfiniteHashTable layouts:
+ArrayR tables of [key, value] ArrayRs, and CompactInfiniteHashTable's flat arrays.
+
+    python -m bench.iht_layout [--sizes 100000 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from infinite_hash_table import InfiniteHashTable
+from compact_infinite_hash_table import CompactInfiniteHashTable
+from bench.iht_concurrency import make_names
+
+
+def build(cls, keys: list[str]) -> tuple[object, float]:
+    """Fill a table, returning it and the bytes it allocated per key."""
+    gc.collect()
+    tracemalloc.start()
+    table = cls()
+    for index, key in enumerate(keys):
+        table[key] = index
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return table, allocated / len(keys)
+
+
+def lookups_per_second(table, keys: list[str]) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        table[key]
+    return len(keys) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    p.add_argument("--lookups", type=int, default=200_000)
+    args = p.parse_args()
+
+    print(f"{'keys':>9} {'layout':>26} {'bytes/key':>10} {'lookups/s':>12}")
+    for n in args.sizes:
+        keys = make_names(n, seed=n)
+        sample = random.Random(0).choices(keys, k=args.lookups)
+        for cls in (InfiniteHashTable, CompactInfiniteHashTable):
+            table, per_key = build(cls, keys)
+            print(f"{n:>9} {cls.__name__:>26} {per_key:>10.1f} {lookups_per_second(table, sample):>12,.0f}")
+            del table
+
+
+if __name__ == "__main__":
+    main()
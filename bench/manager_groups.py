@@ -0,0 +1,55 @@
+"""
+MountainManager.group_by_difficulty from its difficulty index, against
+rebuilding the groups from the table of mountains as it used to, after
+a burst of adds, removes and edits.
+
+    python -m bench.manager_groups [--mountains 20000] [--difficulties 100]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from copy import copy
+
+from bench import timed
+from algorithms.mergesort import mergesort
+from mountain import Mountain
+from mountain_manager import MountainManager
+
+
+def rebuild_groups(manager: MountainManager) -> list[list[Mountain]]:
+    """The groups worked out from manager.mountains alone."""
+    return [manager.mountains.values(key) for key in mergesort(manager.mountains.keys(), key=int)]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--mountains", type=int, default=20_000)
+    p.add_argument("--difficulties", type=int, default=100)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    manager = MountainManager()
+    mountains = [Mountain(f"m{i}", rng.randrange(args.difficulties), rng.randrange(1, 100)) for i in range(args.mountains)]
+    _, add_time = timed(lambda: [manager.add_mountain(m) for m in mountains])
+    for mountain in rng.sample(mountains, len(mountains) // 10):
+        manager.remove_mountain(mountain)
+        mountains.remove(mountain)
+    for mountain in rng.sample(mountains, len(mountains) // 10):
+        old = copy(mountain)
+        mountain.difficulty_level = rng.randrange(args.difficulties)
+        manager.edit_mountain(old, mountain)
+
+    indexed, index_time = timed(manager.group_by_difficulty)
+    rebuilt, rebuild_time = timed(rebuild_groups, manager)
+    assert [sorted(m.name for m in group) for group in indexed] == [sorted(m.name for m in group) for group in rebuilt]
+    assert [group[0].difficulty_level for group in indexed] == sorted({m.difficulty_level for m in mountains})
+
+    print(f"{len(mountains)} mountains in {len(indexed)} difficulty levels, added at {add_time / args.mountains * 1e6:.1f} us each")
+    print(f"{'group_by_difficulty':>20} {index_time * 1e3:>9.2f} ms")
+    print(f"{'rebuilt from table':>20} {rebuild_time * 1e3:>9.2f} ms ({rebuild_time / index_time:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+MountainOrganiser.add_mountains as the graph view uses it: mountains arrive
+one difficulty group at a time, each group added as a batch.
+
+The merge is timed against the old approach, which sorted everything again
+and matched the sorted (length, name) pairs back to mountains by name. The
+old approach is quadratic, so it is only run on a smaller set of mountains.
+
+    python -m bench.organiser_merge [--mountains 50000] [--groups 100] [--old-mountains 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from algorithms.mergesort import mergesort
+from mountain import Mountain
+from mountain_organiser import MountainOrganiser
+
+
+def resort_all(organised: list[Mountain], mountains: list[Mountain]) -> list[Mountain]:
+    """The old add_mountains."""
+    organised = organised + mountains
+    sorted_pairs = mergesort([(m.length, m.name) for m in organised])
+    return [m for _, name in sorted_pairs for m in organised if m.name == name]
+
+
+def make_groups(mountains: int, groups: int, seed: int) -> list[list[Mountain]]:
+    """Mountains with unique names spread over the groups, lengths drawn so plenty are tied."""
+    rng = random.Random(seed)
+    result = [[] for _ in range(groups)]
+    for i in range(mountains):
+        result[rng.randrange(groups)].append(Mountain(f"m{i}", 0, rng.randrange(1, mountains // 10 + 2)))
+    return result
+
+
+def time_merge(groups: list[list[Mountain]]) -> tuple[list[Mountain], float]:
+    organiser = MountainOrganiser()
+    start = time.perf_counter()
+    for group in groups:
+        organiser.add_mountains(group)
+    return organiser.mountain_organizer, time.perf_counter() - start
+
+
+def time_resort(groups: list[list[Mountain]]) -> tuple[list[Mountain], float]:
+    organised = []
+    start = time.perf_counter()
+    for group in groups:
+        organised = resort_all(organised, group)
+    return organised, time.perf_counter() - start
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--mountains", type=int, default=50_000)
+    p.add_argument("--groups", type=int, default=100)
+    p.add_argument("--old-mountains", type=int, default=2_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'mountains':>9} {'approach':>10} {'seconds':>9}")
+    for n in sorted({args.old_mountains, args.mountains}):
+        groups = make_groups(n, args.groups, args.seed)
+        merged, merge_time = time_merge(groups)
+        expected = sorted((m for group in groups for m in group), key=lambda m: (m.length, m.name))
+        assert merged == expected
+        print(f"{n:>9} {'merge':>10} {merge_time:>9.3f}")
+        if n <= args.old_mountains:
+            resorted, resort_time = time_resort(groups)
+            assert resorted == merged
+            print(f"{n:>9} {'resort':>10} {resort_time:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+The cases `python -m bench` runs, the trails and mountains they run on, and
+timing and comparing their results.
+
+A case is registered with @case and called as case(size, shape, rng). It sets
+up what it needs and returns a function doing the work to time, which is
+called --repeat times, or (prepare, work) to also call prepare, untimed,
+before each time.
+"""
+from __future__ import annotations
+
+import io
+import json
+import platform
+import random
+import statistics
+import time
+from typing import Callable
+
+import synthetic
+from double_key_table import DoubleKeyTable
+from draw_trails import DrawMode, TrailDraw
+from infinite_hash_table import InfiniteHashTable
+from mountain import Mountain
+from mountain_manager import MountainManager
+from mountain_organiser import MountainOrganiser
+from personality import BottomWalker, LazyWalker, TopWalker
+from serialize import deserialize, dump, load, serialize
+from synthetic import SHAPES, MountainSpec
+from trail import Trail
+
+# name -> (case, whether it runs on a trail of each shape or only once)
+CASES: dict[str, tuple[Callable, bool]] = {}
+
+
+def case(name: str, trail: bool = False):
+    """Register a case. Trail cases are run on a trail of each shape."""
+    def register(func):
+        CASES[name] = (func, trail)
+        return func
+    return register
+
+
+def make_mountains(size: int, rng: random.Random, difficulties: int = 50) -> list[Mountain]:
+    """size mountains with different names, of difficulty levels 0 to difficulties - 1 (see synthetic.py)."""
+    return synthetic.make_mountains(size, MountainSpec(difficulty_levels=difficulties), rng.randrange(2**32))
+
+
+def make_trail(size: int, shape: str, rng: random.Random) -> Trail:
+    """A trail of size mountains in one of SHAPES (see synthetic.iter_shaped_trail)."""
+    return synthetic.make_shaped_trail(shape, size, seed=rng.randrange(2**32))
+
+
+# DATA STRUCTURES
+
+@case("dkt_setitem")
+def dkt_setitem(size, shape, rng):
+    mountains = make_mountains(size, rng)
+    def run():
+        table = DoubleKeyTable()
+        for mountain in mountains:
+            table[str(mountain.difficulty_level), mountain.name] = mountain
+    return run
+
+
+@case("dkt_getitem")
+def dkt_getitem(size, shape, rng):
+    mountains = make_mountains(size, rng)
+    table = DoubleKeyTable()
+    for mountain in mountains:
+        table[str(mountain.difficulty_level), mountain.name] = mountain
+    rng.shuffle(mountains)
+    def run():
+        for mountain in mountains:
+            table[str(mountain.difficulty_level), mountain.name]
+    return run
+
+
+@case("dkt_full_churn")
+def dkt_full_churn(size, shape, rng):
+    """
+    Fill a table whose sizes stop at the first one holding size keys at 80% load,
+    then delete half the keys and add as many new ones. The table works above its
+    max load factor at its largest size throughout.
+    """
+    sizes = DoubleKeyTable.TABLE_SIZES[:next(
+        (i + 1 for i, table_size in enumerate(DoubleKeyTable.TABLE_SIZES) if size <= 0.8 * table_size),
+        len(DoubleKeyTable.TABLE_SIZES),
+    )]
+    names = [mountain.name for mountain in make_mountains(size, rng)]
+    deleted = rng.sample(names, size // 2)
+    def run():
+        table = DoubleKeyTable(sizes)
+        for name in names:
+            table[name, "peak"] = name
+        for name in deleted:
+            del table[name, "peak"]
+        for name in deleted:
+            table["new" + name, "peak"] = name
+    return run
+
+
+@case("iht_setitem")
+def iht_setitem(size, shape, rng):
+    names = [mountain.name for mountain in make_mountains(size, rng)]
+    def run():
+        table = InfiniteHashTable()
+        for name in names:
+            table[name] = name
+    return run
+
+
+@case("iht_getitem")
+def iht_getitem(size, shape, rng):
+    names = [mountain.name for mountain in make_mountains(size, rng)]
+    table = InfiniteHashTable()
+    for name in names:
+        table[name] = name
+    rng.shuffle(names)
+    def run():
+        for name in names:
+            table[name]
+    return run
+
+
+@case("manager_edit")
+def manager_edit(size, shape, rng):
+    """Add every mountain, then group them by difficulty."""
+    mountains = make_mountains(size, rng)
+    def run():
+        manager = MountainManager()
+        for mountain in mountains:
+            manager.add_mountain(mountain)
+        manager.group_by_difficulty()
+    return run
+
+
+@case("organiser_add")
+def organiser_add(size, shape, rng):
+    """Add the mountains in 10 batches, finding every mountain's position after the last."""
+    mountains = make_mountains(size, rng)
+    batches = [mountains[i::10] for i in range(10)]
+    def run():
+        organiser = MountainOrganiser()
+        for batch in batches:
+            organiser.add_mountains(batch)
+        for mountain in mountains:
+            organiser.cur_position(mountain)
+    return run
+
+
+# TRAILS
+
+@case("follow_path", trail=True)
+def follow_path(size, shape, rng):
+    trail = make_trail(size, shape, rng)
+    def run():
+        for personality in (TopWalker, BottomWalker, LazyWalker):
+            trail.follow_path(personality())
+    return run
+
+
+@case("walk_compiled", trail=True)
+def walk_compiled(size, shape, rng):
+    """follow_path's walks, through Trail.compile and CompiledTrail.walk_many."""
+    trail = make_trail(size, shape, rng)
+    return lambda: trail.compile().walk_many([TopWalker(), BottomWalker(), LazyWalker()])
+
+
+@case("length_k_paths", trail=True)
+def length_k_paths(size, shape, rng):
+    trail = make_trail(size, shape, rng)
+    k = 16
+    return lambda: trail.length_k_paths(k)
+
+
+@case("serialize_json", trail=True)
+def serialize_json(size, shape, rng):
+    trail = make_trail(size, shape, rng)
+    return lambda: deserialize(json.loads(serialize(trail)))
+
+
+@case("serialize_binary", trail=True)
+def serialize_binary(size, shape, rng):
+    trail = make_trail(size, shape, rng)
+    def run():
+        f = io.BytesIO()
+        dump(trail, f)
+        f.seek(0)
+        load(f)
+    return run
+
+
+@case("draw_layout", trail=True)
+def draw_layout(size, shape, rng):
+    """Lay the trail out from nothing remembered."""
+    seed = rng.random()
+    draw = TrailDraw(None)
+    def prepare():
+        draw.trail = make_trail(size, shape, random.Random(seed))
+    return prepare, lambda: draw.layout(700, 700, 0, 0)
+
+
+@case("draw_relayout", trail=True)
+def draw_relayout(size, shape, rng):
+    """Lay the trail out again after adding a mountain at its start."""
+    draw = TrailDraw(make_trail(size, shape, rng))
+    draw.layout(700, 700, 0, 0)
+    def run():
+        draw.trail.store = draw.trail.store.add_mountain_before(Mountain("new", 1, 1))
+        draw.layout(700, 700, 0, 0)
+        draw.trail.store = draw.trail.store.remove_mountain()
+    return run
+
+
+@case("draw_hit_test", trail=True)
+def draw_hit_test(size, shape, rng):
+    """Find the box under 1000 points in each mode, through the box index."""
+    draw = TrailDraw(make_trail(size, shape, rng))
+    draw.layout(700, 700, 0, 0)
+    draw.box_index()
+    points = [(rng.uniform(0, 700), rng.uniform(0, 700)) for _ in range(1000)]
+    def run():
+        for mode in (DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH, DrawMode.REMOVE, DrawMode.EDIT):
+            for point in points:
+                draw.box_and_action(point, mode)
+    return run
+
+
+# RUNNING AND COMPARING
+
+def run(names: list[str], sizes: list[int], shapes: list[str], repeat: int, seed: int, log=print) -> dict:
+    """
+    Time each case at each size (and each shape, for trail cases).
+    Results are keyed "name[shape,size]", or "name[size]", with the fastest and median
+    of the repeats, in seconds.
+    """
+    results = {}
+    for name in names:
+        func, on_trails = CASES[name]
+        for size in sizes:
+            for shape in shapes if on_trails else [None]:
+                work = func(size, shape, random.Random(seed))
+                prepare, work = work if isinstance(work, tuple) else (None, work)
+                times = []
+                for _ in range(repeat):
+                    if prepare is not None:
+                        prepare()
+                    start = time.perf_counter()
+                    work()
+                    times.append(time.perf_counter() - start)
+                key = f"{name}[{shape},{size}]" if on_trails else f"{name}[{size}]"
+                results[key] = {"min": min(times), "median": statistics.median(times)}
+                log(f"{key:<36} {min(times) * 1e3:>10.2f} ms")
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "repeat": repeat, "seed": seed},
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[tuple[str, float, float]]:
+    """
+    (key, baseline seconds, seconds) of the results slower than the baseline's by more
+    than threshold (0.1 being 10%), comparing the fastest repeats of the results in both.
+    """
+    regressions = []
+    for key, result in results["results"].items():
+        before = baseline["results"].get(key)
+        if before is not None and result["min"] > before["min"] * (1 + threshold):
+            regressions.append((key, before["min"], result["min"]))
+    return regressions
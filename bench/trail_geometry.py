@@ -0,0 +1,171 @@
+"""
+Cost of building the geometry TrailDraw draws, without a window.
+
+    - immediate: every frame lays the whole trail out and works out every
+      line, mountain and branch curve again, as draw_in_box does.
+    - retained: TrailDraw.layout builds the geometry once. A frame where
+      nothing changed only checks needs_layout. After an edit only the
+      trails which changed or moved are worked out again.
+    - retained drawing: TrailDraw.update_retained, as draw_retained runs it, with
+      plain objects in place of arcade's shapes, sprites and labels. After adding a
+      mountain and after editing one in place (then refresh()), it reports how many
+      shapes, mountain sprites and labels it made or changed, and checks what it
+      keeps matches a fresh layout.
+
+    python -m bench.trail_geometry [--sizes 1000 5000 20000] [--frames 5]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from collections import Counter
+
+from bench import timed
+from draw_trails import TrailDraw, TrailGeometry, branch_strips
+from bench.trail_layout import edit, make_trail
+
+
+class ImmediateDraw(TrailDraw):
+    """TrailDraw whose draw_ methods only collect what would be drawn."""
+
+    def draw_line(self, sx, sy, ex, ey):
+        self.geometry.lines.append((sx, sy, ex, ey))
+
+    def draw_mountain(self, x, y, scale, obj):
+        self.geometry.mountains.append((x, y, scale, obj))
+
+    def draw_branch(self, sx, sy, ex, ety, eby):
+        self.geometry.strips.extend(branch_strips(sx, sy, ex, ety, eby))
+
+    def frame(self) -> TrailGeometry:
+        self.geometry = TrailGeometry()
+        self.draw_in_box(700, 700, 0, 0)
+        return self.geometry
+
+
+class Label:
+    """Stands in for a pyglet label, counting changes to its text."""
+
+    def __init__(self, made: Counter) -> None:
+        self.made = made
+        self.x = self.y = None
+        self._text = ""
+        self.deleted = False
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self.made["relabels"] += 1
+        self._text = value
+
+    def delete(self) -> None:
+        self.deleted = True
+
+
+class Sprite:
+    """Stands in for an arcade sprite."""
+
+    center_x = center_y = scale = None
+
+
+class CountingDraw(TrailDraw):
+    """TrailDraw keeping plain objects in place of arcade's, counting how many it makes."""
+
+    def __init__(self, trail) -> None:
+        super().__init__(trail)
+        self.made = Counter()
+
+    def _shape_list(self, shapes):
+        self.made["shape lists"] += 1
+        return list(shapes)
+
+    def _sprite_list(self, sprites):
+        return list(sprites)
+
+    def _label_batch(self):
+        return None
+
+    def _make_shapes(self, geometry):
+        shapes = [("line", line) for line in geometry.lines] + [("strip", points) for points in geometry.strips]
+        self.made["shapes"] += len(shapes)
+        return shapes
+
+    def _make_mountain(self, batch):
+        self.made["mountains"] += 1
+        return Sprite(), [Label(self.made), Label(self.made)]
+
+    def check(self) -> None:
+        """What's kept is what a fresh layout of the trail would draw."""
+        _, shapes, sprites, _ = self._retained
+        geometry = TrailDraw(self.trail).layout(700, 700, 0, 0)
+        expected = [("line", line) for line in geometry.lines] + [("strip", points) for points in geometry.strips]
+        assert Counter(map(repr, shapes)) == Counter(map(repr, expected))
+        kept = sorted(
+            (sprite.center_x, sprite.center_y, labels[0].text, labels[1].text)
+            for record in self._drawn.values() if record.mountain is not None
+            for sprite, labels in [record.mountain]
+        )
+        assert kept == sorted((x, y, str(m.difficulty_level), str(m.length)) for x, y, _, m in geometry.mountains)
+        assert len(sprites) == len(geometry.mountains)
+
+
+def edit_in_place(draw: TrailDraw, rng: random.Random) -> None:
+    """Change a mountain picked at random from the whole trail in place, as the GUI's editor does."""
+    rng.choice(draw.trail.collect_all_mountains()).length += 1
+    draw.refresh()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    p.add_argument("--frames", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'mountains':>9} {'immediate':>10} {'first layout':>13} {'unchanged':>10} {'after edit':>11}   (ms per frame)")
+    for n in args.sizes:
+        immediate = ImmediateDraw(make_trail(n, args.seed))
+        immediate.frame()
+        immediate_time = min(timed(immediate.frame)[1] for _ in range(args.frames))
+
+        retained = TrailDraw(make_trail(n, args.seed))
+        geometry, first_time = timed(lambda: retained.layout(700, 700, 0, 0))
+        assert geometry == immediate.frame()
+        retained._retained = (retained.trail._memo[(TrailDraw, "layout")],)  # as draw_retained leaves it
+        unchanged_time = min(timed(lambda: retained.needs_layout(700, 700, 0, 0))[1] for _ in range(args.frames))
+        rng = random.Random(args.seed)
+        edit_times = []
+        for _ in range(args.frames):
+            edit(retained, rng)
+            edit_times.append(timed(lambda: retained.layout(700, 700, 0, 0))[1])
+        print(
+            f"{n:>9} {immediate_time * 1e3:>10.2f} {first_time * 1e3:>13.2f} "
+            f"{unchanged_time * 1e3:>10.4f} {sum(edit_times) / len(edit_times) * 1e3:>11.2f}"
+        )
+
+    print()
+    print(f"{'mountains':>9} {'edit':>8} {'update (ms)':>12} {'shapes made':>12} {'mountains made':>15} {'relabels':>9}   (per edit)")
+    for n in args.sizes:
+        drawing = CountingDraw(make_trail(n, args.seed))
+        drawing.update_retained(700, 700, 0, 0)
+        drawing.check()
+        rng = random.Random(args.seed)
+        for label, change in (("add", edit), ("in place", edit_in_place)):
+            drawing.made.clear()
+            times = []
+            for _ in range(args.frames):
+                change(drawing, rng)
+                times.append(timed(lambda: drawing.update_retained(700, 700, 0, 0))[1])
+                drawing.check()
+            made = {key: count / args.frames for key, count in drawing.made.items()}
+            print(
+                f"{n:>9} {label:>8} {sum(times) / len(times) * 1e3:>12.2f} {made.get('shapes', 0):>12.0f} "
+                f"{made.get('mountains', 0):>15.0f} {made.get('relabels', 0):>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
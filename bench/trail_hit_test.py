@@ -0,0 +1,83 @@
+"""
+Finding the box under the mouse on large trails, as every click and hover does:
+    - walk: box_and_action walking down from the top trail, as it used to,
+    - index: box_and_action looking in the BoxIndex of the boxes TrailDraw.layout set,
+      built by the first hit-test after the layout.
+
+Both are checked to find the same box and trail for every point and mode, on the
+first layout and again after each of --edits clicks which change the trail.
+
+    python -m bench.trail_hit_test [--sizes 1000 5000 20000] [--points 2000] [--edits 20]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+
+from bench import timed
+from draw_trails import DrawMode, TrailDraw
+from bench.trail_layout import make_trail
+from mountain import Mountain
+
+MODES = (DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH, DrawMode.REMOVE, DrawMode.EDIT)
+
+
+def walk(draw: TrailDraw, p, mode):
+    return draw._walk_to_action(p, mode, draw.trail, (draw, "trail"))
+
+
+def hit_test(find, draw: TrailDraw, events: list) -> list:
+    return [find(draw, p, mode) for p, mode in events]
+
+
+def check(walked: list, indexed: list) -> None:
+    for (box, func, cur_trail), (i_box, i_func, i_cur_trail) in zip(walked, indexed):
+        assert box is i_box and cur_trail is i_cur_trail and (func is None) == (i_func is None)
+
+
+def random_events(rng: random.Random, amount: int) -> list:
+    return [((rng.uniform(0, 700), rng.uniform(0, 700)), rng.choice(MODES)) for _ in range(amount)]
+
+
+def click_edit(draw: TrailDraw, rng: random.Random) -> None:
+    """Click random points until one adds a mountain or branch or removes something, as the GUI would."""
+    while True:
+        mode = rng.choice((DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH, DrawMode.REMOVE))
+        _, func, _ = walk(draw, (rng.uniform(0, 700), rng.uniform(0, 700)), mode)
+        if func is not None:
+            func(Mountain("new", 1, 1)) if mode == DrawMode.ADD_MOUNTAIN else func()
+            return
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    p.add_argument("--points", type=int, default=2000)
+    p.add_argument("--edits", type=int, default=20, help="edits to check hit-testing after, each with --points / 10 hovers")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'mountains':>9} {'walk (us)':>10} {'index (us)':>11} {'build index (ms)':>17}   (per event)")
+    for n in args.sizes:
+        rng = random.Random(args.seed)
+        draw = TrailDraw(make_trail(n, args.seed))
+        draw.layout(700, 700, 0, 0)
+        index, build_time = timed(draw.box_index)
+        assert index is not None
+        events = random_events(rng, args.points)
+        walked, walk_time = timed(hit_test, walk, draw, events)
+        indexed, index_time = timed(hit_test, TrailDraw.box_and_action, draw, events)
+        check(walked, indexed)
+        for _ in range(args.edits):
+            click_edit(draw, rng)
+            draw.layout(700, 700, 0, 0)
+            events = random_events(rng, args.points // 10)
+            check(hit_test(walk, draw, events), hit_test(TrailDraw.box_and_action, draw, events))
+        print(
+            f"{n:>9} {walk_time / args.points * 1e6:>10.2f} {index_time / args.points * 1e6:>11.2f} "
+            f"{build_time * 1e3:>17.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
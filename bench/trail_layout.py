@@ -0,0 +1,101 @@
+"""
+Frame time of TrailDraw.draw_in_box on large trails, with the drawing calls
+left out so it runs without a window.
+
+Timed with the remembered required_width/required_height and with them
+worked out again on every call, as they used to be, both for frames where
+nothing changed and for frames straight after adding a mountain.
+
+    python -m bench.trail_layout [--sizes 1000 5000] [--frames 5]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from draw_trails import TrailDraw
+from mountain import Mountain
+from synthetic import make_shaped_trail
+from trail import Trail, TrailSplit
+
+
+class HeadlessDraw(TrailDraw):
+    """TrailDraw which lays the trail out without drawing it."""
+
+    def draw_line(self, sx, sy, ex, ey):
+        pass
+
+    def draw_mountain(self, x, y, scale, obj):
+        pass
+
+    def draw_branch(self, sx, sy, ex, ety, eby):
+        pass
+
+
+class UnrememberedDraw(HeadlessDraw):
+    """HeadlessDraw measuring the whole subtree every time, as TrailDraw used to."""
+
+    def required_height(self, cur_trail=None):
+        return (cur_trail or self.trail).fold(
+            self.EMPTY_HEIGHT,
+            lambda series, following: max(self.MOUNTAIN_HEIGHT, following),
+            lambda split, top, bottom, follow: max(top + self.BRANCH_SEPARATION + bottom, follow),
+        )
+
+    def required_width(self, cur_trail=None):
+        return (cur_trail or self.trail).fold(
+            0,
+            lambda series, following: self.TOTAL_MOUNTAIN_WIDTH + following,
+            lambda split, top, bottom, follow: 2 * self.BRANCH_WIDTH + max(top, bottom, self.MIN_BRANCH_CONTENT_WIDTH) + follow,
+        )
+
+
+def make_trail(mountains: int, seed: int) -> Trail:
+    """A trail of this many mountains, split in halves down to runs of 4 (synthetic.py's "wide" shape)."""
+    return make_shaped_trail("wide", mountains, seed=seed)
+
+
+def frame(draw: TrailDraw) -> float:
+    start = time.perf_counter()
+    draw.draw_in_box(700, 700, 0, 0)
+    return time.perf_counter() - start
+
+
+def edit(draw: TrailDraw, rng: random.Random) -> None:
+    """Add a mountain after a random mountain down a random path, as the GUI would."""
+    trail = draw.trail
+    while True:
+        store = trail.store
+        if store is None:
+            trail.store = trail.add_mountain_before(Mountain("new", 1, 1)).store
+            return
+        if not isinstance(store, TrailSplit) and rng.random() < 0.05:
+            trail.store = store.add_mountain_after(Mountain("new", 1, 1))
+            return
+        trail = rng.choice((store.path_top, store.path_bottom, store.path_follow)) if isinstance(store, TrailSplit) else store.following
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    p.add_argument("--frames", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'mountains':>9} {'widths/heights':>15} {'frame (ms)':>11} {'after edit (ms)':>16}")
+    for n in args.sizes:
+        for cls, label in ((UnrememberedDraw, "worked out"), (HeadlessDraw, "remembered")):
+            draw = cls(make_trail(n, args.seed))
+            rng = random.Random(args.seed)
+            frame(draw)
+            still = min(frame(draw) for _ in range(args.frames))
+            edited = []
+            for _ in range(args.frames):
+                edit(draw, rng)
+                edited.append(frame(draw))
+            print(f"{n:>9} {label:>15} {still * 1e3:>11.2f} {sum(edited) / len(edited) * 1e3:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
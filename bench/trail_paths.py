@@ -0,0 +1,92 @@
+"""
+Finding the length k paths of a trail with many splits, so that there are
+far more paths than there are mountains:
+    - collecting every path and then keeping those of length k, as
+      length_k_paths used to,
+    - Trail.iter_length_k_paths, which gives up on a branch once its path is
+      longer than k,
+    - Trail.count_length_k_paths, which counts them without going through them.
+
+It also times summarising every path: calling length_k_paths for every k,
+against Trail.path_statistics.
+
+    python -m bench.trail_paths [--splits 16] [--k 35]
+"""
+from __future__ import annotations
+
+import argparse
+
+from bench import timed
+from mountain import Mountain
+from synthetic import TrailSpec, make_trail
+from trail import Trail, TrailSeries, TrailSplit
+
+
+def every_path_then_filter(trail: Trail, k: int) -> list[list[Mountain]]:
+    """length_k_paths as it was: every path collected, copied at each split, then filtered."""
+    all_paths_list = []
+    to_visit = [(trail, [], None)]
+    while to_visit:
+        trail, path, continuation = to_visit.pop()
+        store = trail.store
+        while True:
+            if isinstance(store, TrailSeries):
+                path.append(store.mountain)
+                store = store.following.store
+            elif isinstance(store, TrailSplit):
+                continuation = (store.path_follow, continuation)
+                to_visit.append((store.path_bottom, path.copy(), continuation))
+                store = store.path_top.store
+            elif continuation is not None:
+                trail, continuation = continuation
+                store = trail.store
+            else:
+                all_paths_list.append(path)
+                break
+    return [path for path in all_paths_list if len(path) == k]
+
+
+def statistics_from_paths(trail: Trail) -> tuple[int, dict[int, int], int, int, int]:
+    """(paths, mountains histogram, min, max and total difficulty) from length_k_paths for every k."""
+    histogram = {}
+    difficulties = []
+    for k in range(len(trail.collect_all_mountains()) + 1):
+        paths = trail.length_k_paths(k)
+        if paths:
+            histogram[k] = len(paths)
+        difficulties.extend(sum(m.difficulty_level for m in path) for path in paths)
+    return len(difficulties), histogram, min(difficulties), max(difficulties), sum(difficulties)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--splits", type=int, default=16)
+    p.add_argument("--k", type=int, default=35)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    # Splits in series, each branch having 0 to 2 mountains, as do the runs between them.
+    trail = make_trail(TrailSpec(1, (args.splits, args.splits), (0, 2)), seed=args.seed)
+    expected, old_time = timed(every_path_then_filter, trail, args.k)
+    found, iter_time = timed(lambda: list(trail.iter_length_k_paths(args.k)))
+    count, count_time = timed(trail.count_length_k_paths, args.k)
+    first, first_time = timed(lambda: next(trail.iter_length_k_paths(args.k), None))
+    assert found == expected and count == len(expected)
+
+    print(f"{2 ** args.splits} paths, {len(expected)} of length {args.k}\n")
+    print(f"{'approach':>28} {'ms':>10}")
+    print(f"{'every path, then filter':>28} {old_time * 1e3:>10.2f}")
+    print(f"{'iter_length_k_paths':>28} {iter_time * 1e3:>10.2f}")
+    print(f"{'  first path only':>28} {first_time * 1e3:>10.2f}")
+    print(f"{'count_length_k_paths':>28} {count_time * 1e3:>10.2f}")
+
+    summary, paths_time = timed(statistics_from_paths, trail)
+    stats, stats_time = timed(trail.path_statistics)
+    assert summary == (stats.paths, stats.mountains_histogram(), stats.min_difficulty, stats.max_difficulty, stats.total_difficulty)
+    print(f"\n{'every path summarised':>28} {'ms':>10}")
+    print(f"{'length_k_paths for every k':>28} {paths_time * 1e3:>10.2f}")
+    print(f"{'path_statistics':>28} {stats_time * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Saving and loading trails of 10k to 1M trails (counting every Trail, empty or not):
+    - json: serialize/deserialize, through dataclasses.asdict and a dict tree,
+    - binary: serialize.dump/load, written and read in pre-order straight from
+      and into the trail, each mountain written once.
+
+The trails are synthetic.py's "wide" shape: a mountain and a split, nested in
+both paths down to runs of up to 4 mountains. json is only run up to
+--json-max trails, as it's slow.
+
+    python -m bench.trail_save [--sizes 10000 100000 1000000] [--memory]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import tracemalloc
+
+from bench import timed
+from serialize import deserialize, dump, load, serialize
+from synthetic import make_shaped_trail
+from trail import Trail
+
+
+def make_trail(trails: int, seed: int) -> Trail:
+    """A trail with about this many trails in it: a wide trail has about 1.75 for each mountain."""
+    return make_shaped_trail("wide", trails * 4 // 7, seed=seed)
+
+
+def count_trails(trail: Trail) -> int:
+    return trail.fold(1, lambda series, following: following + 1, lambda split, top, bottom, follow: top + bottom + follow + 1)
+
+
+def peak(func, *args) -> int:
+    """Most memory allocated while running func, in bytes."""
+    tracemalloc.start()
+    func(*args)
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def binary_save(trail: Trail) -> bytes:
+    f = io.BytesIO()
+    dump(trail, f)
+    return f.getvalue()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--json-max", type=int, default=100_000)
+    p.add_argument("--memory", action="store_true", help="also measure the memory saving takes (slow)")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'trails':>9} {'format':>7} {'save (ms)':>10} {'load (ms)':>10} {'size (KiB)':>11}" + (f" {'save peak (KiB)':>16}" if args.memory else ""))
+    for n in args.sizes:
+        trail = make_trail(n, args.seed)
+        trails = count_trails(trail)
+
+        data, save_time = timed(binary_save, trail)
+        loaded, load_time = timed(load, io.BytesIO(data))
+        assert loaded == trail and count_trails(loaded) == trails
+        memory = f" {peak(binary_save, trail) / 1024:>16.0f}" if args.memory else ""
+        print(f"{trails:>9} {'binary':>7} {save_time * 1e3:>10.1f} {load_time * 1e3:>10.1f} {len(data) / 1024:>11.0f}{memory}")
+
+        if n <= args.json_max:
+            text, save_time = timed(serialize, trail)
+            _, load_time = timed(lambda: deserialize(json.loads(text)))
+            memory = f" {peak(serialize, trail) / 1024:>16.0f}" if args.memory else ""
+            print(f"{trails:>9} {'json':>7} {save_time * 1e3:>10.1f} {load_time * 1e3:>10.1f} {len(text) / 1024:>11.0f}{memory}")
+
+
+if __name__ == "__main__":
+    main()
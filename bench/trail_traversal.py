@@ -0,0 +1,62 @@
+"""
+Trail traversals on one long trail: runs of mountains in series with a few
+splits along the way, each branch a run as long (see synthetic.py). A trail
+this long is far deeper than Python's recursion limit, so it can only be
+walked without recursion.
+
+    python -m bench.trail_traversal [--mountains 100000] [--splits 5]
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+
+from bench import timed
+from draw_trails import TrailDraw
+from serialize import deserialize
+from synthetic import TrailSpec, make_trail
+from trail import Trail
+
+
+def as_dict(trail: Trail) -> dict:
+    """The dict serialize would give for the trail, built without recursion."""
+    return trail.fold(
+        {"store": None},
+        lambda series, following: {"store": {"mountain": dataclasses.asdict(series.mountain), "following": following}},
+        lambda split, top, bottom, follow: {"store": {"path_top": top, "path_bottom": bottom, "path_follow": follow}},
+    )
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--mountains", type=int, default=100_000)
+    p.add_argument("--splits", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    # The top level's splits + 1 runs and each split's two branches make 3*splits + 1 runs.
+    run = args.mountains // (3 * args.splits + 1)
+    trail = make_trail(TrailSpec(1, (args.splits, args.splits), (run, run)), seed=args.seed)
+    draw = TrailDraw(trail)
+    every = trail.collect_all_mountains()
+    serialized = as_dict(trail)
+
+    cases = [
+        ("iter_mountains (first 10)", lambda: [m for m, _ in zip(trail.iter_mountains(), range(10))]),
+        ("iter_mountains (all)", lambda: sum(1 for _ in trail.iter_mountains())),
+        ("collect_all_mountains", trail.collect_all_mountains),
+        ("length_k_paths", lambda: trail.length_k_paths((2 * args.splits + 1) * run)),  # every path
+        ("required_height", draw.required_height),
+        ("required_width", draw.required_width),
+        ("deserialize", lambda: deserialize(serialized)),
+    ]
+    print(f"{len(every)} mountains, {args.splits} splits\n")
+    print(f"{'traversal':>26} {'ms':>9}")
+    for name, func in cases:
+        _, seconds = timed(func)
+        print(f"{name:>26} {seconds * 1e3:>9.2f}")
+    assert len(deserialize(serialized).collect_all_mountains()) == len(every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Walking many personalities over the same trail:
+    - follow_path: Trail.follow_path for each of them,
+    - compiled: Trail.compile once, then CompiledTrail.walk_many for all of them.
+
+The walkers are an even mix of TopWalker, BottomWalker, LazyWalker and a
+walker picking branches at random, so only the random ones are asked at every
+split. Both are checked to give every walker the same mountains.
+
+    python -m bench.walkers [--walkers 1000] [--max-depth 6] [--splits 2 2]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+
+from bench import timed
+from personality import BottomWalker, LazyWalker, TopWalker, WalkerPersonality
+from synthetic import TrailSpec, make_trail
+
+
+class RandomWalker(WalkerPersonality):
+    def __init__(self, seed: int) -> None:
+        super().__init__()
+        self.rng = random.Random(seed)
+
+    def select_branch(self, top_branch, bottom_branch) -> bool:
+        return self.rng.random() < 0.5
+
+
+def walkers(amount: int) -> list[WalkerPersonality]:
+    kinds = (TopWalker, BottomWalker, LazyWalker, RandomWalker)
+    return [RandomWalker(i) if kinds[i % 4] is RandomWalker else kinds[i % 4]() for i in range(amount)]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--walkers", type=int, nargs="+", default=[100, 1000])
+    p.add_argument("--max-depth", type=int, default=6)
+    p.add_argument("--splits", type=int, nargs=2, default=[2, 2])
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    trail = make_trail(TrailSpec(args.max_depth, tuple(args.splits)), seed=args.seed)
+    compiled, compile_time = timed(trail.compile)
+    print(f"{len(compiled.code)} instructions, {len(compiled.splits)} splits, compiled in {compile_time * 1e3:.1f} ms\n")
+    print(f"{'walkers':>8} {'follow_path (ms)':>17} {'compiled (ms)':>14}")
+    for amount in args.walkers:
+        one_by_one = walkers(amount)
+        _, follow_time = timed(lambda: [trail.follow_path(walker) for walker in one_by_one])
+        batch = walkers(amount)
+        _, batch_time = timed(trail.compile().walk_many, batch)
+        assert all(a.mountains == b.mountains for a, b in zip(one_by_one, batch))
+        print(f"{amount:>8} {follow_time * 1e3:>17.1f} {batch_time * 1e3:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+from __future__ import annotations
+import heapq
+from array import array
+from operator import itemgetter
+from typing import Generic, TypeVar, Iterator
+
+from table_stats import histogram, format_report
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class CompactInfiniteHashTable(Generic[K, V]):
+    """
+    Infinite Hash Table stored in flat arrays.
+
+    Works the same way as InfiniteHashTable, with the same positions from
+    `get_location`, but without a Python object per table or per key:
+        - `_slots` holds the slots of every table, table n's slots being
+          `_slots[n*TABLE_SIZE:(n+1)*TABLE_SIZE]`. Table 0 is the top table.
+          A slot is 0 when empty, k+1 for the key stored at index k of
+          `_keys`/`_values`, or -n for table n one level down.
+        - `_used` holds how many slots of each table are in use, and
+          `_position_sums` the sum of those slots' positions, which is the
+          position of the last one when only one is left.
+    Freed tables and key indexes are reused by later inserts.
+
+    Type Arguments:
+        - K:    Key Type. In most cases should be string.
+                Otherwise `hash` should be overwritten.
+        - V:    Value Type.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    TABLE_SIZE = 27
+
+    def __init__(self) -> None:
+        self._slots = array("q", bytes(8 * self.TABLE_SIZE))
+        self._used = array("q", [0])
+        self._position_sums = array("q", [0])
+        self._free_tables = []
+        self._keys = []
+        self._values = []
+        self._free_keys = []
+        self.count = 0
+
+    def hash(self, key: K, level: int = 0) -> int:
+        """Hash the key for the table `level` levels down from the top."""
+        if level < len(key):
+            return ord(key[level]) % (self.TABLE_SIZE-1)
+        return self.TABLE_SIZE-1
+
+    def _descend(self, key: K) -> tuple[list[int], int]:
+        """
+        Walk down from the top table to the key.
+
+        :raises KeyError: when the key doesn't exist.
+        :returns: The sequence of positions to the key, and its index in `_keys`.
+        :complexity: O(len(key)*hash)
+        """
+        sequence = []
+        table = 0
+        level = 0
+        while True:
+            pos = self.hash(key, level)
+            sequence.append(pos)
+            slot = self._slots[table * self.TABLE_SIZE + pos]
+            if slot == 0:
+                raise KeyError(key)
+            elif slot < 0:  # a table of keys sharing this prefix
+                table = -slot
+                level += 1
+            elif self._keys[slot - 1] == key:
+                return sequence, slot - 1
+            else:
+                raise KeyError(key)
+
+    def get_location(self, key: K) -> list[int]:
+        """
+        Get the sequence of positions required to access this key.
+
+        :raises KeyError: when the key doesn't exist.
+        """
+        sequence, _ = self._descend(key)
+        return sequence
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :raises KeyError: when the key doesn't exist.
+        """
+        _, index = self._descend(key)
+        return self._values[index]
+
+    def __contains__(self, key: K) -> bool:
+        try:
+            self._descend(key)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _new_key(self, key: K, value: V) -> int:
+        """Store a key and value, returning their index."""
+        if self._free_keys:
+            index = self._free_keys.pop()
+            self._keys[index] = key
+            self._values[index] = value
+        else:
+            index = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+        return index
+
+    def _new_table(self) -> int:
+        """Make an empty table, returning its number."""
+        if self._free_tables:
+            return self._free_tables.pop()
+        self._slots.extend(bytes(8 * self.TABLE_SIZE))
+        self._used.append(0)
+        self._position_sums.append(0)
+        return len(self._used) - 1
+
+    def __setitem__(self, key: K, value: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+
+        :complexity: O(len(key)*hash)
+        """
+        table = 0
+        level = 0
+        while True:
+            pos = self.hash(key, level)
+            slot_index = table * self.TABLE_SIZE + pos
+            slot = self._slots[slot_index]
+            if slot == 0:
+                self._slots[slot_index] = self._new_key(key, value) + 1
+                self._used[table] += 1
+                self._position_sums[table] += pos
+                self.count += 1
+                return
+            elif slot < 0:
+                table = -slot
+                level += 1
+            elif self._keys[slot - 1] == key:
+                self._values[slot - 1] = value
+                return
+            else:
+                # Conflict: move the key already here into a new table one level down, then try again from here.
+                new_table = self._new_table()
+                new_pos = self.hash(self._keys[slot - 1], level + 1)
+                self._slots[new_table * self.TABLE_SIZE + new_pos] = slot
+                self._used[new_table] = 1
+                self._position_sums[new_table] = new_pos
+                self._slots[slot_index] = -new_table
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table.
+        Tables left holding a single key are collapsed into the table above.
+
+        :raises KeyError: when the key doesn't exist.
+        :complexity: O(len(key)*hash)
+        """
+        sequence, index = self._descend(key)
+        tables = [0]
+        for pos in sequence[:-1]:
+            tables.append(-self._slots[tables[-1] * self.TABLE_SIZE + pos])
+
+        self._clear_slot(tables[-1], sequence[-1])
+        self._keys[index] = self._values[index] = None
+        self._free_keys.append(index)
+        self.count -= 1
+
+        depth = len(tables) - 1
+        while depth > 0:
+            table = tables[depth]
+            remaining = 0
+            if self._used[table] > 1:
+                break
+            elif self._used[table] == 1:
+                remaining = self._slots[table * self.TABLE_SIZE + self._position_sums[table]]
+                if remaining < 0:  # the one thing left is a table, which still needs to be here
+                    break
+                self._clear_slot(table, self._position_sums[table])
+            self._free_tables.append(table)
+            depth -= 1
+            if remaining == 0:
+                self._clear_slot(tables[depth], sequence[depth])
+            else:
+                self._slots[tables[depth] * self.TABLE_SIZE + sequence[depth]] = remaining
+
+    def _clear_slot(self, table: int, pos: int) -> None:
+        """Empty a slot in use, keeping `_used` and `_position_sums` up to date."""
+        self._slots[table * self.TABLE_SIZE + pos] = 0
+        self._used[table] -= 1
+        self._position_sums[table] -= pos
+
+    def _find_prefix(self, prefix: str) -> int:
+        """
+        Walk down to where the keys starting with prefix are stored.
+        Returns the slot holding them: -n for table n, k+1 for key k, 0 for none.
+        The empty prefix gives the top table, which is also 0.
+        Keys which hash the same as the prefix without starting with it can be
+        in there too, so results still need checking.
+
+        :complexity: O(len(prefix)*hash)
+        """
+        table = 0
+        for level in range(len(prefix)):
+            slot = self._slots[table * self.TABLE_SIZE + self.hash(prefix, level)]
+            if slot >= 0:
+                return slot
+            table = -slot
+        return -table
+
+    def _sorted_items(self, table: int) -> Iterator[tuple[K, V]]:
+        """
+        Every (key, value) in table and the tables below it, in key order,
+        merging the slots' sorted streams as InfiniteHashTable does.
+
+        :complexity: O(N*D*log(TABLE_SIZE)), N being the number of keys and D the depth.
+        """
+        streams = []
+        start = table * self.TABLE_SIZE
+        for slot in self._slots[start:start + self.TABLE_SIZE]:
+            if slot < 0:
+                streams.append(self._sorted_items(-slot))
+            elif slot > 0:
+                streams.append(iter(((self._keys[slot - 1], self._values[slot - 1]),)))
+        yield from heapq.merge(*streams, key=itemgetter(0))
+
+    def iter_prefix(self, prefix: str) -> Iterator[tuple[K, V]]:
+        """
+        Generate every (key, value) whose key starts with prefix, in key order.
+
+        :complexity: O(len(prefix)*hash + R*D*log(TABLE_SIZE)), R being the number
+        of keys under the prefix's table and D their depth.
+        """
+        slot = self._find_prefix(prefix)
+        if slot > 0:
+            if self._keys[slot - 1].startswith(prefix):
+                yield self._keys[slot - 1], self._values[slot - 1]
+        elif slot < 0 or not prefix:
+            for key, value in self._sorted_items(-slot):
+                if key.startswith(prefix):
+                    yield key, value
+
+    def count_prefix(self, prefix: str) -> int:
+        """
+        Count the keys which start with prefix.
+
+        :complexity: O(len(prefix)*hash + T*TABLE_SIZE), T being the number of tables under the prefix's table.
+        """
+        slot = self._find_prefix(prefix)
+        if slot > 0:
+            return 1 if self._keys[slot - 1].startswith(prefix) else 0
+        if slot == 0 and prefix:
+            return 0
+        total = 0
+        stack = [-slot]
+        while stack:
+            start = stack.pop() * self.TABLE_SIZE
+            for slot in self._slots[start:start + self.TABLE_SIZE]:
+                if slot < 0:
+                    stack.append(-slot)
+                elif slot > 0 and self._keys[slot - 1].startswith(prefix):
+                    total += 1
+        return total
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """Generate every (key, value) in the table, in key order."""
+        return self.iter_prefix("")
+
+    def stats(self) -> dict:
+        """
+        Statistics about the table's shape, as in InfiniteHashTable.stats,
+        plus the sizes of the arrays.
+
+        :complexity: O(N*TABLE_SIZE), N being the number of tables.
+        """
+        fan_outs = {}
+        key_depths = []
+        stack = [(0, 0)]
+        while stack:
+            table, level = stack.pop()
+            start = table * self.TABLE_SIZE
+            for slot in self._slots[start:start + self.TABLE_SIZE]:
+                if slot < 0:
+                    stack.append((-slot, level + 1))
+                elif slot > 0:
+                    key_depths.append(level + 1)
+            fan_outs.setdefault(level, []).append(self._used[table])
+        return {
+            "entries": self.count,
+            "tables": sum(len(used) for used in fan_outs.values()),
+            "max_depth": max(key_depths, default=0),
+            "level_fan_out": {
+                level: {
+                    "tables": len(used),
+                    "avg_used_slots": sum(used) / len(used),
+                    "max_used_slots": max(used),
+                }
+                for level, used in sorted(fan_outs.items())
+            },
+            "key_depths": histogram(key_depths),
+            "allocated_tables": len(self._used),
+            "allocated_keys": len(self._keys),
+        }
+
+    def stats_report(self) -> str:
+        """`stats` as human readable text."""
+        return format_report(f"{type(self).__name__} stats", self.stats())
@@ -1,13 +1,37 @@
 from __future__ import annotations
 
-from typing import Generic, TypeVar, Iterator
+from functools import lru_cache
+from typing import Generic, TypeVar, Iterator, Iterable
 from data_structures.hash_table import LinearProbeTable, FullError
 from data_structures.referential_array import ArrayR
+from table_stats import ProbeStats, histogram, format_report
 
 K1 = TypeVar('K1')
 K2 = TypeVar('K2')
 V = TypeVar('V')
 
+DIGEST_CACHE_SIZE = 1 << 16
+
+# Left in a top level slot when its key1 is deleted, so that probing carries on
+# past it to any keys further along the cluster.
+TOMBSTONE = object()
+
+
+@lru_cache(maxsize=DIGEST_CACHE_SIZE)
+def key_digest(key: str) -> int:
+    """
+    64-bit FNV-1a digest of a string key.
+
+    The digest doesn't depend on any table size, so it is computed once per key
+    and cached. Hashing into a table is then just `key_digest(key) % table_size`.
+
+    :complexity: O(len(key)) the first time a key is seen, O(1) while it stays cached.
+    """
+    value = 0xcbf29ce484222325
+    for char in key:
+        value = ((value ^ ord(char)) * 0x100000001b3) & 0xFFFFFFFFFFFFFFFF
+    return value
+
 
 class DoubleKeyTable(Generic[K1, K2, V]):
     """
@@ -29,13 +53,19 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
     HASH_BASE = 31
 
-    def __init__(self, sizes: list | None = None, internal_sizes: list | None = None) -> None:
-        """Follow a path and add mountains according to a personality.
+    # The top level table grows once more than this fraction of its slots are used
+    # (by keys or tombstones), and shrinks once less than a quarter of that is left.
+    MAX_LOAD_FACTOR = 0.5
+
+    def __init__(self, sizes: list | None = None, internal_sizes: list | None = None, max_load_factor: float | None = None) -> None:
+        """Create an empty table.
         Args:
         - sizes which is a list, if it's none use TABLE_SIZES as sizes
         - internal sizes which is a list, if it's none use TABLE_SIZES as internal sizes
+        - max_load_factor which is a float between 0 and 1, if it's none use MAX_LOAD_FACTOR
 
-        Raises: None
+        Raises:
+        - raises ValueError: When max_load_factor is not between 0 and 1.
 
         Returns: None, but initializes double key table
 
@@ -49,37 +79,33 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         self.internal_sizes = internal_sizes
         if self.internal_sizes is None:
             self.internal_sizes = self.TABLE_SIZES
+        self.max_load_factor = max_load_factor
+        if self.max_load_factor is None:
+            self.max_load_factor = self.MAX_LOAD_FACTOR
+        if not 0 < self.max_load_factor < 1:
+            raise ValueError("max_load_factor must be between 0 and 1")
         self.size_index = 0
         self.table = ArrayR(self.sizes[self.size_index])
-        self.count = 0
+        self.count = 0  # number of (key1, key2) pairs
+        self.outer_count = 0  # number of top level slots holding a key1
+        self.deleted_count = 0  # number of top level slots holding a TOMBSTONE
+        self._probe_stats = None  # ProbeStats while stats are enabled
 
     def hash1(self, key: K1) -> int:
         """
         Hash the 1st key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: O(key_digest), so O(1) for keys that have been seen recently.
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        return key_digest(key) % self.table_size
 
     def hash2(self, key: K2, sub_table: LinearProbeTable[K2, V]) -> int:
         """
         Hash the 2nd key for insert/retrieve/update into the hashtable.
 
-        :complexity: O(len(key))
+        :complexity: O(key_digest), so O(1) for keys that have been seen recently.
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % sub_table.table_size
-            a = a * self.HASH_BASE % (sub_table.table_size - 1)
-        return value
+        return key_digest(key) % sub_table.table_size
 
     def _linear_probe(self, key1: K1, key2: K2, is_insert: bool) -> tuple[int, int]:
         """
@@ -104,31 +130,73 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         - best case: When is_insert is False. O(hash1+ArrayR.get_item+comp+ArrayR.get_item+LinearProbeTable._linear_probe). Meaning when we hash key1 we immediately get the
         key we want. Then we hash key2, again we immediately get the key we want.
         """
+        pos1 = self._outer_probe(key1, is_insert)
+        if self.table[pos1] is None or self.table[pos1] is TOMBSTONE:  # this means key1 has no value and we can key2 wherever we want
+            sample_inner_dict = LinearProbeTable(self.internal_sizes)
+            pos2 = self.hash2(key2, sample_inner_dict)
+            return (pos1, pos2)
+        inner_dict = self.table[pos1][1]  # getting the value of key1
+        pos2 = inner_dict._linear_probe(key2, is_insert)  # linear probing through the value of key1 which is a dictionary
+        return (pos1, pos2)
+
+    def _outer_probe(self, key1: K1, is_insert: bool) -> int:
+        """
+        Find the position of key1 in the top level table using linear probing.
+        Tombstones are probed past. When inserting a new key1, the first tombstone
+        in the cluster is reused.
+        Args:
+        - key1 which is a generic type object
+        - is_insert which is a bool. If True, an empty position is returned when key1 is not in the table.
+
+        Raises:
+        - raises KeyError: When key1 is not in the table, but is_insert is False.
+        - raises FullError: When the top level table is full and key1 cannot be inserted.
+
+        Returns:
+        - The position of key1 in the top level table, or the empty position it should go in.
+
+        Complexity:
+        - Worst case: O(hash1+N*(ArrayR.get_item+comp)), N being how many items are in the cluster.
+        - Best case: O(hash1+ArrayR.get_item+comp), key1 is found straight away at its hashed position.
+        """
         # Initial position
         pos1 = self.hash1(key1)
+        first_deleted = None
 
         for _ in range(self.table_size):
-            if self.table[pos1] is None:
+            entry = self.table[pos1]
+            if entry is None:
                 # Empty spot. Am I upserting or retrieving?
-                if is_insert:  # this means key1 has no value and we can key2 wherever we want
-                    sample_inner_dict = LinearProbeTable(self.internal_sizes)
-                    pos2 = self.hash2(key2, sample_inner_dict)
-                    return (pos1, pos2)
+                if is_insert:
+                    return pos1 if first_deleted is None else first_deleted
                 else:
                     raise KeyError(key1)
-            elif self.table[pos1][0] == key1:  # this means we have found key1
-                inner_dict = self.table[pos1][1]  # getting the value of key1
-                pos2 = inner_dict._linear_probe(key2,is_insert)  # linear probing through the value of key1 which is a dictionary
-                return (pos1, pos2)
-            else:
-                # Taken by something else. Time to linear probe.
-                pos1 = (pos1 + 1) % self.table_size
-
-        if is_insert:
+            elif entry is TOMBSTONE:  # key1 could still be further along the cluster
+                if first_deleted is None:
+                    first_deleted = pos1
+            elif entry[0] == key1:  # this means we have found key1
+                return pos1
+            # Taken by something else. Time to linear probe.
+            pos1 = (pos1 + 1) % self.table_size
+
+        if is_insert and first_deleted is not None:
+            return first_deleted
+        elif is_insert:
             raise FullError("Table is full!")
         else:
             raise KeyError(key1)
 
+    def _entries(self) -> Iterator[ArrayR]:
+        """
+        Returns an iterator of the [key1, inner table] entries in the top level table,
+        skipping empty slots and tombstones.
+
+        :complexity: O(table_size)
+        """
+        for entry in self.table:
+            if entry is not None and entry is not TOMBSTONE:
+                yield entry
+
     def iter_keys(self, key: K1 | None = None) -> Iterator[K1 | K2]:
         """
         key = None:
@@ -137,15 +205,16 @@ class DoubleKeyTable(Generic[K1, K2, V]):
             Returns an iterator of all keys in the bottom-hash-table for k.
         """
         if key is None:
-            for entry in self.table:
-                if entry is not None:
-                    yield entry[0]
+            for entry in self._entries():
+                yield entry[0]
         else:
-            pos1 = self.hash1(key)
-            if self.table[pos1] is not None:
-                inner_dict = self.table[pos1][1]
-                for k2 in inner_dict.keys():
-                    yield k2
+            try:
+                pos1 = self._outer_probe(key, False)
+            except KeyError:
+                return
+            inner_dict = self.table[pos1][1]
+            for k2 in inner_dict.keys():
+                yield k2
 
     def keys(self, key: K1 | None = None) -> list[K1]:
         """
@@ -159,22 +228,20 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         Or returns all bottom-level keys for the corresponding top-level key.
 
         Complexity:
-        - Worst: O(comp+N*(comp+comp+LinearProbeTable.keys))=O(N*(comp+comp=LinearProbeTable.keys)), N being the table size.
-        This happens when the top level key doesn't exist. So we need to iterate through the whole top level table.
-        - Best: O(1+LinearProbeTable.keys). Meaning the top level key we entered is in index 0 of the top level table.
+        - Worst: O(hash1 + N*comp + LinearProbeTable.keys), N being the table size, when the outer table is one long cluster.
+        - Best: O(hash1 + comp + LinearProbeTable.keys), the top level key is where it hashes to.
         """
         if key:
-            for inner_array in self.table: #searching for the key
-                if inner_array is not None:
-                    if inner_array[0]==key:
-                        inner_dict=inner_array[1]
-                        return inner_dict.keys() #using keys method from linear probe table
+            try:
+                pos1 = self._outer_probe(key, False)
+            except KeyError:
+                return []
+            return self.table[pos1][1].keys() #using keys method from linear probe table
         else:
             keys_array = []
-            for inner_array in self.table:  # looping through the table
-                if inner_array is not None:
-                    key1, inner_dict = inner_array
-                    keys_array.append(key1)  # appending to keys array
+            for inner_array in self._entries():  # looping through the table
+                key1, inner_dict = inner_array
+                keys_array.append(key1)  # appending to keys array
             return keys_array
 
 
@@ -186,18 +253,18 @@ class DoubleKeyTable(Generic[K1, K2, V]):
             Returns an iterator of all values in the bottom-hash-table for k.
         """
         if key is None:
-            for entry in self.table:
-                if entry is not None:
-                    inner_dict = entry[1]
-                    for value in inner_dict.values():
-                        yield value
+            for entry in self._entries():
+                inner_dict = entry[1]
+                for value in inner_dict.values():
+                    yield value
         else:
-            pos1 = self.hash1(key)
-            if self.table[pos1] is not None:
-                inner_dict = self.table[pos1][1]
-                for k2, value in inner_dict.items():
-                    if k2 == key or (isinstance(k2, tuple) and k2[0] == key):
-                        yield value
+            try:
+                pos1 = self._outer_probe(key, False)
+            except KeyError:
+                return
+            inner_dict = self.table[pos1][1]
+            for value in inner_dict.values():
+                yield value
 
     def values(self, key: K1 | None = None) -> list[V]:
         """
@@ -211,25 +278,23 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         Or returns all the values for the corresponding top-level key.
 
         Complexity:
-        - Worst: O(comp+N*(comp+comp+LinearProbeTable.values))=O(N*(comp+comp+LinearProbeTable.keys)). N being the table size.
-        This happens when the top level key doesn't exist. So we need to iterate through the whole top level table.
-        - Best: O(1+LinearProbeTable.values). Meaning the top level key we entered is in index 0 of the top level table.
+        - Worst: O(hash1 + N*comp + LinearProbeTable.values), N being the table size, when the outer table is one long cluster.
+        - Best: O(hash1 + comp + LinearProbeTable.values), the top level key is where it hashes to.
         """
         if key is None:
             values_list=[]
-            for inner_array in self.table:
-                if inner_array is not None:
-                    inner_dict=inner_array[1]
-                    inner_dict_values=inner_dict.values()
-                    for value in inner_dict_values:
-                        values_list.append(value)
+            for inner_array in self._entries():
+                inner_dict=inner_array[1]
+                inner_dict_values=inner_dict.values()
+                for value in inner_dict_values:
+                    values_list.append(value)
             return values_list
         else:
-            for inner_array in self.table: #searching for the key
-                if inner_array is not None:
-                    if inner_array[0]==key:
-                        inner_dict=inner_array[1]
-                        return inner_dict.values() #using values method from linear probe table
+            try:
+                pos1 = self._outer_probe(key, False)
+            except KeyError:
+                return []
+            return self.table[pos1][1].values() #using values method from linear probe table
 
     def __contains__(self, key: tuple[K1, K2]) -> bool:
         """
@@ -268,26 +333,133 @@ class DoubleKeyTable(Generic[K1, K2, V]):
     def __setitem__(self, key: tuple[K1, K2], data: V) -> None:
         """
         Set an (key, value) pair in our hash table.
+
+        The top level grows once its load (keys and tombstones) is over max_load_factor.
+        At the largest size it is left to fill up instead, only clearing out tombstones
+        once there are enough of them.
         """
 
         key1, key2 = key
-        pos1, pos2 = self._linear_probe(key1, key2, True)
+        self._insert(key1, key2, data)
+        if self.outer_count + self.deleted_count > self.max_load_factor * self.table_size:
+            if self.outer_count <= self.max_load_factor / 2 * self.table_size:
+                # Mostly tombstones, so clearing them out is enough.
+                self._resize(self.size_index)
+            elif self.size_index < len(self.sizes) - 1:
+                self._rehash()
+            elif self.deleted_count > self.max_load_factor / 4 * self.table_size:
+                # Already the largest size. Only clear out tombstones once they are a good
+                # share of the table, so that each clear out is paid for by as many deletes.
+                self._resize(self.size_index)
+            # Otherwise the load goes over max_load_factor, until FullError, as it did before.
+
+    def _insert(self, key1: K1, key2: K2, data: V) -> None:
+        """
+        Set an (key, value) pair without checking whether the top level table needs to grow.
+        A new key1 may reuse a tombstone's slot.
+        Args:
+        - key1 which is a generic type object
+        - key2 which is a generic type object
+        - data which is the value to store
 
-        if self.table[pos1] is None:  # key1 is not in table hence has no value
+        Raises:
+        - raises FullError: When the top level table is full and key1 is new.
+
+        Returns: None, but stores data under (key1, key2)
+
+        Complexity:
+        - Worst case: O(_outer_probe+LinearProbeTable.__setitem__)
+        - Best case: the same
+        """
+        pos1 = self._outer_probe(key1, True)
+
+        if self.table[pos1] is None or self.table[pos1] is TOMBSTONE:  # key1 is not in table hence has no value
+            if self.table[pos1] is TOMBSTONE:
+                self.deleted_count -= 1
+            self.outer_count += 1
             inner_array = ArrayR(2)  # creating [none,none]
-            inner_dict = LinearProbeTable(self.internal_sizes)  # creating empty inner dictionary
-            inner_dict.hash = lambda k: self.hash2(k, inner_dict)  # setting the hash for the inner dictionary
-            inner_dict[key2] = data  # setting the inner dictionary
+            inner_dict = self._new_inner_table()  # creating empty inner dictionary
             inner_array[0] = key1  # creating [key1,none]
             inner_array[1] = inner_dict  # creating [key1,inner dictionary]
             self.table[pos1] = inner_array  # inserting [key1,inner dictionary] to the outer table in position 1
         else:  # if there is already something in pos1, key1 is in table and has a value
             inner_dict = self.table[pos1][1]  # getting the inner dictionary which has been filled
-            inner_dict[key2] = data  # setting the inner dict
-            self.table[pos1][1] = inner_dict  # inserting back the new modified inner dict
-        self.count += 1
-        if self.count >= self.sizes[self.size_index]:
-            self._rehash()
+        old_len = len(inner_dict)
+        inner_dict[key2] = data  # setting the inner dict
+        self.count += len(inner_dict) - old_len  # updating an existing key2 doesn't add an element
+
+    def _new_inner_table(self) -> LinearProbeTable[K2, V]:
+        """
+        Create an empty bottom level table which hashes with `hash2`.
+
+        :complexity: O(internal_sizes[0]) to allocate the array.
+        """
+        inner_dict = LinearProbeTable(self.internal_sizes)
+        inner_dict.hash = lambda k: self.hash2(k, inner_dict)  # setting the hash for the inner dictionary
+        return inner_dict
+
+    @classmethod
+    def from_items(
+        cls,
+        items: Iterable[tuple[tuple[K1, K2], V]],
+        expected_outer: int | None = None,
+        expected_inner: int | None = None,
+        sizes: list | None = None,
+        internal_sizes: list | None = None,
+        max_load_factor: float | None = None,
+    ) -> DoubleKeyTable[K1, K2, V]:
+        """Build a table from many ((key1, key2), value) pairs at once.
+        Args:
+        - items which is an iterable of ((key1, key2), value) pairs
+        - expected_outer which is the expected number of distinct top-level keys
+        - expected_inner which is the expected number of bottom-level keys per top-level key
+        - sizes, internal_sizes and max_load_factor, used the same way as in __init__
+        If either expected count is None, items is read into a list and counted first.
+
+        Raises:
+        - raises FullError: When the largest table size is still too small for the items.
+
+        Returns:
+        - A new DoubleKeyTable. Both levels start at a size large enough for the expected
+        counts, so loading does no intermediate rehashing as long as the counts are right.
+        If they are too low, the tables still grow as usual.
+
+        Complexity:
+        - Worst case: O(N*__setitem__ + table_size), N being the number of items.
+        - Best case: the same
+        """
+        if expected_outer is None or expected_inner is None:
+            items = list(items)
+            inner_counts = {}
+            for (key1, _), _ in items:
+                inner_counts[key1] = inner_counts.get(key1, 0) + 1
+            if expected_outer is None:
+                expected_outer = len(inner_counts)
+            if expected_inner is None:
+                expected_inner = max(inner_counts.values(), default=0)
+
+        table = cls(sizes, internal_sizes, max_load_factor)
+        table.size_index = cls._size_index_for(table.sizes, expected_outer, table.max_load_factor)
+        table.table = ArrayR(table.sizes[table.size_index])
+        # LinearProbeTable resizes once it is more than half full.
+        table.internal_sizes = table.internal_sizes[cls._size_index_for(table.internal_sizes, expected_inner, 0.5):]
+
+        for key, data in items:
+            table[key] = data
+        return table
+
+    @staticmethod
+    def _size_index_for(sizes: list, expected: int, load_factor: float) -> int:
+        """
+        Index of the first size which holds `expected` items without going over `load_factor`.
+        Falls back to the largest size.
+
+        :complexity: O(len(sizes))
+        """
+        for index, size in enumerate(sizes):
+            if expected <= load_factor * size:
+                return index
+        return len(sizes) - 1
 
     def __delitem__(self, key: tuple[K1, K2]) -> None:
         """
@@ -295,73 +467,49 @@ class DoubleKeyTable(Generic[K1, K2, V]):
 
         :raises KeyError: when the key doesn't exist.
         """
-        # biasanya key1 tetap ada tapi key2 dihapus
-        # kalau len dari value key1 hanya 1 berarti hapus key1 dan key2
+        if len(key) != 2:
+            raise KeyError(key)
         key1, key2 = key
-
-        if len(key) == 1:
-            # Removing a key-value pair from inner dictionary
-            for outer_pos in range(self.table_size):
-                if self.table[outer_pos] is not None and self.table[outer_pos][1].__contains__(key1):
-                    # We found the key1, now let's remove key2 from its inner dictionary
-                    del self.table[outer_pos][1][key1][key2]
-                    if len(self.table[outer_pos][1][key1]) == 0:
-                        # If there are no more key-value pairs in the inner dictionary, delete the outer key-value pair
-                        del self.table[outer_pos][1][key1]
-                        if len(self.table[outer_pos][1]) == 0:
-                            self.table[
-                                outer_pos] = None  # If there are no more key-value pairs in the outer dictionary, delete the entire inner dictionary
-                    self.count -= 1
-                    return
-            # If the outer loop completes without finding the key, raise a KeyError
-            raise KeyError(key1)
-
-        elif len(key) == 2:
-            # Removing a key-value pair from outer dictionary
-            pos1 = self.hash1(key1)
-            for _ in range(self.table_size):
-                if self.table[pos1] is None:
-                    raise KeyError(key1)
-                elif self.table[pos1][0] == key1:
-                    # We found the key1, now let's remove the entire inner dictionary associated with key1
-                    del self.table[pos1][1][key2]
-                    if len(self.table[pos1][1]) == 0:
-                        # If there are no more key-value pairs in the inner dictionary, delete the outer key-value pair
-                        self.table[pos1] = None
-                    self.count -= 1
-                    return
-                else:
-                    # Taken by something else. Time to linear probe.
-                    pos1 = (pos1 + 1) % self.table_size
-            # If the loop completes without finding the key, raise a KeyError
-            raise KeyError(key1)
-
-        else:
-            raise KeyError("Invalid key")
+        pos1 = self._outer_probe(key1, False)
+        inner_dict = self.table[pos1][1]
+        del inner_dict[key2]
+        self.count -= 1
+        if len(inner_dict) == 0:
+            # No more key2s for key1. Leave a tombstone so keys after it in the cluster can still be found.
+            self.table[pos1] = TOMBSTONE
+            self.outer_count -= 1
+            self.deleted_count += 1
+            if self.size_index > 0 and self.outer_count < self.max_load_factor / 4 * self.table_size:
+                self._resize(self.size_index - 1)
 
     def _rehash(self) -> None:
         """
         Need to resize table and reinsert all values
 
+        :complexity: See _resize.
+        """
+        self._resize(min(self.size_index + 1, len(self.sizes) - 1))
+
+    def _resize(self, size_index: int) -> None:
+        """
+        Rebuild the top level table at sizes[size_index], dropping all tombstones.
+        size_index can be bigger (grow), smaller (shrink) or the same (compact).
+
         :complexity best: O(N*hash(K)) No probing.
         :complexity worst: O(N*hash(K) + N^2*comp(K)) Lots of probing.
-        Where N is len(self)
+        Where N is the number of top level keys
         """
         old_array = self.table
-        self.size_index += 1
-        if self.size_index == len(self.sizes):
-            return
+        self.size_index = size_index
         self.table = ArrayR(self.sizes[self.size_index])
+        self.deleted_count = 0
 
-        self.count = 0
         for item in old_array:
-            if item is not None:
-                key1, inner_table = item
-                keys = self.keys(key1)
-                for i in inner_table.array:
-                    if i is not None:
-                        k, v = i
-                pos1, _ = self._linear_probe(key1, k, True)
+            if item is not None and item is not TOMBSTONE:
+                # The inner table doesn't depend on the top level size, so the
+                # whole [key1, inner table] entry can be moved across as is.
+                # Through the class, so these probes aren't recorded as lookups while stats are enabled.
+                pos1 = type(self)._outer_probe(self, item[0], True)
                 self.table[pos1] = item
 
     @property
@@ -377,6 +525,94 @@ class DoubleKeyTable(Generic[K1, K2, V]):
         """
         return self.count
 
+    def enable_stats(self) -> None:
+        """
+        Start recording top level probe lengths and rehashes for `stats`.
+        Until this is called (and after `disable_stats`) nothing is recorded.
+
+        A probe's length is the number of slots from key1's hashed position to
+        the slot it was found in, or to the empty slot which ended the search.
+        """
+        self.disable_stats()
+        self._probe_stats = ProbeStats()
+        self._outer_probe = self._counted_outer_probe
+        self._resize = self._probe_stats.timed_rehash(self._resize)
+
+    def disable_stats(self) -> None:
+        """Stop recording and throw away what has been recorded."""
+        if self._probe_stats is not None:
+            del self._outer_probe
+            del self._resize
+            self._probe_stats = None
+
+    def _counted_outer_probe(self, key1: K1, is_insert: bool) -> int:
+        """
+        `_outer_probe`, recording the probe length.
+
+        :complexity: O(_outer_probe), plus another pass along the cluster when key1 is missing
+        or a tombstone is reused.
+        """
+        try:
+            pos1 = type(self)._outer_probe(self, key1, is_insert)
+        except KeyError:
+            self._probe_stats.record_probe(self._length_to_empty(self.hash1(key1)))
+            self._probe_stats.record_miss()
+            raise
+        if self.table[pos1] is TOMBSTONE:  # the probe went on past it to the next empty slot
+            self._probe_stats.record_probe(self._length_to_empty(self.hash1(key1)))
+        else:
+            self._probe_stats.record_probe((pos1 - self.hash1(key1)) % self.table_size + 1)
+        return pos1
+
+    def _length_to_empty(self, start: int) -> int:
+        """The number of slots from start to the first empty slot, counting both, or table_size if there's none."""
+        length = 1
+        while length < self.table_size and self.table[(start + length - 1) % self.table_size] is not None:
+            length += 1
+        return length
+
+    def stats(self) -> dict:
+        """
+        Statistics about the table's layout: its size and load, a histogram of
+        top level cluster sizes (runs of used slots, tombstones included) and
+        histograms of the bottom level tables' sizes and lengths.
+        While stats are enabled it also has the probe and rehash counters from ProbeStats.
+
+        :complexity: O(table_size)
+        """
+        clusters = []
+        run = 0
+        for entry in self.table:
+            if entry is None:
+                if run:
+                    clusters.append(run)
+                run = 0
+            else:
+                run += 1
+        if run:
+            if clusters and self.table[0] is not None:  # the last cluster wraps around to the first
+                clusters[0] += run
+            else:
+                clusters.append(run)
+
+        result = {
+            "entries": self.count,
+            "top_level_keys": self.outer_count,
+            "tombstones": self.deleted_count,
+            "table_size": self.table_size,
+            "load_factor": (self.outer_count + self.deleted_count) / self.table_size,
+            "cluster_sizes": histogram(clusters),
+            "inner_table_sizes": histogram(entry[1].table_size for entry in self._entries()),
+            "inner_table_lengths": histogram(len(entry[1]) for entry in self._entries()),
+        }
+        if self._probe_stats is not None:
+            result.update(self._probe_stats.as_dict())
+        return result
+
+    def stats_report(self) -> str:
+        """`stats` as human readable text."""
+        return format_report(f"{type(self).__name__} stats", self.stats())
+
     def __str__(self) -> str:
         """
         String representation.
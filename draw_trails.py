@@ -6,8 +6,9 @@ A bit of a mess, you 100% don't need to look at this for your assignment!
 
 from __future__ import annotations
 from dataclasses import dataclass, field
+from math import isqrt
 from mountain import Mountain
-from utils import av, bezier
+from utils import av, bezier_polyline
 from constants import DrawMode
 from trail import Trail, TrailSeries, TrailSplit
 
@@ -46,6 +47,132 @@ class TrailBox(Trail):
 
     trail_box: Box = field(default_factory=Box)
 
+def branch_strips(sx, sy, ex, ety, eby) -> list[list[tuple[float, float]]]:
+    """
+    The top and bottom curves of a branch, from (sx, sy) to (ex, ety) and (ex, eby).
+    A curve's shape only depends on how far it goes across and up, which moving the
+    branch doesn't change, so shapes are remembered and moved into place.
+    """
+    return [
+        [(sx + x, sy + y) for x, y in bezier_polyline(((0, 0), ((ex - sx)/2, 0), ((ex - sx)/2, ey - sy), (ex - sx, ey - sy)))]
+        for ey in (ety, eby)
+    ]
+
+@dataclass
+class TrailGeometry:
+    """Everything drawn for a trail: lines, curves (as lists of points) and mountains."""
+
+    lines: list[tuple[float, float, float, float]] = field(default_factory=list)
+    strips: list[list[tuple[float, float]]] = field(default_factory=list)
+    mountains: list[tuple[float, float, float, Mountain]] = field(default_factory=list)
+
+    @classmethod
+    def of(cls, shapes: list[tuple[str, tuple]]) -> TrailGeometry:
+        """The geometry of shapes as given by TrailDraw._layout_node."""
+        geometry = cls()
+        for kind, args in shapes:
+            if kind == "line":
+                geometry.lines.append(args)
+            elif kind == "mountain":
+                geometry.mountains.append(args)
+            else:
+                geometry.strips.extend(branch_strips(*args))
+        return geometry
+
+    def extend(self, other: TrailGeometry) -> None:
+        self.lines.extend(other.lines)
+        self.strips.extend(other.strips)
+        self.mountains.extend(other.mountains)
+
+# The boxes of a store box_and_action looks at, in order: STORE_BOXES[is it a TrailSeries].
+STORE_BOXES = {
+    True: ("before_box", "mountain_box", "after_box"),
+    False: ("branch_start_box", "branch_end_box"),
+}
+# The modes each box does something in. "trail_box" is an empty trail's box.
+ACTION_MODES = {
+    "trail_box": (DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH),
+    "before_box": (DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH),
+    "mountain_box": (DrawMode.REMOVE, DrawMode.EDIT),
+    "after_box": (DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH),
+    "branch_start_box": (DrawMode.REMOVE,),
+    "branch_end_box": (DrawMode.REMOVE,),
+}
+
+def _clip(box: Box, region: tuple[float, float, float, float]) -> tuple[float, float, float, float]:
+    """The part of box inside region, as (x0, y0, x1, y1). Empty if x0 > x1 or y0 > y1."""
+    return max(box.x, region[0]), max(box.y, region[1]), min(box.x + box.w, region[2]), min(box.y + box.h, region[3])
+
+def _inside(p: tuple[float, float], region: tuple[float, float, float, float]) -> bool:
+    return region[0] <= p[0] <= region[2] and region[1] <= p[1] <= region[3]
+
+class BoxIndex:
+    """
+    Uniform grid over the boxes TrailDraw.box_and_action can return, so finding the box
+    under the mouse only looks at the boxes in one cell rather than walking down the trail.
+
+    Each box is kept as (depth, order, box, region, exclusions, box_name, ref_trail, parent_sets):
+        - depth, order: when box_and_action's walk would look at it, its trail being depth
+          trails down and the box the order-th one of that trail it looks at.
+        - region: (x0, y0, x1, y1), where the walk can reach its trail: the trail's box cut
+          down to the boxes of the trails above it.
+        - exclusions: linked list (region, rest) of the regions of paths the walk takes instead:
+          a split's bottom path before its top path, and either before its following path.
+    The walk only goes down one trail at each level, so of the boxes with the mouse in them
+    that it can reach, it stops at the one with the smallest (depth, order).
+    """
+
+    def __init__(self, bounds: tuple[float, float, float, float], entries: list[tuple]) -> None:
+        self.bounds = bounds
+        self.cells_per_side = max(1, isqrt(len(entries)))
+        self.cell_w = max(bounds[2] - bounds[0], 1) / self.cells_per_side
+        self.cell_h = max(bounds[3] - bounds[1], 1) / self.cells_per_side
+        self.cells = {}
+        for entry in entries:
+            box = entry[2]
+            x0, y0, x1, y1 = _clip(box, entry[3])
+            if x0 > x1 or y0 > y1:  # the walk can never reach it
+                continue
+            for col in range(self._col(x0), self._col(x1) + 1):
+                for row in range(self._row(y0), self._row(y1) + 1):
+                    self.cells.setdefault((col, row), []).append(entry)
+
+    def _col(self, x: float) -> int:
+        return min(max(int((x - self.bounds[0]) / self.cell_w), 0), self.cells_per_side - 1)
+
+    def _row(self, y: float) -> int:
+        return min(max(int((y - self.bounds[1]) / self.cell_h), 0), self.cells_per_side - 1)
+
+    def find(self, p: tuple[float, float], mode) -> tuple[str, Trail, tuple] | None:
+        """
+        (box_name, ref_trail, parent_sets) of the box box_and_action's walk would find for p, or None.
+
+        :complexity: O(C*S), C being the number of boxes in p's cell and S the number of splits above them.
+        """
+        if not _inside(p, self.bounds):
+            return None
+        best = None
+        for entry in self.cells.get((self._col(p[0]), self._row(p[1])), ()):
+            if best is not None and entry[:2] >= best[:2]:
+                continue
+            if mode not in ACTION_MODES[entry[5]] or p not in entry[2] or not _inside(p, entry[3]):
+                continue
+            exclusions = entry[4]
+            while exclusions is not None and not _inside(p, exclusions[0]):
+                exclusions = exclusions[1]
+            if exclusions is None:
+                best = entry
+        return None if best is None else best[5:]
+
+@dataclass
+class _DrawnTrail:
+    """What TrailDraw.draw_retained keeps for one trail, with the layout it was made from."""
+
+    trail: Trail
+    remembered: tuple | None = None  # the trail's layout memo it was made from
+    shapes: list = field(default_factory=list)  # arcade shapes of its lines and curves
+    mountain: tuple | None = None  # its mountain's sprite and labels, from TrailDraw._make_mountain
+
 class TrailDraw:
 
     ### Visual constants
@@ -66,50 +193,58 @@ class TrailDraw:
 
     def __init__(self, trail: TrailBox) -> None:
         self.trail = trail
+        self._retained = None  # (root's layout memo, arcade shapes, sprites, label batch) for draw_retained
+        self._drawn = {}  # id(trail) -> _DrawnTrail, what draw_retained keeps for each trail
+        self._stale = False  # set by refresh()
+        self._box_index = None  # (root's layout memo, BoxIndex or None until used) from the last layout
 
     # VISUAL CALCULATIONS
 
     def required_height(self, cur_trail: TrailBox|None=None) -> int:
+        """Remembered by each trail until it changes, so only changed trails are measured again."""
         if cur_trail is None:
-            cur_trail = self.trail.store
-        else:
-            cur_trail = cur_trail.store
-        if cur_trail is None:
-            return self.EMPTY_HEIGHT
-        elif isinstance(cur_trail, TrailSeries):
-            return max(self.MOUNTAIN_HEIGHT, self.required_height(cur_trail.following))
-        else:
-            return max(
-                self.required_height(cur_trail.path_top) + self.BRANCH_SEPARATION + self.required_height(cur_trail.path_bottom),
-                self.required_height(cur_trail.path_follow)
-            )
+            cur_trail = self.trail
+        return cur_trail.fold(
+            self.EMPTY_HEIGHT,
+            lambda series, following: max(self.MOUNTAIN_HEIGHT, following),
+            lambda split, top, bottom, follow: max(top + self.BRANCH_SEPARATION + bottom, follow),
+            memo_key=(type(self), "required_height"),
+        )
 
     def required_width(self, cur_trail: TrailBox|None=None) -> int:
+        """Remembered by each trail until it changes, so only changed trails are measured again."""
         if cur_trail is None:
-            cur_trail = self.trail.store
-        else:
-            cur_trail = cur_trail.store
-        if cur_trail is None:
-            return 0
-        elif isinstance(cur_trail, TrailSeries):
-            return self.TOTAL_MOUNTAIN_WIDTH + self.required_width(cur_trail.following)
-        else:
-            return 2 * self.BRANCH_WIDTH + max(
-                self.required_width(cur_trail.path_top),
-                self.required_width(cur_trail.path_bottom),
-                self.MIN_BRANCH_CONTENT_WIDTH,
-            ) + self.required_width(cur_trail.path_follow)
+            cur_trail = self.trail
+        return cur_trail.fold(
+            0,
+            lambda series, following: self.TOTAL_MOUNTAIN_WIDTH + following,
+            lambda split, top, bottom, follow: 2 * self.BRANCH_WIDTH + max(top, bottom, self.MIN_BRANCH_CONTENT_WIDTH) + follow,
+            memo_key=(type(self), "required_width"),
+        )
 
     def draw_in_box(self, height, width, minx, miny, cur_trail: TrailBox|None=None) -> None:
+        """Lay the trail out in the box and draw it straight away, through draw_line, draw_mountain and draw_branch."""
+        draws = {"line": self.draw_line, "mountain": self.draw_mountain, "branch": self.draw_branch}
+        self._box_index = None  # the boxes may move
+        to_draw = [(self.trail if cur_trail is None else cur_trail, height, width, minx, miny)]
+        while to_draw:
+            shapes, paths = self._layout_node(*to_draw.pop())
+            for kind, args in shapes:
+                draws[kind](*args)
+            to_draw.extend(reversed(paths))
+
+    def _layout_node(self, ref_trail: TrailBox, height, width, minx, miny) -> tuple[list[tuple[str, tuple]], list[tuple]]:
+        """
+        Lay out one trail in its box, without the trails below it: sets its boxes, and
+        returns what to draw for it, as ("line"|"mountain"|"branch", args for the draw_ method),
+        and the (trail, height, width, minx, miny) to lay each of the trails below it out in.
+        """
+        shapes = []
+        cur_trail = ref_trail.store
         if cur_trail is None:
-            ref_trail = self.trail
-            cur_trail = self.trail.store
-        else:
-            ref_trail = cur_trail
-            cur_trail = cur_trail.store
-        if cur_trail is None:
-            self.draw_line(minx, miny + height/2, minx + width, miny + height/2)
+            shapes.append(("line", (minx, miny + height/2, minx + width, miny + height/2)))
             ref_trail.trail_box = Box(minx, miny + height/2-self.LINE_VERTICAL_BOX, width, 2*self.LINE_VERTICAL_BOX)
+            return shapes, []
         elif isinstance(cur_trail, TrailSeries):
             ref_trail.trail_box = Box(minx, miny, width, height)
             p1 = self.TOTAL_MOUNTAIN_WIDTH
@@ -125,15 +260,15 @@ class TrailDraw:
             end_mountain_x = start_mountain_x + mountain_width
             end_mountain_trail_x = minx + p1_total_dist
             mid = miny + height/2
-            self.draw_mountain(av(start_mountain_x, end_mountain_x), mid, (end_mountain_x - start_mountain_x) / self.MIN_MOUNTAIN_WIDTH, cur_trail.mountain)
-            self.draw_line(start_mountain_trail_x, mid, start_mountain_x, mid)
-            self.draw_line(end_mountain_x, mid, end_mountain_trail_x, mid)
+            shapes.append(("mountain", (av(start_mountain_x, end_mountain_x), mid, (end_mountain_x - start_mountain_x) / self.MIN_MOUNTAIN_WIDTH, cur_trail.mountain)))
+            shapes.append(("line", (start_mountain_trail_x, mid, start_mountain_x, mid)))
+            shapes.append(("line", (end_mountain_x, mid, end_mountain_trail_x, mid)))
             mountain_actual_height = self.MOUNTAIN_HEIGHT * (end_mountain_x - start_mountain_x) / self.MIN_MOUNTAIN_WIDTH
             cur_trail.before_box = Box(start_mountain_trail_x, mid - mountain_actual_height/2, start_mountain_x - start_mountain_trail_x, mountain_actual_height)
             cur_trail.mountain_box = Box(start_mountain_x, mid - mountain_actual_height/2, end_mountain_x - start_mountain_x, mountain_actual_height)
             cur_trail.after_box = Box(end_mountain_x, mid - mountain_actual_height/2, end_mountain_trail_x - end_mountain_x, mountain_actual_height)
             # Draw rest
-            self.draw_in_box(height, p2/total*width, minx+p1_total_dist, miny, cur_trail.following)
+            return shapes, [(cur_trail.following, height, p2/total*width, minx+p1_total_dist, miny)]
         else:
             ref_trail.trail_box = Box(minx, miny, width, height)
             b1 = self.required_width(cur_trail.path_top)
@@ -155,15 +290,243 @@ class TrailDraw:
                 branch_dist = self.MIN_BRANCH_CONTENT_WIDTH
             b3_dist = (width - 2*self.BRANCH_WIDTH) - branch_dist
             # Draw branches
-            self.draw_branch(minx, mid, minx+self.BRANCH_WIDTH, miny + bot_section + self.BRANCH_SEPARATION + top_section / 2, miny + bot_section / 2)
-            self.draw_branch(minx + width - b3_dist, mid, minx + width - self.BRANCH_WIDTH - b3_dist, miny + bot_section + self.BRANCH_SEPARATION + top_section / 2, miny + bot_section / 2)
+            shapes.append(("branch", (minx, mid, minx+self.BRANCH_WIDTH, miny + bot_section + self.BRANCH_SEPARATION + top_section / 2, miny + bot_section / 2)))
+            shapes.append(("branch", (minx + width - b3_dist, mid, minx + width - self.BRANCH_WIDTH - b3_dist, miny + bot_section + self.BRANCH_SEPARATION + top_section / 2, miny + bot_section / 2)))
             cur_trail.branch_start_box = Box(minx, mid - self.BRANCH_SEPARATION/2 - top_section/2, self.BRANCH_WIDTH, bot_section/2 + top_section/2 + self.BRANCH_SEPARATION)
             cur_trail.branch_end_box = Box(minx+width-b3_dist-self.BRANCH_WIDTH, mid - self.BRANCH_SEPARATION/2 - top_section/2, self.BRANCH_WIDTH, bot_section/2 + top_section/2 + self.BRANCH_SEPARATION)
-            # Draw top & bottom
-            self.draw_in_box(top_section, branch_dist, minx+self.BRANCH_WIDTH, miny+bot_section+self.BRANCH_SEPARATION, cur_trail.path_top)
-            self.draw_in_box(bot_section, branch_dist, minx+self.BRANCH_WIDTH, miny, cur_trail.path_bottom)
-            # Draw following
-            self.draw_in_box(height, b3_dist, minx + width - b3_dist, miny, cur_trail.path_follow)
+            # Draw top & bottom, then following
+            return shapes, [
+                (cur_trail.path_top, top_section, branch_dist, minx+self.BRANCH_WIDTH, miny+bot_section+self.BRANCH_SEPARATION),
+                (cur_trail.path_bottom, bot_section, branch_dist, minx+self.BRANCH_WIDTH, miny),
+                (cur_trail.path_follow, height, b3_dist, minx + width - b3_dist, miny),
+            ]
+
+    # RETAINED DRAWING
+    # Rather than laying the trail out and drawing every line and mountain each frame,
+    # layout() works out the geometry once and keeps each trail's part of it until the
+    # trail changes, and draw_retained() keeps each trail's arcade shapes, sprite and
+    # labels until its part of the geometry changes.
+
+    def layout(self, height, width, minx, miny) -> TrailGeometry:
+        """
+        Lay the whole trail out in the box, setting every trail's boxes, and return what to draw.
+
+        Each trail remembers its part of the geometry, with the box it was laid out in and
+        its mountain, until it or a trail below it changes (see Trail.forget). A trail laid
+        out in the same box again reuses its part, rather than working it out again.
+
+        Complexity:
+        - O(n) to put the parts together, n being how many trails there are, plus working out
+        the parts of the trails which changed or moved.
+        """
+        geometry = TrailGeometry()
+        for _, remembered in self._layout_parts(height, width, minx, miny):
+            geometry.extend(remembered[1])
+        return geometry
+
+    def _layout_parts(self, height, width, minx, miny) -> list[tuple[TrailBox, tuple]]:
+        """
+        As layout, but returns each trail with what it remembers of its layout,
+        (state, TrailGeometry, paths), in the order draw_in_box draws them.
+        The remembered tuple is only made again when the trail's part changes.
+        """
+        memo_key = (type(self), "layout")
+        parts = []
+        laid_out = False  # whether any trail's boxes were set again
+        to_lay_out = [(self.trail, height, width, minx, miny)]
+        while to_lay_out:
+            ref_trail, *box = to_lay_out.pop()
+            state = (box, self._mountain_state(ref_trail))
+            memo = ref_trail.__dict__.get("_memo")
+            remembered = memo.get(memo_key) if memo else None
+            if remembered is None or remembered[0] != state:
+                shapes, paths = self._layout_node(ref_trail, *box)
+                laid_out = True
+                remembered = (state, TrailGeometry.of(shapes), paths)
+                if memo is None:
+                    memo = {}
+                    object.__setattr__(ref_trail, "_memo", memo)
+                memo[memo_key] = remembered
+            parts.append((ref_trail, remembered))
+            to_lay_out.extend(reversed(remembered[2]))
+        if laid_out or self._box_index is None or self._box_index[0] is not self.trail._memo[memo_key]:
+            self._box_index = (self.trail._memo[memo_key], None)  # built by the first box_index()
+        return parts
+
+    @staticmethod
+    def _mountain_state(ref_trail: TrailBox) -> tuple | None:
+        """What of the trail's mountain is drawn, as mountains are edited in place."""
+        store = ref_trail.store
+        if isinstance(store, TrailSeries):
+            return store.mountain.name, store.mountain.difficulty_level, store.mountain.length
+        return None
+
+    def refresh(self) -> None:
+        """
+        Lay the trail out again on the next draw_retained, e.g. after a mountain is edited in place.
+        Only the trails whose part of the drawing changed are drawn again: for an edited
+        mountain, just its labels.
+        """
+        self._stale = True
+
+    def needs_layout(self, height, width, minx, miny) -> bool:
+        """
+        Whether draw_retained has to lay the trail out again: the trail changed since it was
+        last drawn (which forgets the top trail's layout), the box is different or refresh()
+        was called.
+
+        Complexity: O(1)
+        """
+        memo = self.trail.__dict__.get("_memo")
+        remembered = memo.get((type(self), "layout")) if memo else None
+        return (
+            self._stale
+            or self._retained is None
+            or remembered is None
+            or self._retained[0] is not remembered
+            or remembered[0][0] != [height, width, minx, miny]
+        )
+
+    def draw_retained(self, height, width, minx, miny) -> None:
+        """
+        Draw the trail from arcade shapes, sprites and labels kept between frames,
+        so a frame where nothing changed costs the same however big the trail is.
+        See update_retained for what happens when something did change.
+        """
+        import arcade
+        self.update_retained(height, width, minx, miny)
+        _, shapes, sprites, labels = self._retained
+        shapes.draw()
+        sprites.draw()
+        with arcade.get_window().ctx.pyglet_rendering():
+            labels.draw()
+
+    def update_retained(self, height, width, minx, miny) -> None:
+        """
+        Bring the kept shapes, sprites and labels up to date with the trail, if needs_layout.
+
+        Each trail keeps its own. Trails whose part of the layout is the same keep theirs as
+        they are. Otherwise its lines and curves are made again only if they changed, and its
+        mountain's sprite and labels are moved and relabelled in place. The shape and sprite
+        lists are put together again from what's kept only when something left them.
+
+        Complexity:
+        - O(1) if nothing changed.
+        - Otherwise O(n) to lay out and go through the trails, n being how many there are,
+        plus making the shapes of the trails whose lines or curves changed.
+        """
+        if not self.needs_layout(height, width, minx, miny):
+            return
+        self._stale = False
+        parts = self._layout_parts(height, width, minx, miny)
+        if self._retained is None:
+            self._drawn = {}
+            retained = [None, self._shape_list([]), self._sprite_list([]), self._label_batch()]
+        else:
+            retained = list(self._retained)
+        labels = retained[3]
+        previous = self._drawn
+        drawn = {}
+        new_shapes = []
+        new_sprites = []
+        removed = False  # whether any shape or sprite has to leave the lists
+        for ref_trail, remembered in parts:
+            record = previous.pop(id(ref_trail), None)
+            if record is None:
+                record = _DrawnTrail(ref_trail)
+            if record.remembered is not remembered:
+                geometry = remembered[1]
+                old = record.remembered[1] if record.remembered is not None else None
+                if old is None or old.lines != geometry.lines or old.strips != geometry.strips:
+                    removed = removed or bool(record.shapes)
+                    record.shapes = self._make_shapes(geometry)
+                    new_shapes.extend(record.shapes)
+                if geometry.mountains:
+                    if record.mountain is None:
+                        record.mountain = self._make_mountain(labels)
+                        new_sprites.append(record.mountain[0])
+                    self._place_mountain(record.mountain, *geometry.mountains[0])
+                elif record.mountain is not None:
+                    self._delete_mountain(record.mountain)
+                    record.mountain = None
+                    removed = True
+                record.remembered = remembered
+            drawn[id(ref_trail)] = record
+        for record in previous.values():  # trails which aren't in the trail any more
+            removed = removed or bool(record.shapes) or record.mountain is not None
+            if record.mountain is not None:
+                self._delete_mountain(record.mountain)
+        if removed:
+            retained[1] = self._shape_list([shape for record in drawn.values() for shape in record.shapes])
+            retained[2] = self._sprite_list([record.mountain[0] for record in drawn.values() if record.mountain is not None])
+        else:
+            for shape in new_shapes:
+                retained[1].append(shape)
+            for sprite in new_sprites:
+                retained[2].append(sprite)
+        retained[0] = self.trail._memo[(type(self), "layout")]
+        self._retained = tuple(retained)
+        self._drawn = drawn
+
+    # What update_retained builds its drawing from, kept apart so it can run without a window.
+
+    def _shape_list(self, shapes: list):
+        import arcade
+        shape_list = arcade.ShapeElementList()
+        for shape in shapes:
+            shape_list.append(shape)
+        return shape_list
+
+    def _sprite_list(self, sprites: list):
+        import arcade
+        sprite_list = arcade.SpriteList()
+        for sprite in sprites:
+            sprite_list.append(sprite)
+        return sprite_list
+
+    def _label_batch(self):
+        import pyglet
+        return pyglet.graphics.Batch()
+
+    def _make_shapes(self, geometry: TrailGeometry) -> list:
+        import arcade
+        return (
+            [arcade.create_line(sx, sy, ex, ey, (0, 0, 0), 1) for sx, sy, ex, ey in geometry.lines]
+            + [arcade.create_line_strip(points, (0, 0, 0), 1) for points in geometry.strips]
+        )
+
+    def _make_mountain(self, batch) -> tuple:
+        """A mountain's sprite and its difficulty and length labels, to be put in place by _place_mountain."""
+        import arcade
+        import pyglet
+        sprite = arcade.Sprite("img/hike.png")
+        labels = [
+            pyglet.text.Label("", font_name=("Montserrat", "calibri", "arial"), font_size=24, color=colour,
+                              anchor_x="center", anchor_y="center", batch=batch)
+            for colour in ((237, 17, 68, 255), (17, 127, 245, 255))
+        ]
+        return sprite, labels
+
+    def _place_mountain(self, drawn: tuple, x, y, scale, obj: Mountain) -> None:
+        """Move, scale and label a mountain from _make_mountain, only touching what changed."""
+        sprite, labels = drawn
+        sprite_scale = self.MIN_MOUNTAIN_WIDTH/512 * scale
+        if (sprite.center_x, sprite.center_y, sprite.scale) != (x, y, sprite_scale):
+            sprite.scale = sprite_scale
+            sprite.center_x = x
+            sprite.center_y = y
+        for label, text, dx in zip(labels, (obj.difficulty_level, obj.length), (-1, 1)):
+            label_x = x + dx * self.MIN_MOUNTAIN_WIDTH * scale / 2
+            label_y = y + self.MOUNTAIN_HEIGHT * scale / 2
+            if (label.x, label.y) != (label_x, label_y):
+                label.x = label_x
+                label.y = label_y
+            if label.text != str(text):
+                label.text = str(text)
+
+    def _delete_mountain(self, drawn: tuple) -> None:
+        for label in drawn[1]:
+            label.delete()
 
     def draw_line(self, sx, sy, ex, ey):
         import arcade
@@ -201,27 +564,55 @@ class TrailDraw:
 
     def draw_branch(self, sx, sy, ex, ety, eby):
         import arcade
-        bez_top = bezier((sx, sy), (av(sx, ex), sy), (av(sx, ex), ety), (ex, ety))
-        arcade.draw_line_strip([
-            bez_top(t/100)
-            for t in range(101)
-        ], (0, 0, 0), 1)
-        bez_bot = bezier((sx, sy), (av(sx, ex), sy), (av(sx, ex), eby), (ex, eby))
-        arcade.draw_line_strip([
-            bez_bot(t/100)
-            for t in range(101)
-        ], (0, 0, 0), 1)
+        for points in branch_strips(sx, sy, ex, ety, eby):
+            arcade.draw_line_strip(points, (0, 0, 0), 1)
 
     def box_and_action(self, mouse_pos: tuple[float, float], mode=DrawMode, cur_trail: Trail|None=None, parent_sets: tuple[Trail, str]|None=None) -> tuple[Box|None, function|None, Trail|None]:
+        """
+        The box under the mouse which does something in this mode, what it does, and the trail's store.
+
+        Uses the index built by the last layout() while the trail hasn't changed since,
+        otherwise walks down the trail from cur_trail (or the top).
+        """
         if cur_trail is None:
-            ref_trail = self.trail
-            cur_trail = self.trail.store
-            parent_sets = (self, "trail")
-        else:
-            ref_trail = cur_trail
-            cur_trail = cur_trail.store
-        if mouse_pos not in ref_trail.trail_box:
-            return None, None, None
+            index = self.box_index()
+            if index is not None:
+                found = index.find(mouse_pos, mode)
+                if found is None:
+                    return None, None, None
+                return self._action(*found, mode)
+            cur_trail, parent_sets = self.trail, (self, "trail")
+        return self._walk_to_action(mouse_pos, mode, cur_trail, parent_sets)
+
+    def _walk_to_action(self, mouse_pos, mode, ref_trail: Trail, parent_sets: tuple) -> tuple[Box|None, function|None, Trail|None]:
+        """
+        Walk down from ref_trail through the trails whose boxes have the mouse in them,
+        returning the first box which does something in this mode.
+
+        :complexity: O(depth)
+        """
+        while mouse_pos in ref_trail.trail_box:
+            cur_trail = ref_trail.store
+            if cur_trail is None:
+                if mode in ACTION_MODES["trail_box"]:
+                    return self._action("trail_box", ref_trail, parent_sets, mode)
+                break
+            for box_name in STORE_BOXES[isinstance(cur_trail, TrailSeries)]:
+                if mouse_pos in getattr(cur_trail, box_name) and mode in ACTION_MODES[box_name]:
+                    return self._action(box_name, ref_trail, parent_sets, mode)
+            if isinstance(cur_trail, TrailSeries):
+                ref_trail, parent_sets = cur_trail.following, (cur_trail, "following")
+            elif mouse_pos in cur_trail.path_bottom.trail_box:
+                ref_trail, parent_sets = cur_trail.path_bottom, (cur_trail, "path_bottom")
+            elif mouse_pos in cur_trail.path_top.trail_box:
+                ref_trail, parent_sets = cur_trail.path_top, (cur_trail, "path_top")
+            else:
+                ref_trail, parent_sets = cur_trail.path_follow, (cur_trail, "path_follow")
+        return None, None, None
+
+    @staticmethod
+    def _action(box_name: str, ref_trail: Trail, parent_sets: tuple, mode) -> tuple[Box, function, Trail|None]:
+        """What clicking the box called box_name of ref_trail (or its store) does in this mode."""
         def set_m(ref, cur_method):
             def func(*m):
                 ref.store = cur_method(*m)
@@ -231,25 +622,62 @@ class TrailDraw:
             def func(*m):
                 setattr(parent, attribute, cur_method(*m))
             return func
-        if cur_trail is None:
-            if mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
-                return ref_trail.trail_box, set_parent(parent_sets, ref_trail.add_mountain_before if mode == DrawMode.ADD_MOUNTAIN else ref_trail.add_empty_branch_before), cur_trail
-        elif isinstance(cur_trail, TrailSeries):
-            if mouse_pos in cur_trail.before_box and mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
-                return cur_trail.before_box, set_m(ref_trail, cur_trail.add_mountain_before if mode == DrawMode.ADD_MOUNTAIN else cur_trail.add_empty_branch_before), cur_trail
-            if mouse_pos in cur_trail.mountain_box and mode in [DrawMode.REMOVE, DrawMode.EDIT]:
-                return cur_trail.mountain_box, (set_m(ref_trail, cur_trail.remove_mountain) if mode == DrawMode.REMOVE else lambda: cur_trail.mountain), cur_trail
-            if mouse_pos in cur_trail.after_box and mode in [DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH]:
-                return cur_trail.after_box, set_m(ref_trail, cur_trail.add_mountain_after if mode == DrawMode.ADD_MOUNTAIN else cur_trail.add_empty_branch_after), cur_trail
-            return self.box_and_action(mouse_pos, mode, cur_trail.following, (cur_trail, 'following'))
-        else:
-            if mouse_pos in cur_trail.branch_start_box and mode == DrawMode.REMOVE:
-                return cur_trail.branch_start_box, set_m(ref_trail, cur_trail.remove_branch), cur_trail
-            if mouse_pos in cur_trail.branch_end_box and mode == DrawMode.REMOVE:
-                return cur_trail.branch_end_box, set_m(ref_trail, cur_trail.remove_branch), cur_trail
-            if mouse_pos in cur_trail.path_bottom.trail_box:
-                return self.box_and_action(mouse_pos, mode, cur_trail.path_bottom, (cur_trail, 'path_bottom'))
-            if mouse_pos in cur_trail.path_top.trail_box:
-                return self.box_and_action(mouse_pos, mode, cur_trail.path_top, (cur_trail, 'path_top'))
-            return self.box_and_action(mouse_pos, mode, cur_trail.path_follow, (cur_trail, 'path_follow'))
-        return None, None, None
+        cur_trail = ref_trail.store
+        adding_mountain = mode == DrawMode.ADD_MOUNTAIN
+        if box_name == "trail_box":
+            return ref_trail.trail_box, set_parent(parent_sets, ref_trail.add_mountain_before if adding_mountain else ref_trail.add_empty_branch_before), cur_trail
+        box = getattr(cur_trail, box_name)
+        if box_name == "before_box":
+            return box, set_m(ref_trail, cur_trail.add_mountain_before if adding_mountain else cur_trail.add_empty_branch_before), cur_trail
+        if box_name == "mountain_box":
+            return box, (set_m(ref_trail, cur_trail.remove_mountain) if mode == DrawMode.REMOVE else lambda: cur_trail.mountain), cur_trail
+        if box_name == "after_box":
+            return box, set_m(ref_trail, cur_trail.add_mountain_after if adding_mountain else cur_trail.add_empty_branch_after), cur_trail
+        return box, set_m(ref_trail, cur_trail.remove_branch), cur_trail
+
+    def box_index(self) -> BoxIndex | None:
+        """
+        The index of the boxes set by the last layout(), built the first time it's asked for
+        so edits don't pay for it until the mouse moves. None if the trail has changed since.
+        """
+        if self._box_index is None:
+            return None
+        memo = self.trail.__dict__.get("_memo")
+        remembered = memo.get((type(self), "layout")) if memo else None
+        layout, index = self._box_index
+        if layout is not remembered or remembered is None:
+            return None
+        if index is None:
+            index = self._build_box_index()
+            self._box_index = (layout, index)
+        return index
+
+    def _build_box_index(self) -> BoxIndex:
+        """
+        Index every box box_and_action could return, with where its walk would reach it.
+
+        :complexity: O(n), n being how many trails there are.
+        """
+        entries = []
+        root = self.trail.trail_box
+        root_region = (root.x, root.y, root.x + root.w, root.y + root.h)
+        to_visit = [(self.trail, 0, root_region, None, (self, "trail"))]
+        while to_visit:
+            ref_trail, depth, region, exclusions, parent_sets = to_visit.pop()
+            cur_trail = ref_trail.store
+            if cur_trail is None:
+                entries.append((depth, 0, ref_trail.trail_box, region, exclusions, "trail_box", ref_trail, parent_sets))
+                continue
+            for order, box_name in enumerate(STORE_BOXES[isinstance(cur_trail, TrailSeries)]):
+                entries.append((depth, order, getattr(cur_trail, box_name), region, exclusions, box_name, ref_trail, parent_sets))
+            if isinstance(cur_trail, TrailSeries):
+                following = cur_trail.following
+                to_visit.append((following, depth + 1, _clip(following.trail_box, region), exclusions, (cur_trail, "following")))
+            else:
+                bottom = _clip(cur_trail.path_bottom.trail_box, region)
+                top = _clip(cur_trail.path_top.trail_box, region)
+                follow = _clip(cur_trail.path_follow.trail_box, region)
+                to_visit.append((cur_trail.path_bottom, depth + 1, bottom, exclusions, (cur_trail, "path_bottom")))
+                to_visit.append((cur_trail.path_top, depth + 1, top, (bottom, exclusions), (cur_trail, "path_top")))
+                to_visit.append((cur_trail.path_follow, depth + 1, follow, (top, (bottom, exclusions)), (cur_trail, "path_follow")))
+        return BoxIndex(root_region, entries)
@@ -1,15 +1,38 @@
 from __future__ import annotations
-from typing import Generic, TypeVar
+import heapq
+from operator import itemgetter
+from typing import Generic, TypeVar, Iterator
 
 from data_structures.referential_array import ArrayR
-from data_structures.linked_stack import LinkedStack
+from read_write_lock import ReadWriteLock
+from table_stats import ProbeStats, histogram, format_report
 K = TypeVar("K")
 V = TypeVar("V")
 
+_MISSING = object()  # no default given to get_many
+
+class _Table(ArrayR):
+    """
+    One table of an InfiniteHashTable: an ArrayR of its positions, which also keeps
+    how many positions are in use (used) and the sum of those positions (position_sum).
+    """
+
+    __slots__ = ("used", "position_sum")
+
+    def __init__(self, length: int) -> None:
+        super().__init__(length)
+        self.used = 0
+        self.position_sum = 0
+
 class InfiniteHashTable(Generic[K, V]):
     """
     Infinite Hash Table.
 
+    Each table keeps, beside its TABLE_SIZE positions, how many of them are in
+    use and the sum of those positions (see _Table). When only one position is
+    in use the sum is that position, so deletes can collapse a table without
+    looking through its slots.
+
     Type Arguments:
         - K:    Key Type. In most cases should be string.
                 Otherwise `hash` should be overwritten.
@@ -21,13 +44,23 @@ class InfiniteHashTable(Generic[K, V]):
     TABLE_SIZE = 27
 
     def __init__(self) -> None:
-        self.level=0
-        self.table=ArrayR(self.TABLE_SIZE)
+        self.table=self._new_table()
         self.count=0
+        self._probe_stats = None  # ProbeStats while stats are enabled
+
+    def _new_table(self) -> _Table:
+        """An empty table, with no positions in use."""
+        return _Table(self.TABLE_SIZE)
 
-    def hash(self, key: K) -> int:
-        if self.level < len(key):
-            return ord(key[self.level]) % (self.TABLE_SIZE-1)
+    def hash(self, key: K, level: int = 0) -> int:
+        """
+        Hash the key for the table `level` levels down from the top.
+
+        The level is passed in rather than kept on the table, so lookups never
+        change the table and can run side by side.
+        """
+        if level < len(key):
+            return ord(key[level]) % (self.TABLE_SIZE-1)
         return self.TABLE_SIZE-1
 
     def __getitem__(self, key: K) -> V:
@@ -36,51 +69,61 @@ class InfiniteHashTable(Generic[K, V]):
 
         :raises KeyError: when the key doesn't exist.
         """
-        sequence=self.get_location(key)
-        current_table = self.table
-        for pos in sequence:
-            if current_table[pos][0]==key:
-                return current_table[pos][1]
-            current_table=current_table[pos][1]
+        _, entry = self._descend(key)
+        return entry[1]
 
     def __setitem__(self, key: K, value: V) -> None:
         """
         Set an (key, value) pair in our hash table.
+
+        Every change a reader could see is made with a single slot assignment:
+        new entries and tables are filled in before they are put in place.
         """
-        pos = self.hash(key)
-        current_table = self.table
+        self._insert(key, value, [self.table], [])
+
+    def _insert(self, key: K, value: V, tables: list[ArrayR], sequence: list[int]) -> None:
+        """
+        Set an (key, value) pair, starting from tables[-1], which is len(tables)-1 levels down.
+        tables and sequence are extended as in `_walk`.
+
+        :complexity: O(len(key)*hash)
+        """
+        level = len(tables) - 1
+        current_table = tables[-1]
         while True:
-            if current_table[pos] is None: #if there is nothing at that position
+            pos = self.hash(key, level)
+            entry = current_table[pos]
+            if entry is None: #if there is nothing at that position
                 array=ArrayR(2) #put the key value pair as array, not tuple. because we might need to change its value to a table and move that value to a deeper position.
                 array[0]=key
                 array[1]=value
                 current_table[pos]=array #means we can put our key value pair in that position
+                current_table.used += 1
+                current_table.position_sum += pos
+                sequence.append(pos)
                 self.count += 1 #adding to count
-                self.level=0
                 return None
-            elif isinstance(current_table[pos][1], ArrayR):
-                current_table = current_table[pos][1] #going deeper
-                self.level += 1
-                pos = self.hash(key)
-            elif current_table[pos][0]==key: #we put this here because there is chance to get to the actual key we would need go deeper by one level
-                current_table[pos][1]=value #updating key
+            elif isinstance(entry[1], ArrayR):
+                sequence.append(pos)
+                current_table = entry[1] #going deeper
+                tables.append(current_table)
+                level += 1
+            elif entry[0]==key: #we put this here because there is chance to get to the actual key we would need go deeper by one level
+                sequence.append(pos)
+                entry[1]=value #updating key
                 return None
             else:#this means there is a conflict and we need to go deeper. But we can't because the value there is not an array.
-                old_key=current_table[pos][0] #getting the current key
-                old_value=current_table[pos][1] #getting the current value
-                current_table[pos][0]=current_table[pos][0][0:self.level+1] #modifying the current key, i.e when we enter leg they key at level 0 changes from lin to l
-                current_table[pos][1]=ArrayR(self.TABLE_SIZE) #changing the value of the current key to an array
-                self.level+=1 #adding level because we are going to hash at a deeper level
-                key_to_hash=old_key[0:self.level+2]
-                key_to_hash_pos=self.hash(key_to_hash) #finding the position to put the modified key
-                if self.hash(old_key)==key_to_hash_pos:
-                    key_to_hash=old_key
-                array=ArrayR(2) #creating an empty array
-                array[0]=key_to_hash #inserting the key that we have hashed
-                array[1]=old_value #inserting the current value
-                current_table[pos][1][key_to_hash_pos]=array #putting the array which is a key value pair that we just created at the empty hash table we created
-                self.level-=1 #decrementing the level since we have finished the process
-
+                # Move the current key into a new table one level down, keyed in this table by its prefix,
+                # i.e when we enter leg the key at level 0 changes from lin to l. Then try again from here.
+                new_table=self._new_table()
+                new_pos=self.hash(entry[0], level+1)
+                new_table[new_pos]=entry
+                new_table.used=1
+                new_table.position_sum=new_pos
+                prefix=ArrayR(2)
+                prefix[0]=entry[0][0:level+1]
+                prefix[1]=new_table
+                current_table[pos]=prefix
 
     def __delitem__(self, key: K) -> None:
         """
@@ -88,69 +131,125 @@ class InfiniteHashTable(Generic[K, V]):
 
         :raises KeyError: when the key doesn't exist.
         """
-        key_location = self.get_location(key)
-        current_depth = 0
-        current_table = self.table
-        stack = LinkedStack()
-        stack.push(current_table)
+        key_location, _ = self._descend(key)
+
+        # Find the tables on the way down to the key
+        tables = [self.table]
+        for pos in key_location[:-1]:
+            tables.append(tables[-1][pos][1])
+        self._remove(tables, key_location)
 
-        # Traverse the tables until the second to last index in key_location
-        while current_depth < len(key_location) - 1:
-            current_table = current_table[key_location[current_depth]][1]
-            stack.push(current_table)
-            current_depth += 1
+    def _remove(self, tables: list[ArrayR], sequence: list[int]) -> None:
+        """
+        Remove the entry at tables[-1][sequence[-1]], where tables[i][sequence[i]] is
+        the way down to it. Afterwards tables and sequence are cut back to the part of
+        the way down which is still there.
 
+        :complexity: O(D), D being len(tables).
+        """
         # Remove the item at the final location
-        current_depth = len(key_location) - 1
-        current_table[key_location[current_depth]] = None
+        depth = len(tables) - 1
+        self._clear_slot(tables[depth], sequence[depth])
         self.count -= 1
-        found_item = False
-        item_to_move = None
 
-        # Traverse the stack of tables and restructure them as needed
-        while not stack.is_empty():
-            current_table = stack.pop()
-            non_none_count = 0
-
-            # Count the number of non-None elements in the table
-            for index in range(len(current_table)):
-                if current_table[index] is not None:
-                    non_none_count += 1
-                    last_non_none_index = index
-
-            # If the table has only one element and we are not at the root level
-            if non_none_count == 1 and current_depth > 0:
-
-                # If we have not yet found an item to move up the tree
-                if found_item == False and not isinstance(current_table[last_non_none_index][1], ArrayR):
-
-                    # Traverse the table and find the first non-None element
-                    for index in range(len(current_table)):
-                        if current_table[index] is not None:
-                            item_to_move = current_table[index]
-                            found_item = True
-                            current_table[index] = None
-                            current_depth -= 1
-
-                # If we have already found an item to move up the tree
-                elif found_item == True:
-                    current_table[key_location[current_depth]] = None
-                    current_depth -= 1
-
-                # If we have not found an item and there are no more elements to traverse
-                else:
+        # Going back up, a table left with a single key (or nothing) isn't needed any more,
+        # so the key takes the table's place in the table above it.
+        while depth > 0:
+            current_table = tables[depth]
+            used = current_table.used
+            remaining = None
+            if used > 1:
+                break
+            elif used == 1:
+                remaining = current_table[current_table.position_sum]
+                if isinstance(remaining[1], ArrayR):  # the one thing left is a table, which still needs to be here
                     break
+            depth -= 1
+            if remaining is None:
+                self._clear_slot(tables[depth], sequence[depth])
+            else:
+                tables[depth][sequence[depth]] = remaining
+        del tables[depth+1:]
+        del sequence[depth:]
+
+    def _clear_slot(self, table: _Table, pos: int) -> None:
+        """Empty a position in use, keeping the table's used and position_sum up to date."""
+        table[pos] = None
+        table.used -= 1
+        table.position_sum -= pos
+
+    @staticmethod
+    def _shared_levels(key: K, previous: K, tables: list[ArrayR], sequence: list[int]) -> None:
+        """
+        Cut tables and sequence, the way down to previous, back to the levels key
+        shares with it. The first n characters decide the way down through the
+        first n levels, so the tables and positions there are the same for both.
 
-            # If we have an item to move up the tree
-            elif item_to_move is not None:
-                item_to_move_array=ArrayR(2)
-                item_to_move_array[0]=item_to_move[0]
-                item_to_move_array[1]=item_to_move[1]
-                current_table[key_location[current_depth]] = item_to_move_array
+        :complexity: O(len(key))
+        """
+        shared = 0
+        limit = min(len(key), len(previous), len(tables) - 1)
+        while shared < limit and key[shared] == previous[shared]:
+            shared += 1
+        del tables[shared+1:]
+        del sequence[shared:]
+
+    def get_many(self, keys: list[K], default: V = _MISSING) -> list[V]:
+        """
+        Get the values for many keys at once, in the same order as keys.
+        The keys are visited in sorted order so that keys sharing a prefix
+        only walk down through it once.
 
-            # If we have no item to move and there are no more elements to traverse
-            else:
-                break
+        :raises KeyError: when a key doesn't exist and no default is given.
+        :complexity: O(K*log(K) + L*hash), K being len(keys) and L the number of
+        levels not shared with the previous key in sorted order.
+        """
+        results = [default] * len(keys)
+        tables = [self.table]
+        sequence = []
+        previous = ""
+        for index in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[index]
+            self._shared_levels(key, previous, tables, sequence)
+            entry = self._walk(key, tables, sequence)
+            if entry is not None:
+                results[index] = entry[1]
+            elif default is _MISSING:
+                raise KeyError(key)
+            previous = key
+        return results
+
+    def set_many(self, items: list[tuple[K, V]]) -> None:
+        """
+        Set many (key, value) pairs at once, sharing the way down between keys
+        as in `get_many`. If a key is given more than once, the last value wins.
+
+        :complexity: O(K*log(K) + L*hash), as in get_many.
+        """
+        tables = [self.table]
+        sequence = []
+        previous = ""
+        for key, value in sorted(items, key=itemgetter(0)):
+            self._shared_levels(key, previous, tables, sequence)
+            self._insert(key, value, tables, sequence)
+            previous = key
+
+    def delete_many(self, keys: list[K]) -> None:
+        """
+        Delete many keys at once, sharing the way down between keys as in `get_many`.
+
+        :raises KeyError: when a key doesn't exist. Keys before it in sorted order will have been deleted.
+        :complexity: O(K*log(K) + L*hash + K*D), D being the depth.
+        """
+        tables = [self.table]
+        sequence = []
+        previous = ""
+        for key in sorted(keys):
+            self._shared_levels(key, previous, tables, sequence)
+            if self._walk(key, tables, sequence) is None:
+                raise KeyError(key)
+            self._remove(tables, sequence)
+            previous = key
 
     def __len__(self): #return how many value in the list
         return self.count
@@ -169,28 +268,273 @@ class InfiniteHashTable(Generic[K, V]):
 
         :raises KeyError: when the key doesn't exist.
         """
+        sequence, _ = self._descend(key)
+        return sequence
+
+    def _descend(self, key: K) -> tuple[list[int], ArrayR]:
+        """
+        Walk down from the top table to the key.
+        Args:
+        - key, which is a generic type object.
+
+        Raises:
+        - raises KeyError: when the key doesn't exist.
+
+        Returns:
+        - The sequence of positions to the key, and its [key, value] entry.
+
+        Complexity:
+        - Worst case: O(len(key)*hash), when the key is stored len(key)+1 levels down.
+        - Best case: O(hash), the key is in the top table.
+        """
         sequence = []
-        current_table = self.table
-        pos = self.hash(key)
+        entry = self._walk(key, [self.table], sequence)
+        if entry is None:
+            raise KeyError(key)
+        return sequence, entry
+
+    def _walk(self, key: K, tables: list[ArrayR], sequence: list[int]) -> ArrayR | None:
+        """
+        Walk down towards the key, starting from tables[-1], which is len(tables)-1 levels down.
+        The tables passed through are added to tables and the positions used to sequence,
+        so tables[i][sequence[i]] is the way down at level i.
+
+        Returns:
+        - The key's [key, value] entry, or None when the key doesn't exist.
+
+        Complexity:
+        - Worst case: O(len(key)*hash), when the key is stored len(key)+1 levels down.
+        - Best case: O(hash), the key is in the starting table.
+        """
+        current_table = tables[-1]
+        level = len(tables) - 1
         while True:
+            pos = self.hash(key, level)
             sequence.append(pos)
-            if current_table[pos] is None:  # if it is None in that position that means the key doesn't exist
-                raise KeyError(key)
-            elif current_table[pos][0] == key:  # this means we may have found the key
-                if isinstance(current_table[pos][1],ArrayR): #check if the value of that key is an array
-                    check_table=current_table[pos][1]
-                    for i in range(self.TABLE_SIZE): #if it is check if the key that we are searching for is in that array
-                        if isinstance(check_table[i],ArrayR):
-                            if check_table[i][0]==key:
-                                sequence.append(i)
-                self.level=0
-                return sequence
-            elif isinstance(current_table[pos][1],ArrayR) is False: #this means there's a collision but we can't go deeper
-                raise KeyError(key)
-            current_table = current_table[pos][1]  # going into the table of that key
-            self.level += 1  # adding level since we're going deeper
-            pos = self.hash(key)  # making a new hash position
+            entry = current_table[pos]
+            if entry is None:  # if it is None in that position that means the key doesn't exist
+                return None
+            elif isinstance(entry[1], ArrayR):  # a table of keys sharing this prefix, the key may be further down
+                current_table = entry[1]
+                tables.append(current_table)
+                level += 1
+            elif entry[0] == key:
+                return entry
+            else:  # this means there's a collision but we can't go deeper
+                return None
+
+    def _find_prefix(self, prefix: str) -> tuple[ArrayR | None, ArrayR | None]:
+        """
+        Walk down to where the keys starting with prefix are stored.
+
+        Returns:
+        - (table, None) when they are all in table or the tables below it.
+        - (None, entry) when the only candidate is a single [key, value] entry.
+        - (None, None) when there are none.
+        Keys which hash the same as the prefix without starting with it can be
+        in there too, so results still need checking.
+
+        :complexity: O(len(prefix)*hash)
+        """
+        current_table = self.table
+        for level in range(len(prefix)):
+            entry = current_table[self.hash(prefix, level)]
+            if entry is None or not isinstance(entry[1], ArrayR):
+                return None, entry
+            current_table = entry[1]
+        return current_table, None
+
+    def _sorted_items(self, table: ArrayR) -> Iterator[tuple[K, V]]:
+        """
+        Every (key, value) in table and the tables below it, in key order.
+        Characters which hash to the same slot can put keys from one slot's
+        table between those of another, so each table merges its slots'
+        sorted streams instead of just going through the slots in order.
+
+        :complexity: O(N*D*log(TABLE_SIZE)), N being the number of keys and D the depth.
+        """
+        streams = []
+        for index in range(self.TABLE_SIZE):
+            entry = table[index]
+            if entry is None:
+                continue
+            if isinstance(entry[1], ArrayR):
+                streams.append(self._sorted_items(entry[1]))
+            else:
+                streams.append(iter(((entry[0], entry[1]),)))
+        yield from heapq.merge(*streams, key=itemgetter(0))
+
+    def iter_prefix(self, prefix: str) -> Iterator[tuple[K, V]]:
+        """
+        Generate every (key, value) whose key starts with prefix, in key order.
+        Goes straight down to the prefix's table rather than looking at every key.
 
+        :complexity: O(len(prefix)*hash + R*D*log(TABLE_SIZE)), R being the number
+        of keys under the prefix's table and D their depth.
+        """
+        table, entry = self._find_prefix(prefix)
+        if entry is not None:
+            if entry[0].startswith(prefix):
+                yield entry[0], entry[1]
+        elif table is not None:
+            for key, value in self._sorted_items(table):
+                if key.startswith(prefix):
+                    yield key, value
+
+    def count_prefix(self, prefix: str) -> int:
+        """
+        Count the keys which start with prefix.
+
+        :complexity: O(len(prefix)*hash + T*TABLE_SIZE), T being the number of tables under the prefix's table.
+        """
+        table, entry = self._find_prefix(prefix)
+        if entry is not None:
+            return 1 if entry[0].startswith(prefix) else 0
+        if table is None:
+            return 0
+        total = 0
+        stack = [table]
+        while stack:
+            current_table = stack.pop()
+            for index in range(self.TABLE_SIZE):
+                entry = current_table[index]
+                if entry is None:
+                    continue
+                if isinstance(entry[1], ArrayR):
+                    stack.append(entry[1])
+                elif entry[0].startswith(prefix):
+                    total += 1
+        return total
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """Generate every (key, value) in the table, in key order."""
+        return self.iter_prefix("")
+
+    def check_invariants(self) -> None:
+        """
+        Check the tables are laid out as they should be after any sequence of
+        sets and deletes:
+            - every key (and table prefix) hashes to the positions on the
+              way down to it, at each level.
+            - each table's used and position_sum match the positions in use.
+            - no table below the top one is empty or holds just one key,
+              as deleting collapses those into the table above.
+            - count is the number of keys.
+
+        Raises:
+        - AssertionError: describing the first problem found.
+
+        Complexity:
+        - O(N*TABLE_SIZE + K*len(key)*hash), N being the number of tables and K the number of keys.
+        """
+        keys = 0
+        stack = [(self.table, ())]
+        while stack:
+            current_table, path = stack.pop()
+            level = len(path)
+            used = 0
+            position_sum = 0
+            lone_key = True
+            for index in range(self.TABLE_SIZE):
+                entry = current_table[index]
+                if entry is None:
+                    continue
+                used += 1
+                position_sum += index
+                if any(self.hash(entry[0], i) != pos for i, pos in enumerate(path + (index,))):
+                    raise AssertionError(f"{entry[0]!r} is at {list(path + (index,))}, which isn't where it hashes to")
+                if isinstance(entry[1], ArrayR):
+                    if len(entry[0]) != level + 1:
+                        raise AssertionError(f"prefix {entry[0]!r} is for a table {len(entry[0])} levels down, not {level + 1}")
+                    stack.append((entry[1], path + (index,)))
+                    lone_key = False
+                else:
+                    keys += 1
+            if len(current_table) != self.TABLE_SIZE:
+                raise AssertionError(f"table at {list(path)} has {len(current_table)} slots, not {self.TABLE_SIZE}")
+            if (current_table.used, current_table.position_sum) != (used, position_sum):
+                raise AssertionError(
+                    f"table at {list(path)} records {current_table.used} used positions summing to "
+                    f"{current_table.position_sum}, but has {used} summing to {position_sum}"
+                )
+            if level > 0 and (used == 0 or (used == 1 and lone_key)):
+                raise AssertionError(f"table at {list(path)} has {used} keys and should have been collapsed")
+        if keys != self.count:
+            raise AssertionError(f"count is {self.count} but there are {keys} keys")
+
+    def enable_stats(self) -> None:
+        """
+        Start recording lookup depths for `stats`.
+        Until this is called (and after `disable_stats`) nothing is recorded.
+
+        A lookup's probe length is the number of levels it went down.
+        """
+        self.disable_stats()
+        self._probe_stats = ProbeStats()
+        self._descend = self._counted_descend
+
+    def disable_stats(self) -> None:
+        """Stop recording and throw away what has been recorded."""
+        if self._probe_stats is not None:
+            del self._descend
+            self._probe_stats = None
+
+    def _counted_descend(self, key: K) -> tuple[list[int], ArrayR]:
+        """`_descend`, recording how many levels it went down."""
+        try:
+            sequence, entry = type(self)._descend(self, key)
+        except KeyError:
+            self._probe_stats.record_miss()
+            raise
+        self._probe_stats.record_probe(len(sequence))
+        return sequence, entry
+
+    def stats(self) -> dict:
+        """
+        Statistics about the table's shape: the number of tables at each level
+        and how many of their slots are used (the fan-out), and a histogram of
+        the levels the keys are stored at.
+        While stats are enabled it also has the lookup counters from ProbeStats.
+
+        :complexity: O(N*TABLE_SIZE), N being the number of tables.
+        """
+        fan_outs = {}  # level -> list of used slots in each table at that level
+        key_depths = []
+        stack = [(self.table, 0)]
+        while stack:
+            current_table, level = stack.pop()
+            for index in range(self.TABLE_SIZE):
+                entry = current_table[index]
+                if entry is None:
+                    continue
+                if isinstance(entry[1], ArrayR):
+                    stack.append((entry[1], level + 1))
+                else:
+                    key_depths.append(level + 1)
+            fan_outs.setdefault(level, []).append(current_table.used)
+
+        result = {
+            "entries": self.count,
+            "tables": sum(len(used) for used in fan_outs.values()),
+            "max_depth": max(key_depths, default=0),
+            "level_fan_out": {
+                level: {
+                    "tables": len(used),
+                    "avg_used_slots": sum(used) / len(used),
+                    "max_used_slots": max(used),
+                }
+                for level, used in sorted(fan_outs.items())
+            },
+            "key_depths": histogram(key_depths),
+        }
+        if self._probe_stats is not None:
+            result.update(self._probe_stats.as_dict())
+            del result["rehashes"], result["rehash_time"]  # nothing is ever rehashed
+        return result
+
+    def stats_report(self) -> str:
+        """`stats` as human readable text."""
+        return format_report(f"{type(self).__name__} stats", self.stats())
 
     def __contains__(self, key: K) -> bool:
         """
@@ -205,6 +549,72 @@ class InfiniteHashTable(Generic[K, V]):
         else:
             return True
 
+class ConcurrentInfiniteHashTable(InfiniteHashTable[K, V]):
+    """
+    Infinite Hash Table which can be shared between threads.
+
+    Any number of threads can look keys up at once; setting or deleting a key
+    waits for the lookups in progress to finish and holds everyone else off
+    until it is done.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = ReadWriteLock()
+
+    def __getitem__(self, key: K) -> V:
+        with self._lock.reading():
+            return super().__getitem__(key)
+
+    def get_location(self, key):
+        with self._lock.reading():
+            return super().get_location(key)
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock.reading():
+            try:
+                self._descend(key)
+            except KeyError:
+                return False
+            return True
+
+    def stats(self) -> dict:
+        with self._lock.reading():
+            return super().stats()
+
+    def iter_prefix(self, prefix: str) -> Iterator[tuple[K, V]]:
+        """
+        As in InfiniteHashTable, except the results are all collected while
+        the lock is held, so a slow consumer doesn't hold writers up.
+        """
+        with self._lock.reading():
+            return iter(list(super().iter_prefix(prefix)))
+
+    def count_prefix(self, prefix: str) -> int:
+        with self._lock.reading():
+            return super().count_prefix(prefix)
+
+    def get_many(self, keys: list[K], default: V = _MISSING) -> list[V]:
+        with self._lock.reading():
+            return super().get_many(keys, default)
+
+    def set_many(self, items: list[tuple[K, V]]) -> None:
+        with self._lock.writing():
+            super().set_many(items)
+
+    def delete_many(self, keys: list[K]) -> None:
+        with self._lock.writing():
+            super().delete_many(keys)
+
+    def __setitem__(self, key: K, value: V) -> None:
+        with self._lock.writing():
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key: K) -> None:
+        with self._lock.writing():
+            super().__delitem__(key)
+
+
 if __name__ == "__main__":
     ih = InfiniteHashTable()
     ih["lin"] = 1
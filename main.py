@@ -15,9 +15,8 @@ from mountain import Mountain
 from mountain_manager import MountainManager
 from trail import Trail, TrailSeries, TrailSplit
 from draw_trails import TrailDraw
-from mountain_organiser import MountainOrganiser
-from double_key_table import DoubleKeyTable
-from serialize import serialize, deserialize
+from mountain_graph import MountainGraph
+from serialize import serialize, deserialize, dump, load, BINARY_SUFFIX
 
 class MyWindow(arcade.Window):
     """ Painter Window """
@@ -277,9 +276,14 @@ class MyWindow(arcade.Window):
         """Set up the game and initialize the variables."""
         self.reset()
         self.mountain_manager = MountainManager()
+        self.mountain_graph = MountainGraph(self.mountain_manager)
         self.cur_filename = sys.argv[1] if len(sys.argv) > 1 else "basic.json"
-        with open(f"stores/{self.cur_filename}", "r") as f:
-            t = deserialize(json.loads(f.read()))
+        if self.cur_filename.endswith(BINARY_SUFFIX):
+            with open(f"stores/{self.cur_filename}", "rb") as f:
+                t = load(f)
+        else:
+            with open(f"stores/{self.cur_filename}", "r") as f:
+                t = deserialize(json.loads(f.read()))
         try:
             # Try to add all existing mountains
             for mountain in t.collect_all_mountains():
@@ -292,7 +296,7 @@ class MyWindow(arcade.Window):
     def on_draw(self) -> None:
         """Draw everything"""
         self.clear()
-        self.mountain.draw_in_box(self.SCREEN_HEIGHT, self.DRAW_PANEL, 0, 0)
+        self.mountain.draw_retained(self.SCREEN_HEIGHT, self.DRAW_PANEL, 0, 0)
         if self.draw_box is not None and not (self.showing_graph or self.is_editing or self.is_saving):
             arcade.draw_rectangle_filled(self.draw_box.x + self.draw_box.w/2, self.draw_box.y + self.draw_box.h/2, self.draw_box.w, self.draw_box.h, (0, 255, 0, 100))
         # UI - Draw Modes / Action buttons
@@ -383,33 +387,7 @@ class MyWindow(arcade.Window):
 
     def on_graph_clicked(self):
         self.showing_graph = True
-        import colorsys
-        def get_col(index, total):
-            return [
-                int(255*x)
-                for x in colorsys.hls_to_rgb(index/total, 0.6, 0.6)
-            ]
-        groups = self.mountain_manager.group_by_difficulty()
-        to = MountainOrganiser()
-        positions = DoubleKeyTable()
-        positions.hash1 = lambda k: (k % positions.table_size)
-        all_mountains = []
-        for i, group in enumerate(groups):
-            to.add_mountains(group)
-            for mountain in group:
-                positions[mountain.difficulty_level, mountain.name] = []
-            all_mountains.extend(group)
-            for mountain in all_mountains:
-                positions[mountain.difficulty_level, mountain.name].append(to.cur_position(mountain))
-        self.graph_data = [
-            [
-                get_col(i, len(all_mountains)),
-                len(groups) - len(positions[mountain.difficulty_level, mountain.name]),
-                mountain.name,
-                positions[mountain.difficulty_level, mountain.name]
-            ]
-            for i, mountain in enumerate(all_mountains)
-        ]
+        self.graph_data = self.mountain_graph.graph_data()
 
     def on_save_file_clicked(self):
         self.is_saving = True
@@ -453,6 +431,7 @@ class MyWindow(arcade.Window):
             self.mountain_manager.edit_mountain(old_mountain, self.cur_editing_mountain)
         except NotImplementedError:
             pass
+        self.mountain.refresh()  # the mountain was changed in place, so the trail doesn't know
         # Close the window.
         self.on_close_clicked(event)
 
@@ -463,8 +442,12 @@ class MyWindow(arcade.Window):
 
     def on_file_save_clicked(self, event):
         new_path = str(self.input_file_name.text)
-        with open(f"stores/{new_path}", "w") as f:
-            f.write(serialize(self.mountain.trail))
+        if new_path.endswith(BINARY_SUFFIX):
+            with open(f"stores/{new_path}", "wb") as f:
+                dump(self.mountain.trail, f)
+        else:
+            with open(f"stores/{new_path}", "w") as f:
+                f.write(serialize(self.mountain.trail))
         # Close the window.
         self.on_file_close_clicked(event)
 
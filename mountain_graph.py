@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import colorsys
+from bisect import bisect_left, insort
+from itertools import accumulate
+
+from mountain import Mountain
+from mountain_manager import MountainManager
+
+
+class MountainGraph:
+    """
+    The graph view's data, kept up to date as the manager's mountains change.
+
+    The graph has a column for each difficulty level, easiest first. Column i ranks the
+    mountains of the first i+1 levels as MountainOrganiser would after adding them one
+    level at a time: by length, then name, mountains of easier levels first among equals.
+    Each mountain has a series of ranks, from its own level's column to the last.
+
+    `_order` holds (length, name, difficulty_level) of every mountain, sorted, which is the
+    order of the last column. A mountain's rank in column i is how many mountains of the
+    first i+1 levels come before it there. A change at one level doesn't move mountains
+    in the columns before it, so only the columns from the lowest level changed
+    (`_changed_from`) are worked out again, when the graph is next asked for.
+    """
+
+    def __init__(self, manager: MountainManager) -> None:
+        self.manager = manager
+        self._order = []
+        self._series = {}  # (difficulty_level, name) -> ranks from its level's column on
+        self._changed_from = None
+        self._graph_data = []
+        self._colours = []  # colour(i, len(_colours)) for each i
+        for group in manager.group_by_difficulty():
+            for mountain in group:
+                self.mountain_added(mountain)
+        manager.subscribe(self)
+
+    def mountain_added(self, mountain: Mountain) -> None:
+        """:complexity: O(N) to insert into `_order`, N being the number of mountains."""
+        insort(self._order, (mountain.length, mountain.name, mountain.difficulty_level))
+        self._changed(mountain.difficulty_level)
+
+    def mountain_removed(self, mountain: Mountain) -> None:
+        """:complexity: O(N) to delete from `_order`, N being the number of mountains."""
+        del self._order[bisect_left(self._order, (mountain.length, mountain.name, mountain.difficulty_level))]
+        self._series.pop((mountain.difficulty_level, mountain.name), None)
+        self._changed(mountain.difficulty_level)
+
+    def _changed(self, difficulty_level: int) -> None:
+        if self._changed_from is None or difficulty_level < self._changed_from:
+            self._changed_from = difficulty_level
+
+    @staticmethod
+    def colour(index: int, total: int) -> list[int]:
+        return [int(255*x) for x in colorsys.hls_to_rgb(index/total, 0.6, 0.6)]
+
+    def graph_data(self) -> list[list]:
+        """
+        [colour, start_index, name, ranks] for every mountain, grouped by difficulty level,
+        start_index being the column of its level.
+
+        :complexity: O(1) if nothing changed since last time. Otherwise O(N*(G-F)), N being
+        the number of mountains, G the number of levels and F how many levels are easier
+        than the easiest changed.
+        """
+        if self._changed_from is None:
+            return self._graph_data
+        levels = self.manager.difficulties
+        first = bisect_left(levels, self._changed_from)
+        column = {level: i for i, level in enumerate(levels)}
+        seen = [0] * len(levels)  # how many mountains of each level come before this one
+        for length, name, level in self._order:
+            i = column[level]
+            start = max(i, first)
+            # its ranks in the columns from start on: none if the level changed was the hardest and is gone
+            ranks = accumulate(seen[start + 1:], initial=sum(seen[:start + 1])) if start < len(levels) else ()
+            if i >= first:
+                self._series[level, name] = list(ranks)
+            else:
+                series = self._series[level, name]
+                del series[first - i:]
+                series.extend(ranks)
+            seen[i] += 1
+        all_mountains = [mountain for group in self.manager.group_by_difficulty() for mountain in group]
+        if len(self._colours) != len(all_mountains):
+            self._colours = [self.colour(i, len(all_mountains)) for i in range(len(all_mountains))]
+        self._graph_data = [
+            [
+                self._colours[i],
+                column[mountain.difficulty_level],
+                mountain.name,
+                self._series[mountain.difficulty_level, mountain.name],
+            ]
+            for i, mountain in enumerate(all_mountains)
+        ]
+        self._changed_from = None
+        return self._graph_data
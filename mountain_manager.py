@@ -1,34 +1,90 @@
+from bisect import bisect_left, insort
 from mountain import Mountain
 from typing import List
 from double_key_table import DoubleKeyTable
-from algorithms.mergesort import mergesort
 
 
 class MountainManager:
+    """
+    Keeps track of mountains by difficulty.
+
+    As well as the table of mountains, the manager keeps an index for the
+    grouped queries, updated as mountains are added, removed and edited:
+        - `difficulties`, the difficulty levels with any mountains, in increasing order.
+        - `_buckets`, each difficulty level's mountains by name.
+
+    Listeners (see `subscribe`) are told of every mountain added and removed,
+    an edit being a removal then an addition.
+    """
 
     def __init__(self) -> None:
         self.mountains = DoubleKeyTable()
-        self.track = set()
+        self.difficulties = []
+        self._buckets = {}
+        self.listeners = []
+
+    def subscribe(self, listener) -> None:
+        """
+        Call listener.mountain_added(mountain) and listener.mountain_removed(mountain) from now on.
+        A mountain replacing one with the same difficulty level and name is a removal then an addition.
+        """
+        self.listeners.append(listener)
 
     def add_mountain(self, mountain: Mountain) -> None:
+        """
+        :complexity: O(DoubleKeyTable.setitem + log(D) + D), D being the number of difficulty levels.
+        The O(D) is only for a difficulty level which has no mountains yet.
+        """
         self.mountains[str(mountain.difficulty_level), mountain.name] = mountain
-        self.track.add(str(mountain.difficulty_level))
+        self._index(mountain)
 
     def remove_mountain(self, mountain: Mountain) -> None:
+        """
+        :complexity: O(DoubleKeyTable.delitem + log(D) + D), D being the number of difficulty levels.
+        The O(log(D) + D) is only for the last mountain at its difficulty level.
+        """
         del self.mountains[str(mountain.difficulty_level), mountain.name]
+        self._unindex(mountain)
 
     def edit_mountain(self, old_mountain: Mountain, new_mountain: Mountain) -> None:
+        """:complexity: As remove_mountain followed by add_mountain."""
         del self.mountains[str(old_mountain.difficulty_level), old_mountain.name]
+        self._unindex(old_mountain)
         self.mountains[str(new_mountain.difficulty_level), new_mountain.name] = new_mountain
+        self._index(new_mountain)
 
-    def mountains_with_difficulty(self, diff: int) -> List[Mountain]:
+    def _index(self, mountain: Mountain) -> None:
+        bucket = self._buckets.get(mountain.difficulty_level)
+        if bucket is None:
+            bucket = self._buckets[mountain.difficulty_level] = {}
+            insort(self.difficulties, mountain.difficulty_level)
+        replaced = bucket.get(mountain.name)
+        bucket[mountain.name] = mountain
+        for listener in self.listeners:
+            if replaced is not None:
+                listener.mountain_removed(replaced)
+            listener.mountain_added(mountain)
 
-        if str(diff) not in self.track:
+    def _unindex(self, mountain: Mountain) -> None:
+        bucket = self._buckets[mountain.difficulty_level]
+        del bucket[mountain.name]
+        if not bucket:
+            del self._buckets[mountain.difficulty_level]
+            del self.difficulties[bisect_left(self.difficulties, mountain.difficulty_level)]
+        for listener in self.listeners:
+            listener.mountain_removed(mountain)
+
+    def mountains_with_difficulty(self, diff: int) -> List[Mountain]:
+        """:complexity: O(M), M being the number of mountains returned."""
+        bucket = self._buckets.get(diff)
+        if bucket is None:
             return []
-        return self.mountains.values(str(diff))
+        return list(bucket.values())
 
     def group_by_difficulty(self) -> List[List[Mountain]]:
-        keep = []
-        for key in mergesort(self.mountains.keys()):
-            keep.append(self.mountains_with_difficulty(key))
-        return keep
+        """
+        The mountains grouped by difficulty level, easiest first.
+
+        :complexity: O(N), N being the number of mountains.
+        """
+        return [list(self._buckets[diff].values()) for diff in self.difficulties]
@@ -1,34 +1,62 @@
 from __future__ import annotations
 
+from bisect import bisect_left
+from operator import attrgetter
+
 from mountain import Mountain
-from algorithms.mergesort import mergesort
+from algorithms.mergesort import mergesort, merge
+
+# Mountains are ordered by length, then by name.
+_order = attrgetter("length", "name")
+
 
 class MountainOrganiser:
+    """
+    Mountains ordered by (length, name).
+
+    `_keys` holds the (length, name) of each mountain in `mountain_organizer`,
+    so a mountain's rank can be found by binary search.
+    """
 
     def __init__(self) -> None:
         self.mountain_organizer=[]
-
-    def cur_position(self, mountain: Mountain) -> int: #worst case complexity O(N). N being the len of self.mountain_organizer, which means the mountain is at the end or the mountain is not found
-        for i in range(len(self.mountain_organizer)): #best case O(1).when the mountain is at index 0.
-            if self.mountain_organizer[i]==mountain:
+        self._keys=[]
+
+    def cur_position(self, mountain: Mountain) -> int:
+        """
+        The mountain's position in the order.
+
+        Binary search finds where its (length, name) starts; the mountains
+        from there with the same length and name are compared until it is
+        found. A mountain whose length or name was changed after it was added
+        isn't where its key says, so it is looked for through the whole list.
+
+        :raises KeyError: when the mountain isn't here.
+        :complexity: O(log(N)*comp + E), N being the number of mountains and E how many share its length and name.
+        O(N) when the mountain isn't where its key says.
+        """
+        key = _order(mountain)
+        i = bisect_left(self._keys, key)
+        while i < len(self._keys) and self._keys[i] == key:
+            if self.mountain_organizer[i] == mountain:
+                return i
+            i += 1
+        for i in range(len(self.mountain_organizer)):
+            if self.mountain_organizer[i] == mountain:
                 return i
         raise KeyError(mountain)
 
-    def add_mountains(self, mountains: list[Mountain]) -> None: #worst case complexity O(N^2). N being how many items in mountains, best O(1) meaning only 1 item in mountains.
-        for mountain in mountains:
-            self.mountain_organizer.append(mountain)
-        list_to_sort=[]
-        for mountain in self.mountain_organizer:
-            list_to_sort.append((mountain.length,mountain.name)) #making it to a tuple so can be sorted by mergesort
-        sorted_tuple_list=mergesort(list_to_sort)
-
-        new_mo=[] #a sorted list of mountains
-        for i in sorted_tuple_list:
-            for j in self.mountain_organizer:
-                if i[1] == j.name:
-                    new_mo.append(j)
-        self.mountain_organizer=new_mo
-        return None
-
+    def add_mountains(self, mountains: list[Mountain]) -> None:
+        """
+        Add a batch of mountains, keeping everything ordered by (length, name).
 
+        Only the batch is sorted; it is then merged into the mountains already
+        here, which are in order already. Both sorting and merging are stable
+        and take the mountains already here first, so mountains with the same
+        length and name stay in the order they were added, each one kept once.
 
+        :complexity: O(N + K*log(K)*comp), N being the number of mountains already here and K len(mountains).
+        """
+        batch = mergesort(list(mountains), key=_order)
+        self.mountain_organizer = merge(self.mountain_organizer, batch, key=_order)
+        self._keys = [_order(mountain) for mountain in self.mountain_organizer]
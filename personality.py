@@ -4,6 +4,22 @@ from trail import Trail
 
 class WalkerPersonality(ABC):
 
+    # True or False if select_branch always returns it, so a CompiledTrail can walk without asking.
+    FIXED_BRANCH = None
+    # Whether select_branch only depends on the branches it's given, so personalities of
+    # the same class can share one walk of a CompiledTrail.
+    # Both are only inherited while select_branch is: a subclass overriding it has them
+    # reset, unless it sets them again itself.
+    DETERMINISTIC = False
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "select_branch" in cls.__dict__:
+            if "FIXED_BRANCH" not in cls.__dict__:
+                cls.FIXED_BRANCH = None
+            if "DETERMINISTIC" not in cls.__dict__:
+                cls.DETERMINISTIC = False
+
     def __init__(self) -> None:
         self.mountains = []
 
@@ -15,16 +31,24 @@ class WalkerPersonality(ABC):
         raise NotImplementedError()
 
 class TopWalker(WalkerPersonality):
+    FIXED_BRANCH = True
+    DETERMINISTIC = True
+
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> bool:
         # Always select the top branch
         return True
 
 class BottomWalker(WalkerPersonality):
+    FIXED_BRANCH = False
+    DETERMINISTIC = True
+
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> bool:
         # Always select the bottom branch
         return False
 
 class LazyWalker(WalkerPersonality):
+    DETERMINISTIC = True
+
     def select_branch(self, top_branch: Trail, bottom_branch: Trail) -> bool:
         """
         Try looking into the first mountain on each branch,
@@ -1,4 +1,5 @@
-import dataclasses, json
+import dataclasses, json, struct
+from typing import BinaryIO, Iterable, Iterator, TextIO
 
 from trail import Trail, TrailSplit, TrailSeries
 from mountain import Mountain
@@ -27,17 +28,247 @@ def serialize(trail):
     return json.dumps(trail, cls=EnhancedJSONEncoder)
 
 def deserialize(obj):
-    if obj["store"] is None:
-        return Trail(None)
-    if "mountain" in obj["store"]:
-        inside = TrailSeries(
-            Mountain(**obj["store"]["mountain"]),
-            deserialize(obj["store"]["following"])
-        )
-    else:
-        inside = TrailSplit(
-            deserialize(obj["store"]["path_bottom"]),
-            deserialize(obj["store"]["path_top"]),
-            deserialize(obj["store"]["path_follow"])
-        )
-    return Trail(inside)
+    """
+    Build the Trail from its serialized dict, working from the bottom up
+    with a stack rather than recursing, so long trails load too.
+    """
+    trails = []
+    to_build = [(obj, False)]
+    while to_build:
+        obj, paths_done = to_build.pop()
+        store = obj["store"]
+        if store is None:
+            trails.append(Trail(None))
+        elif paths_done:
+            if "mountain" in store:
+                trails.append(Trail(TrailSeries(Mountain(**store["mountain"]), trails.pop())))
+            else:
+                path_follow = trails.pop()
+                path_top = trails.pop()
+                path_bottom = trails.pop()
+                trails.append(Trail(TrailSplit(path_bottom, path_top, path_follow)))
+        else:
+            to_build.append((obj, True))
+            if "mountain" in store:
+                to_build.append((store["following"], False))
+            else:
+                to_build.append((store["path_follow"], False))
+                to_build.append((store["path_top"], False))
+                to_build.append((store["path_bottom"], False))
+    return trails.pop()
+
+# Binary trail files: MAGIC, then the trail in pre-order, one tag byte per trail:
+#   EMPTY
+#   SERIES_NEW, the mountain (name length, name in utf-8, difficulty_level, length), following
+#   SERIES_SEEN, the number of an earlier SERIES_NEW's mountain (counting from 0), following
+#   SPLIT, path_top, path_bottom, path_follow
+# A mountain in the trail more than once is only written once, and loads as one mountain again.
+BINARY_SUFFIX = ".trail"
+MAGIC = b"TRL1"
+EMPTY, SERIES_NEW, SERIES_SEEN, SPLIT = range(4)
+_MOUNTAIN = struct.Struct("<qq")
+_NUMBER = struct.Struct("<I")
+_CHUNK = 1 << 16
+
+def preorder(trail: Trail) -> Iterator[Mountain | type[TrailSplit] | None]:
+    """
+    The trail as tokens in pre-order: a series' Mountain, TrailSplit (the class) for a split,
+    then its path_top, path_bottom and path_follow, and None for the empty trail ending each path.
+    dump_preorder, serialize_preorder and build read tokens in this order.
+    """
+    to_visit = [trail]
+    while to_visit:
+        store = to_visit.pop().store
+        while store is not None:
+            if isinstance(store, TrailSeries):
+                yield store.mountain
+                store = store.following.store
+            else:
+                yield TrailSplit
+                to_visit.append(store.path_follow)
+                to_visit.append(store.path_bottom)
+                store = store.path_top.store
+        yield None
+
+def build(tokens: Iterable[Mountain | type[TrailSplit] | None]) -> Trail:
+    """
+    The trail made of tokens as given by preorder.
+
+    Complexity:
+    - O(n), n being how many trails there are. Besides the trail, it holds the paths still
+    to fill in, one for each split it's in the middle of.
+    """
+    root = Trail()
+    trail = root
+    to_fill = []
+    for token in tokens:
+        if token is None:
+            if not to_fill:
+                return root
+            trail = to_fill.pop()
+        elif token is TrailSplit:
+            top, bottom, follow = Trail(), Trail(), Trail()
+            trail.store = TrailSplit(top, bottom, follow)
+            to_fill.append(follow)
+            to_fill.append(bottom)
+            trail = top
+        else:
+            following = Trail()
+            trail.store = TrailSeries(token, following)
+            trail = following
+    raise ValueError("trail ends part way through")
+
+def dump(trail: Trail, f: BinaryIO) -> None:
+    """
+    Write the trail to the binary file f, without building anything else from it first.
+
+    Complexity:
+    - O(n), n being how many trails there are. Besides the mountains written so far, it
+    holds the paths still to write, one for each split it's in the middle of, and up to
+    _CHUNK bytes before writing them out.
+    """
+    dump_preorder(preorder(trail), f)
+
+def dump_preorder(tokens: Iterable[Mountain | type[TrailSplit] | None], f: BinaryIO, deduplicate: bool = True) -> None:
+    """
+    Write the trail made of tokens (see preorder) to the binary file f as dump does.
+
+    Mountains written before are kept to find them again, unless deduplicate is False,
+    for tokens whose mountains are all different and not kept anywhere else.
+    """
+    out = bytearray(MAGIC)
+    seen = {}  # id(mountain) -> its number and the mountain, so the id isn't reused
+    for token in tokens:
+        if token is None:
+            out.append(EMPTY)
+        elif token is TrailSplit:
+            out.append(SPLIT)
+        else:
+            number = seen.get(id(token)) if deduplicate else None
+            if number is None:
+                if deduplicate:
+                    seen[id(token)] = (len(seen), token)
+                name = token.name.encode()
+                out.append(SERIES_NEW)
+                out += _NUMBER.pack(len(name))
+                out += name
+                out += _MOUNTAIN.pack(token.difficulty_level, token.length)
+            else:
+                out.append(SERIES_SEEN)
+                out += _NUMBER.pack(number[0])
+        if len(out) >= _CHUNK:
+            f.write(out)
+            out.clear()
+    f.write(out)
+
+def serialize_preorder(tokens: Iterable[Mountain | type[TrailSplit] | None], f: TextIO) -> None:
+    """
+    Write the trail made of tokens (see preorder) to the text file f, as the same JSON
+    serialize gives, without building the trail or a dict tree.
+
+    Complexity:
+    - O(n), n being how many trails there are. It holds what closes each split it's in the
+    middle of, and how many series end with the current path.
+    """
+    # What to write once the current path ends, last first: ", \"path_...\": " to start a
+    # split's next path, or a number of series and splits to close.
+    after = []
+    out = []
+    for token in tokens:
+        if token is None:
+            out.append('{"store": null}')
+            while after:
+                if isinstance(after[-1], str):
+                    out.append(after.pop())
+                    break
+                out.append("}}" * after.pop())
+        else:
+            if after and not isinstance(after[-1], str):
+                after[-1] += 1
+            else:
+                after.append(1)
+            if token is TrailSplit:
+                out.append('{"store": {"path_top": ')
+                after.append(', "path_follow": ')
+                after.append(', "path_bottom": ')
+            else:
+                out.append('{"store": {"mountain": ')
+                out.append(json.dumps({"name": token.name, "difficulty_level": token.difficulty_level, "length": token.length}))
+                out.append(', "following": ')
+        if len(out) >= 4096:
+            f.write("".join(out))
+            out.clear()
+    f.write("".join(out))
+
+class _Reader:
+    """Reads a binary file _CHUNK bytes at a time."""
+
+    def __init__(self, f: BinaryIO) -> None:
+        self.f = f
+        self.data = b""
+        self.pos = 0
+
+    def read(self, n: int) -> bytes:
+        """The next n bytes."""
+        if self.pos + n > len(self.data):
+            self.data = self.data[self.pos:] + self.f.read(max(n, _CHUNK))
+            self.pos = 0
+            if n > len(self.data):
+                raise ValueError("trail file ends part way through")
+        self.pos += n
+        return self.data[self.pos - n:self.pos]
+
+    def byte(self) -> int:
+        return self.read(1)[0]
+
+    def at_end(self) -> bool:
+        """Whether every byte of the file has been read."""
+        return self.pos == len(self.data) and not self.f.read(1)
+
+    def unpack(self, format: struct.Struct) -> tuple:
+        return format.unpack(self.read(format.size))
+
+def load(f: BinaryIO) -> Trail:
+    """
+    Read a trail written by dump from the binary file f.
+
+    Raises:
+    - ValueError if f isn't a whole trail written by dump.
+
+    Complexity:
+    - O(n), n being how many trails there are. Besides the mountains read so far, it holds
+    the paths still to read, one for each split it's in the middle of.
+    """
+    reader = _Reader(f)
+    if reader.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a trail file")
+    trail = build(_read_preorder(reader))
+    if not reader.at_end():
+        raise ValueError("trail file goes on after the trail ends")
+    return trail
+
+def _read_preorder(reader: _Reader) -> Iterator[Mountain | type[TrailSplit] | None]:
+    """The tokens (see preorder) of the trail in a binary file, after its MAGIC."""
+    mountains = []
+    paths = 1  # how many paths are still to end
+    while paths:
+        tag = reader.byte()
+        if tag == EMPTY:
+            paths -= 1
+            yield None
+        elif tag == SPLIT:
+            paths += 2
+            yield TrailSplit
+        elif tag == SERIES_NEW:
+            size, = reader.unpack(_NUMBER)
+            name = reader.read(size).decode()
+            mountain = Mountain(name, *reader.unpack(_MOUNTAIN))
+            mountains.append(mountain)
+            yield mountain
+        elif tag == SERIES_SEEN:
+            number, = reader.unpack(_NUMBER)
+            if number >= len(mountains):
+                raise ValueError(f"mountain {number} used before it was written")
+            yield mountains[number]
+        else:
+            raise ValueError(f"unknown tag {tag}")
@@ -0,0 +1,226 @@
+"""
+Seeded synthetic mountains and trails, for load testing.
+
+Mountains come from a MountainSpec: how long their names are, how many share
+a prefix (stressing InfiniteHashTable, which splits on each letter), and how
+skewed their difficulty levels are (stressing DoubleKeyTable's inner tables).
+Trails come from a TrailSpec: how deep splits nest, how many splits each path
+has and how long the runs of mountains between them are. Trails of one of
+SHAPES hold an exact number of mountains, for timing against trail size.
+
+Trails are generated as pre-order tokens (see serialize.preorder), so they can
+be written straight to a file without ever being built:
+
+    python synthetic.py stores/big.trail --max-depth 4 --splits 0 3 --seed 1
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import string
+from dataclasses import dataclass
+from itertools import accumulate, count, islice
+from typing import Iterator
+
+from mountain import Mountain
+from serialize import BINARY_SUFFIX, build, dump_preorder, serialize_preorder
+from trail import Trail, TrailSplit
+
+# InfiniteHashTable hashes a letter by its ord mod 26, which keeps lowercase letters apart.
+ALPHABET = string.ascii_lowercase
+SHAPES = ("series", "deep", "wide")
+
+
+@dataclass
+class MountainSpec:
+    """
+    How to make mountains.
+
+    Names are name_length letters (longer if needed to keep them all different), a
+    shared_prefix fraction of them starting with one of `prefixes` prefixes of
+    prefix_length letters. Difficulty levels are 0 to difficulty_levels - 1, level d
+    being picked with weight 1 / (d + 1) ** difficulty_skew, so 0 is even and higher
+    is more skewed to the easy levels. Lengths are 1 to max_length.
+    """
+
+    name_length: int = 8
+    shared_prefix: float = 0.0
+    prefixes: int = 4
+    prefix_length: int = 4
+    difficulty_levels: int = 50
+    difficulty_skew: float = 0.0
+    max_length: int = 1000
+
+
+@dataclass
+class TrailSpec:
+    """
+    How to make trails.
+
+    Each path has a run of series_length mountains, then a split, then another run,
+    and so on for a number of splits picked from `splits`, ending with a run. Paths
+    max_depth splits deep have no splits. With splits of (s, s) there are
+    (2s)^max_depth paths at the deepest level, so keep them small.
+    """
+
+    max_depth: int = 3
+    splits: tuple[int, int] = (0, 2)
+    series_length: tuple[int, int] = (1, 5)
+
+
+def _tag(number: int) -> str:
+    """number in base 26 letters, then a letter for how many there are, so no tag ends another."""
+    letters = []
+    while True:
+        number, digit = divmod(number, len(ALPHABET))
+        letters.append(ALPHABET[digit])
+        if not number:
+            break
+    return "".join(reversed(letters)) + ALPHABET[len(letters)]
+
+
+def iter_mountains(spec: MountainSpec = MountainSpec(), seed: int = 0) -> Iterator[Mountain]:
+    """
+    Mountains with different names, forever.
+
+    Each name ends with the mountain's number as a tag of letters, so names never repeat
+    however few letters are left after the prefix.
+    """
+    rng = random.Random(seed)
+    prefixes = ["".join(rng.choices(ALPHABET, k=spec.prefix_length)) for _ in range(spec.prefixes)]
+    weights = list(accumulate(1 / (level + 1) ** spec.difficulty_skew for level in range(spec.difficulty_levels)))
+    levels = range(spec.difficulty_levels)
+    for number in count():
+        prefix = rng.choice(prefixes) if rng.random() < spec.shared_prefix else ""
+        suffix = _tag(number)
+        middle = "".join(rng.choices(ALPHABET, k=max(0, spec.name_length - len(prefix) - len(suffix))))
+        yield Mountain(
+            prefix + middle + suffix,
+            rng.choices(levels, cum_weights=weights)[0],
+            rng.randint(1, spec.max_length),
+        )
+
+
+def make_mountains(amount: int, spec: MountainSpec = MountainSpec(), seed: int = 0) -> list[Mountain]:
+    return list(islice(iter_mountains(spec, seed), amount))
+
+
+def iter_trail(spec: TrailSpec = TrailSpec(), mountains: MountainSpec = MountainSpec(), seed: int = 0) -> Iterator[Mountain | type[TrailSplit] | None]:
+    """
+    A trail's tokens in pre-order (see serialize.preorder).
+
+    Complexity:
+    - O(n), n being how many trails there are, holding one entry for each split it's in the middle of.
+    """
+    rng = random.Random(seed)
+    new_mountains = iter_mountains(mountains, rng.randrange(2**32))
+    # The paths still to make: (how many splits deep, how many splits it has left)
+    to_make = [(0, rng.randint(*spec.splits) if spec.max_depth > 0 else 0)]
+    while to_make:
+        depth, splits = to_make.pop()
+        yield from islice(new_mountains, rng.randint(*spec.series_length))
+        if splits == 0:
+            yield None
+            continue
+        yield TrailSplit
+        to_make.append((depth, splits - 1))
+        for _ in ("bottom", "top"):
+            to_make.append((depth + 1, rng.randint(*spec.splits) if depth + 1 < spec.max_depth else 0))
+
+
+def make_trail(spec: TrailSpec = TrailSpec(), mountains: MountainSpec = MountainSpec(), seed: int = 0) -> Trail:
+    return build(iter_trail(spec, mountains, seed))
+
+
+def iter_shaped_trail(shape: str, size: int, mountains: MountainSpec = MountainSpec(), seed: int = 0) -> Iterator[Mountain | type[TrailSplit] | None]:
+    """
+    The tokens in pre-order (see serialize.preorder) of a trail of size mountains, shaped:
+        - series: all of them one after another,
+        - deep: size // 3 splits nested in each other's top path, with a mountain before
+          each and one in its bottom path, after the mountains left over,
+        - wide: a mountain then a split, nested in both paths, halving the mountains each
+          time down to runs of 4 or fewer, so there are about size / 4 paths.
+
+    Raises:
+    - ValueError if shape isn't one of SHAPES.
+
+    Complexity:
+    - O(size), holding one entry for each split it's in the middle of.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"unknown shape {shape!r}, expected one of {SHAPES}")
+    new_mountains = iter_mountains(mountains, seed)
+    if shape == "series":
+        yield from islice(new_mountains, size)
+        yield None
+    elif shape == "deep":
+        splits = size // 3
+        yield from islice(new_mountains, size - 2 * splits)
+        for _ in range(splits):
+            yield next(new_mountains)
+            yield TrailSplit
+        yield None  # the innermost path_top
+        for _ in range(splits):  # each split's path_bottom and path_follow, innermost first
+            yield next(new_mountains)
+            yield None
+            yield None
+    else:
+        to_make = [size]  # how many mountains each path still to make has
+        while to_make:
+            mountains_left = to_make.pop()
+            if mountains_left <= 4:
+                yield from islice(new_mountains, mountains_left)
+                yield None
+                continue
+            yield next(new_mountains)
+            yield TrailSplit
+            to_make.append(0)  # path_follow
+            to_make.append((mountains_left - 1) // 2)  # path_bottom
+            to_make.append(mountains_left - 1 - (mountains_left - 1) // 2)  # path_top
+
+
+def make_shaped_trail(shape: str, size: int, mountains: MountainSpec = MountainSpec(), seed: int = 0) -> Trail:
+    return build(iter_shaped_trail(shape, size, mountains, seed))
+
+
+def write_trail(path: str, spec: TrailSpec = TrailSpec(), mountains: MountainSpec = MountainSpec(), seed: int = 0) -> None:
+    """
+    Write a trail to path as it's made, without building it: with serialize.dump's
+    format if path ends with BINARY_SUFFIX, otherwise as serialize's JSON.
+    """
+    tokens = iter_trail(spec, mountains, seed)
+    if path.endswith(BINARY_SUFFIX):
+        with open(path, "wb") as f:
+            dump_preorder(tokens, f, deduplicate=False)
+    else:
+        with open(path, "w") as f:
+            serialize_preorder(tokens, f)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("path", help=f"where to write the trail, {BINARY_SUFFIX} for the binary format, otherwise JSON")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--max-depth", type=int, default=TrailSpec.max_depth)
+    p.add_argument("--splits", type=int, nargs=2, default=TrailSpec.splits)
+    p.add_argument("--series-length", type=int, nargs=2, default=TrailSpec.series_length)
+    p.add_argument("--name-length", type=int, default=MountainSpec.name_length)
+    p.add_argument("--shared-prefix", type=float, default=MountainSpec.shared_prefix)
+    p.add_argument("--difficulty-levels", type=int, default=MountainSpec.difficulty_levels)
+    p.add_argument("--difficulty-skew", type=float, default=MountainSpec.difficulty_skew)
+    args = p.parse_args()
+    write_trail(
+        args.path,
+        TrailSpec(args.max_depth, tuple(args.splits), tuple(args.series_length)),
+        MountainSpec(
+            name_length=args.name_length,
+            shared_prefix=args.shared_prefix,
+            difficulty_levels=args.difficulty_levels,
+            difficulty_skew=args.difficulty_skew,
+        ),
+        args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Opt-in probe and rehash statistics for the hash tables.
+
+A table only pays for recording while its stats are enabled: `enable_stats`
+puts instrumented versions of the hot methods on that one instance, and
+`disable_stats` removes them again, so a table with stats off runs the plain
+class methods.
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, Iterable
+
+
+class ProbeStats:
+    """
+    Running totals recorded by a table while its stats are enabled.
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def __init__(self) -> None:
+        self.probes = 0
+        self.misses = 0
+        self.total_length = 0
+        self.max_length = 0
+        self.rehashes = 0
+        self.rehash_time = 0.0
+
+    def record_probe(self, length: int) -> None:
+        """Record one probe which looked at `length` slots (or levels)."""
+        self.probes += 1
+        self.total_length += length
+        if length > self.max_length:
+            self.max_length = length
+
+    def record_miss(self) -> None:
+        """Record that a probe didn't find its key."""
+        self.misses += 1
+
+    def timed_rehash(self, rehash: Callable) -> Callable:
+        """Wrap a rehash method so each call is counted and timed."""
+        def func(*args):
+            start = time.perf_counter()
+            try:
+                return rehash(*args)
+            finally:
+                self.rehashes += 1
+                self.rehash_time += time.perf_counter() - start
+        return func
+
+    def as_dict(self) -> dict:
+        return {
+            "probes": self.probes,
+            "misses": self.misses,
+            "avg_probe_length": self.total_length / self.probes if self.probes else 0.0,
+            "max_probe_length": self.max_length,
+            "rehashes": self.rehashes,
+            "rehash_time": self.rehash_time,
+        }
+
+
+def histogram(values: Iterable[int]) -> dict[int, int]:
+    """
+    Count how many times each value appears, ordered by value.
+
+    :complexity: O(N log N), N being the number of values.
+    """
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def format_report(title: str, stats: dict) -> str:
+    """
+    Lay a `stats()` dict out as indented `name: value` lines.
+
+    :complexity: O(N), N being the number of values in stats, nested ones included.
+    """
+    lines = [title]
+    stack = [(iter(stats.items()), 1)]
+    while stack:
+        items, depth = stack[-1]
+        for name, value in items:
+            if isinstance(value, dict):
+                lines.append(f"{'  ' * depth}{name}:")
+                stack.append((iter(value.items()), depth + 1))
+                break
+            if isinstance(value, float):
+                value = f"{value:.4g}"
+            lines.append(f"{'  ' * depth}{name}: {value}")
+        else:
+            stack.pop()
+    return "\n".join(lines)
@@ -0,0 +1,184 @@
+import random
+import unittest
+
+from ed_utils.decorators import number
+
+from double_key_table import TOMBSTONE, DoubleKeyTable
+
+
+class PlacedTable(DoubleKeyTable):
+    """DoubleKeyTable where each key1 hashes to the position it is given, so clusters can be set up by hand."""
+
+    def __init__(self, positions: dict, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.positions = positions
+
+    def hash1(self, key: str) -> int:
+        return self.positions[key] % self.table_size
+
+
+class TestDoubleKeyTableTombstones(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # a, b and c share position 0, so they sit in one cluster at 0, 1 and 2.
+        self.table = PlacedTable({"a": 0, "b": 0, "c": 0, "d": 0, "e": 7}, sizes=[13, 29])
+        for key1 in "abc":
+            self.table[key1, "x"] = key1.upper()
+
+    @number("1.1")
+    def test_delete_leaves_tombstone_which_lookups_probe_past(self):
+        del self.table["a", "x"]
+        self.assertIs(self.table.table[0], TOMBSTONE)
+        self.assertEqual((len(self.table), self.table.outer_count, self.table.deleted_count), (2, 2, 1))
+        self.assertEqual(self.table["b", "x"], "B")
+        self.assertEqual(self.table["c", "x"], "C")
+        self.assertNotIn(("a", "x"), self.table)
+        with self.assertRaises(KeyError):
+            _ = self.table["a", "x"]
+        with self.assertRaises(KeyError):
+            del self.table["a", "x"]
+        self.assertEqual(sorted(self.table.keys()), ["b", "c"])
+
+    @number("1.2")
+    def test_deleting_one_key2_keeps_key1(self):
+        self.table["a", "y"] = "AY"
+        del self.table["a", "x"]
+        self.assertEqual(self.table.table[0][0], "a")
+        self.assertEqual(self.table.deleted_count, 0)
+        self.assertEqual(self.table.keys("a"), ["y"])
+
+    @number("1.3")
+    def test_insert_reuses_first_tombstone_in_cluster(self):
+        del self.table["b", "x"]
+        del self.table["a", "x"]
+        self.table["d", "x"] = "D"
+        self.assertEqual(self.table.table[0][0], "d")
+        self.assertIs(self.table.table[1], TOMBSTONE)
+        self.assertEqual((self.table.outer_count, self.table.deleted_count), (2, 1))
+        # An existing key1 past a tombstone is updated where it is, not inserted again.
+        self.table["c", "y"] = "CY"
+        self.assertEqual(self.table.table[2][0], "c")
+        self.assertEqual(self.table.outer_count, 2)
+        self.assertEqual(sorted(self.table.values()), ["C", "CY", "D"])
+
+    @number("1.4")
+    def test_mostly_tombstones_compacts_at_same_size(self):
+        self.table["d", "x"] = "D"
+        for i in range(2):
+            self.table.positions[f"k{i}"] = 4 + i
+            self.table[f"k{i}", "x"] = i
+        for key1 in "abcd":
+            del self.table[key1, "x"]
+        self.assertEqual((self.table.outer_count, self.table.deleted_count), (2, 4))
+        self.table["e", "x"] = "E"  # 3 keys and 4 tombstones > 0.5 * 13, but 3 keys alone aren't
+        self.assertEqual(self.table.table_size, 13)
+        self.assertEqual(self.table.deleted_count, 0)
+        self.assertNotIn(TOMBSTONE, list(self.table.table))
+        self.assertEqual(sorted(self.table.keys()), ["e", "k0", "k1"])
+
+
+class TestDoubleKeyTableResize(unittest.TestCase):
+
+    @number("1.5")
+    def test_grows_past_max_load_factor_and_keeps_items(self):
+        table = DoubleKeyTable(sizes=[5, 13, 29])
+        table["k0", "x"] = 0
+        table["k1", "x"] = 1
+        self.assertEqual(table.table_size, 5)
+        table["k2", "x"] = 2  # 3 > 0.5 * 5
+        self.assertEqual(table.table_size, 13)
+        for i in range(3, 6):
+            table[f"k{i}", "x"] = i
+        self.assertEqual(table.table_size, 13)
+        table["k6", "x"] = 6  # 7 > 0.5 * 13
+        self.assertEqual(table.table_size, 29)
+        self.assertEqual(sorted(table.values()), list(range(7)))
+        for i in range(7):
+            self.assertEqual(table[f"k{i}", "x"], i)
+
+    @number("1.6")
+    def test_max_load_factor(self):
+        for bad in (0, 1, 1.5, -0.5):
+            with self.assertRaises(ValueError):
+                DoubleKeyTable(max_load_factor=bad)
+        table = DoubleKeyTable(sizes=[13, 29], max_load_factor=0.25)
+        for i in range(3):
+            table[f"k{i}", "x"] = i
+        self.assertEqual(table.table_size, 13)
+        table["k3", "x"] = 3  # 4 > 0.25 * 13
+        self.assertEqual(table.table_size, 29)
+
+    @number("1.7")
+    def test_shrinks_once_mostly_empty_and_drops_tombstones(self):
+        table = DoubleKeyTable(sizes=[5, 13, 29])
+        for i in range(8):
+            table[f"k{i}", "x"] = i
+        self.assertEqual(table.table_size, 29)
+        for i in range(4):
+            del table[f"k{i}", "x"]
+        self.assertEqual(table.table_size, 29)
+        del table["k4", "x"]  # 3 < 0.5 / 4 * 29
+        self.assertEqual(table.table_size, 13)
+        self.assertEqual(table.deleted_count, 0)
+        self.assertEqual(sorted(table.keys()), ["k5", "k6", "k7"])
+        for i in range(5, 8):
+            self.assertEqual(table[f"k{i}", "x"], i)
+
+    @number("1.8")
+    def test_largest_size_keeps_taking_churn(self):
+        table = DoubleKeyTable(sizes=[13])
+        for i in range(1000):
+            table[f"k{i}", "x"] = i
+            if i >= 5:
+                del table[f"k{i - 5}", "x"]
+            self.assertLessEqual(table.outer_count + table.deleted_count, 0.5 * 13 + 1)
+        self.assertEqual(sorted(table.values()), list(range(995, 1000)))
+
+    @number("1.9")
+    def test_random_sets_and_deletes_match_dict(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            table = DoubleKeyTable(sizes=[5, 13, 29, 53, 97], max_load_factor=rng.choice((0.3, 0.5, 0.7)))
+            expected = {}
+            for _ in range(2000):
+                key = (f"k{rng.randrange(40)}", f"j{rng.randrange(3)}")
+                if key in expected and rng.random() < 0.5:
+                    del table[key]
+                    del expected[key]
+                else:
+                    table[key] = expected[key] = rng.random()
+                self.assertEqual(len(table), len(expected))
+            self.assertEqual(table.outer_count, len({key1 for key1, _ in expected}))
+            self.assertEqual(table.deleted_count, sum(entry is TOMBSTONE for entry in table.table))
+            for key, value in expected.items():
+                self.assertEqual(table[key], value)
+            self.assertEqual(sorted(table.keys()), sorted({key1 for key1, _ in expected}))
+
+    @number("1.10")
+    def test_from_items_matches_setting_one_at_a_time(self):
+        items = [((f"k{i}", f"j{j}"), i * 10 + j) for i in range(50) for j in range(i % 4 + 1)]
+        table = DoubleKeyTable.from_items(items)
+        self.assertEqual(len(table), len(items))
+        self.assertLessEqual(table.outer_count, table.max_load_factor * table.table_size)
+        for key, value in items:
+            self.assertEqual(table[key], value)
+
+
+class TestDoubleKeyTableStats(unittest.TestCase):
+
+    @number("1.11")
+    def test_probe_lengths_count_tombstones(self):
+        table = PlacedTable({"a": 0, "b": 0, "c": 0, "z": 0}, sizes=[13])
+        for key1 in "abc":
+            table[key1, "x"] = key1.upper()
+        del table["a", "x"]
+        table.enable_stats()
+        self.assertEqual(table["c", "x"], "C")
+        self.assertEqual(table.stats()["max_probe_length"], 3)
+        with self.assertRaises(KeyError):
+            _ = table["z", "x"]
+        stats = table.stats()
+        self.assertEqual((stats["probes"], stats["misses"], stats["max_probe_length"]), (2, 1, 4))
+        self.assertEqual((stats["tombstones"], stats["top_level_keys"], stats["cluster_sizes"]), (1, 2, {3: 1}))
+        table.disable_stats()
+        self.assertNotIn("probes", table.stats())
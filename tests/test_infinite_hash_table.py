@@ -0,0 +1,118 @@
+import random
+import sys
+import threading
+import unittest
+
+from ed_utils.decorators import number
+
+from infinite_hash_table import ConcurrentInfiniteHashTable, InfiniteHashTable
+
+
+def make_names(n: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        names.add("".join(rng.choice("abcdefgh") for _ in range(rng.randint(1, 8))))
+    return sorted(names)
+
+
+class TestInfiniteHashTableEdits(unittest.TestCase):
+
+    @number("2.1")
+    def test_random_sets_and_deletes_keep_invariants(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            names = make_names(200, seed)
+            table = InfiniteHashTable()
+            expected = {}
+            for _ in range(1000):
+                key = rng.choice(names)
+                if key in expected and rng.random() < 0.5:
+                    del table[key]
+                    del expected[key]
+                else:
+                    table[key] = expected[key] = rng.randint(0, 100)
+                table.check_invariants()
+            self.assertEqual(len(table), len(expected))
+            self.assertEqual(dict(table.items()), expected)
+            for key in names:
+                self.assertEqual(key in table, key in expected, key)
+
+    @number("2.2")
+    def test_many_match_one_at_a_time(self):
+        names = make_names(500, 1)
+        table = InfiniteHashTable()
+        table.set_many([(key, key.upper()) for key in names])
+        table.check_invariants()
+        self.assertEqual(table.get_many(names), [key.upper() for key in names])
+        table.delete_many(names[::2])
+        table.check_invariants()
+        self.assertEqual(dict(table.items()), {key: key.upper() for key in names[1::2]})
+        self.assertEqual(table.count_prefix("a"), sum(key.startswith("a") for key in names[1::2]))
+
+
+class TestConcurrentInfiniteHashTable(unittest.TestCase):
+
+    WRITERS = 2
+    READERS = 4
+    WRITES = 20000
+
+    @number("2.3")
+    def test_readers_never_lose_keys_while_writers_churn(self):
+        names = make_names(2000, 0)
+        stable = names[::2]
+        table = ConcurrentInfiniteHashTable()
+        table.set_many([(key, key.upper()) for key in stable])
+        # Each writer churns keys of its own, so what is left in the table is known at the end.
+        churns = [names[1 + 2 * i::2 * self.WRITERS] for i in range(self.WRITERS)]
+        left = [set() for _ in churns]
+        errors = []
+        stop = threading.Event()
+
+        def writer(seed: int) -> None:
+            rng = random.Random(seed)
+            present = left[seed]
+            for _ in range(self.WRITES):
+                key = rng.choice(churns[seed])
+                if key in present:
+                    del table[key]
+                    present.discard(key)
+                else:
+                    table[key] = key.upper()
+                    present.add(key)
+
+        def reader(seed: int) -> None:
+            rng = random.Random(seed)
+            while not stop.is_set():
+                key = rng.choice(stable)
+                try:
+                    if table[key] != key.upper():
+                        errors.append(f"wrong value for {key}")
+                except KeyError:
+                    errors.append(f"lost {key}")
+                key = rng.choice(names)
+                try:
+                    if table[key] != key.upper():
+                        errors.append(f"wrong value for {key}")
+                except KeyError:
+                    pass  # a churned key may have just been deleted
+
+        # Switch threads far more often than usual, so lookups land in the middle of writes.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        readers = [threading.Thread(target=reader, args=(seed,)) for seed in range(self.READERS)]
+        writers = [threading.Thread(target=writer, args=(seed,)) for seed in range(self.WRITERS)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        table.check_invariants()
+        expected = set(stable).union(*left)
+        self.assertEqual(len(table), len(expected))
+        self.assertEqual(set(key for key, _ in table.items()), expected)
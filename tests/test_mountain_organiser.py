@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from ed_utils.decorators import number
+
+from mountain import Mountain
+from mountain_organiser import MountainOrganiser
+
+
+class TestMountainOrganiserRanks(unittest.TestCase):
+
+    @number("4.1")
+    def test_ranks_match_sorted_order(self):
+        rng = random.Random(0)
+        organiser = MountainOrganiser()
+        added = []
+        for _ in range(20):
+            batch = [Mountain(f"m{rng.randrange(30)}", rng.randrange(10), rng.randrange(10)) for _ in range(rng.randint(1, 8))]
+            organiser.add_mountains(batch)
+            added.extend(batch)
+            in_order = sorted(added, key=lambda m: (m.length, m.name))
+            for mountain in added:
+                rank = organiser.cur_position(mountain)
+                self.assertEqual(organiser.mountain_organizer[rank], mountain)
+                # Mountains equal to this one all rank at the first of them.
+                self.assertEqual(rank, in_order.index(mountain))
+
+    @number("4.2")
+    def test_same_length_and_name_kept_in_order_added(self):
+        organiser = MountainOrganiser()
+        first, second = Mountain("a", 1, 5), Mountain("a", 2, 5)
+        organiser.add_mountains([Mountain("b", 1, 5), first])
+        organiser.add_mountains([second, Mountain("a", 1, 3)])
+        self.assertEqual(organiser.cur_position(first), 1)
+        self.assertEqual(organiser.cur_position(second), 2)
+        self.assertEqual(organiser.cur_position(Mountain("b", 1, 5)), 3)
+
+    @number("4.3")
+    def test_changed_or_missing_mountain(self):
+        organiser = MountainOrganiser()
+        mountain = Mountain("a", 1, 5)
+        organiser.add_mountains([Mountain("b", 1, 2), mountain, Mountain("c", 1, 8)])
+        mountain.length = 100  # no longer where its key says
+        self.assertEqual(organiser.cur_position(mountain), 1)
+        with self.assertRaises(KeyError):
+            organiser.cur_position(Mountain("d", 1, 1))
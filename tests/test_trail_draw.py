@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from ed_utils.decorators import number
+
+from constants import DrawMode
+from draw_trails import TrailDraw
+from mountain import Mountain
+from synthetic import TrailSpec, make_trail
+from trail import Trail, TrailSeries, TrailSplit
+
+MODES = (DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH, DrawMode.REMOVE, DrawMode.EDIT)
+
+
+def series(*mountains: Mountain) -> Trail:
+    trail = Trail()
+    for mountain in reversed(mountains):
+        trail = trail.add_mountain_before(mountain)
+    return trail
+
+
+class TestTrailDrawAfterEdits(unittest.TestCase):
+
+    def assertHitTestsMatchWalk(self, draw: TrailDraw, points: list) -> None:
+        """box_and_action, using the box index, finds what walking down the trail finds."""
+        for p, mode in points:
+            box, func, store = draw.box_and_action(p, mode)
+            walked_box, walked_func, walked_store = draw._walk_to_action(p, mode, draw.trail, (draw, "trail"))
+            self.assertIs(box, walked_box, (p, mode))
+            self.assertIs(store, walked_store, (p, mode))
+            self.assertEqual(func is None, walked_func is None, (p, mode))
+
+    @number("3.1")
+    def test_remembered_values_forgotten_when_store_shared(self):
+        count = lambda t: t.fold(0, lambda s, f: 1 + f, lambda sp, a, b, c: a + b + c, memo_key="count")
+        a, b = Mountain("a", 1, 1), Mountain("b", 1, 1)
+        trail = Trail(TrailSeries(a, Trail()))
+        self.assertEqual(count(trail), 1)
+        trail.add_mountain_before(a)  # puts trail's store in another trail too
+        trail.store.following = series(b)
+        self.assertEqual(count(trail), 2)
+        draw = TrailDraw(Trail(TrailSeries(a, Trail())))
+        self.assertEqual(draw.required_width(), TrailDraw.TOTAL_MOUNTAIN_WIDTH)
+        draw.trail.add_mountain_before(a)
+        draw.trail.store.following = series(b)
+        self.assertEqual(draw.required_width(), TrailDraw(draw.trail).required_width())
+
+    @number("3.2")
+    def test_hit_test_after_adding_branch_below_top(self):
+        m = [Mountain(name, 1, 1) for name in "abcde"]
+        top = series(m[1])
+        draw = TrailDraw(Trail(TrailSeries(m[0], Trail(TrailSplit(top, series(*m[2:]), Trail())))))
+        draw.layout(700, 700, 0, 0)
+        box = top.store.before_box
+        p = (box.x + box.w / 2, box.y + box.h / 2)
+        self.assertHitTestsMatchWalk(draw, [(p, DrawMode.ADD_BRANCH)])
+        _, func, _ = draw.box_and_action(p, DrawMode.ADD_BRANCH)
+        func()
+        draw.layout(700, 700, 0, 0)
+        self.assertHitTestsMatchWalk(draw, [(p, mode) for mode in MODES])
+
+    @number("3.3")
+    def test_hit_test_after_random_edits(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            draw = TrailDraw(make_trail(TrailSpec(2, (0, 2), (0, 3)), seed=seed))
+            for _ in range(6):
+                draw.layout(700, 700, 0, 0)
+                self.assertEqual(draw.layout(700, 700, 0, 0), TrailDraw(draw.trail).layout(700, 700, 0, 0))
+                self.assertHitTestsMatchWalk(draw, [((rng.uniform(0, 700), rng.uniform(0, 700)), rng.choice(MODES)) for _ in range(30)])
+                # Click somewhere which changes the trail, as the GUI would.
+                while True:
+                    mode = rng.choice((DrawMode.ADD_MOUNTAIN, DrawMode.ADD_BRANCH, DrawMode.REMOVE))
+                    _, func, _ = draw._walk_to_action((rng.uniform(0, 700), rng.uniform(0, 700)), mode, draw.trail, (draw, "trail"))
+                    if func is not None:
+                        break
+                func(Mountain("new", 1, 1)) if mode == DrawMode.ADD_MOUNTAIN else func()
+
+
+if __name__ == "__main__":
+    unittest.main()
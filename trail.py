@@ -1,9 +1,10 @@
 from __future__ import annotations
+import weakref
 from dataclasses import dataclass
 
 from mountain import Mountain
 
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TypeVar, Union
 
 from data_structures.linked_stack import LinkedStack
 # Avoid circular imports for typing.
@@ -24,6 +25,12 @@ class TrailSplit:
     path_bottom: Trail
     path_follow: Trail
 
+    def __setattr__(self, name: str, value) -> None:
+        if name in ("path_top", "path_bottom", "path_follow"):
+            _set_path(self, name, value)
+        else:
+            object.__setattr__(self, name, value)
+
     def remove_branch(self) -> TrailStore:
         """Removes the branch, should just leave the remaining following trail."""
         return self.path_follow.store
@@ -40,6 +47,14 @@ class TrailSeries:
     mountain: Mountain
     following: Trail
 
+    def __setattr__(self, name: str, value) -> None:
+        if name == "following":
+            _set_path(self, name, value)
+        else:
+            object.__setattr__(self, name, value)
+            if name == "mountain":
+                _forget_above(self)
+
     def remove_mountain(self) -> TrailStore:
         """Removes the mountain at the beginning of this series."""
         return self.following.store
@@ -63,12 +78,207 @@ class TrailSeries:
         return TrailSeries(self.mountain,new_following)
 
 TrailStore = Union[TrailSplit, TrailSeries, None]
+T = TypeVar("T")
+PATHS = ("following", "path_top", "path_bottom", "path_follow")
+
+# Trails remember values worked out by `Trail.fold` with a memo_key in `_memo`.
+# To forget them again when the trail changes, each store has `_owners`, the trails
+# holding it, and each trail `_parents`, the stores holding it as a path. A store
+# can be in more than one trail, e.g. add_mountain_before puts the trail's store in
+# a new trail, so these are lists of weak references: every trail still holding it
+# is found, and trails thrown away drop out of them by themselves.
+
+def _link(obj: Trail | TrailSeries | TrailSplit, name: str, holder: Trail | TrailSeries | TrailSplit) -> None:
+    """Add holder to obj's list called name, dropping holders which are gone."""
+    refs = obj.__dict__.get(name)
+    if refs is None:
+        object.__setattr__(obj, name, [weakref.ref(holder)])
+    else:
+        refs[:] = [ref for ref in refs if ref() is not None and ref() is not holder]
+        refs.append(weakref.ref(holder))
+
+def _unlink(obj: Trail | TrailSeries | TrailSplit, name: str, holder: Trail | TrailSeries | TrailSplit) -> None:
+    """Take holder out of obj's list called name."""
+    refs = obj.__dict__.get(name)
+    if refs:
+        refs[:] = [ref for ref in refs if ref() is not None and ref() is not holder]
+
+def _holders(obj: Trail | TrailSeries | TrailSplit, name: str) -> list:
+    """The holders in obj's list called name which are still there."""
+    return [holder for holder in (ref() for ref in obj.__dict__.get(name, ())) if holder is not None]
+
+def _set_path(store: TrailSeries | TrailSplit, name: str, trail: Trail) -> None:
+    """Make trail store's path called name, and forget what was remembered above it."""
+    old = store.__dict__.get(name)
+    object.__setattr__(store, name, trail)
+    if old is not None and old is not trail and all(getattr(store, path, None) is not old for path in PATHS):
+        _unlink(old, "_parents", store)
+    _link(trail, "_parents", store)
+    _forget_above(store)
+
+def _forget_above(store: TrailSeries | TrailSplit) -> None:
+    for owner in _holders(store, "_owners"):
+        owner.forget()
+
+@dataclass
+class PathStatistics:
+    """
+    Summary of every path through a trail.
+
+    A path's difficulty is the total difficulty_level of its mountains, and its
+    length the total length of its mountains.
+    mountain_counts[i] is how many paths have min_mountains + i mountains on them.
+    """
+
+    paths: int
+    min_mountains: int
+    mountain_counts: list[int]
+    min_difficulty: int
+    max_difficulty: int
+    total_difficulty: int
+    min_length: int
+    max_length: int
+    total_length: int
+
+    def mountains_histogram(self) -> dict[int, int]:
+        """Number of mountains on a path -> how many paths have that many."""
+        return {self.min_mountains + i: count for i, count in enumerate(self.mountain_counts) if count}
+
+    def mean_difficulty(self) -> float:
+        return self.total_difficulty / self.paths
+
+    def mean_length(self) -> float:
+        return self.total_length / self.paths
+
+class CompiledTrail:
+    """
+    A trail flattened into instructions, in the order follow_path meets them:
+        - code[i] >= 0: add mountains[code[i]] and go on to i + 1,
+        - code[i] == END: the path ends; go on where the last split's path_follow starts,
+          or stop if there's no split left,
+        - code[i] <= SPLIT: split number SPLIT - code[i]. Its path_top starts at i + 1, its
+          path_bottom at bottom_starts[number] and its path_follow at follow_starts[number].
+
+    Walking a personality over it gives the same mountains in the same order as
+    Trail.follow_path. walk_many walks many at once, only asking select_branch for
+    personalities which need it (see WalkerPersonality.FIXED_BRANCH and DETERMINISTIC).
+    """
+
+    END = -1
+    SPLIT = -2
+
+    def __init__(self, code: list[int], mountains: list[Mountain], splits: list[TrailSplit], bottom_starts: list[int], follow_starts: list[int]) -> None:
+        self.code = code
+        self.mountains = mountains
+        self.splits = splits
+        self.bottom_starts = bottom_starts
+        self.follow_starts = follow_starts
+        self._fixed_walks = {}  # FIXED_BRANCH -> the mountain numbers walked
+
+    def walk_numbers(self, choose: Callable[[int], bool] | bool) -> list[int]:
+        """
+        The numbers of the mountains walked, choose being True or False to always take
+        path_top or path_bottom, or given a split's number, whether to take its path_top:
+        only if it returns True, as follow_path only takes path_top if select_branch does.
+
+        :complexity: O(m + s*choose), m being how many mountains are walked and s how many splits.
+        """
+        code, bottom_starts, follow_starts = self.code, self.bottom_starts, self.follow_starts
+        walked = []
+        follows = []
+        i = 0
+        while True:
+            instruction = code[i]
+            if instruction >= 0:
+                walked.append(instruction)
+                i += 1
+            elif instruction == self.END:
+                if not follows:
+                    return walked
+                i = follows.pop()
+            else:
+                number = self.SPLIT - instruction
+                follows.append(follow_starts[number])
+                if choose is True or (choose is not False and choose(number) is True):
+                    i += 1
+                else:
+                    i = bottom_starts[number]
+
+    def walk(self, personality: WalkerPersonality) -> None:
+        """As Trail.follow_path(personality)."""
+        self.walk_many([personality])
+
+    def walk_many(self, personalities: Iterable[WalkerPersonality]) -> None:
+        """
+        As Trail.follow_path for each personality, in order.
+
+        Personalities with a FIXED_BRANCH share one walk, remembered while this exists.
+        DETERMINISTIC personalities of the same class share one walk, asking the first of
+        them at each split. Others are asked at each split, as follow_path asks them.
+        Personalities which don't override add_mountain have their walks added in one go.
+
+        :complexity: O(W + P*m), W being the cost of the different walks, P the number of
+        personalities and m how many mountains each walks.
+        """
+        from personality import WalkerPersonality  # personality imports this module
+        shared = {}  # class -> numbers walked, for DETERMINISTIC personalities
+        for personality in personalities:
+            cls = type(personality)
+            if cls.FIXED_BRANCH is not None:
+                numbers = self._fixed_walks.get(cls.FIXED_BRANCH)
+                if numbers is None:
+                    numbers = self._fixed_walks[cls.FIXED_BRANCH] = self.walk_numbers(cls.FIXED_BRANCH)
+            elif cls.DETERMINISTIC and cls in shared:
+                numbers = shared[cls]
+            else:
+                splits = self.splits
+                numbers = self.walk_numbers(lambda number: personality.select_branch(splits[number].path_top, splits[number].path_bottom))
+                if cls.DETERMINISTIC:
+                    shared[cls] = numbers
+            mountains = self.mountains
+            if cls.add_mountain is WalkerPersonality.add_mountain:
+                personality.mountains.extend([mountains[number] for number in numbers])
+            else:
+                for number in numbers:
+                    personality.add_mountain(mountains[number])
 
 @dataclass
 class Trail:
 
     store: TrailStore = None
 
+    def __setattr__(self, name: str, value) -> None:
+        if name != "store":
+            object.__setattr__(self, name, value)
+            return
+        old = self.__dict__.get("store")
+        object.__setattr__(self, name, value)
+        if old is not None and old is not value:
+            _unlink(old, "_owners", self)
+        if value is not None:
+            _link(value, "_owners", self)
+        self.forget()
+
+    def forget(self) -> None:
+        """
+        Forget the values remembered by `fold` for this trail and every trail above it.
+        Called whenever a trail's store, or a store's mountain or path, is assigned.
+
+        Complexity:
+        - O(a) at most, a being how many trails are above it: O(depth) when no store is
+        in more than one trail. A trail only remembers a value if the trails below it do
+        too, so this stops going up at the first trail with nothing remembered.
+        """
+        to_forget = [self]
+        while to_forget:
+            trail = to_forget.pop()
+            memo = trail.__dict__.get("_memo")
+            if not memo:
+                continue
+            memo.clear()
+            for store in _holders(trail, "_parents"):
+                to_forget.extend(_holders(store, "_owners"))
+
     def add_mountain_before(self, mountain: Mountain) -> Trail:
         """Adds a mountain before everything currently in the trail."""
         new_store=TrailSeries(mountain, Trail(self.store))
@@ -116,17 +326,122 @@ class Trail:
                 current_path=TrailSplit_stack.pop()
                 current_path=current_path.path_follow.store #it goes to one of the branches of a TrailSplit and then it goes to of the none branches, then it backtracks and goes to the path_follow of that TrailSplit
 
+    def compile(self) -> CompiledTrail:
+        """
+        The trail as a CompiledTrail, for walking many personalities over it.
+        It doesn't change with the trail, so compile again after changing the trail.
+
+        Complexity:
+        - O(n), n being how many trails there are.
+        """
+        code = []
+        mountains = []
+        numbers = {}  # id(mountain) -> its index in mountains
+        splits = []
+        starts = ([], [])  # each split's path_bottom and path_follow start
+        to_compile = [(self, None, None)]  # (trail, split it starts a path of, 0 for path_bottom or 1 for path_follow)
+        while to_compile:
+            trail, split_number, path = to_compile.pop()
+            if split_number is not None:
+                starts[path][split_number] = len(code)
+            store = trail.store
+            while store is not None:
+                if isinstance(store, TrailSeries):
+                    number = numbers.get(id(store.mountain))
+                    if number is None:
+                        number = numbers[id(store.mountain)] = len(mountains)
+                        mountains.append(store.mountain)
+                    code.append(number)
+                    store = store.following.store
+                else:
+                    split_number = len(splits)
+                    splits.append(store)
+                    starts[0].append(None)
+                    starts[1].append(None)
+                    code.append(CompiledTrail.SPLIT - split_number)
+                    to_compile.append((store.path_follow, split_number, 1))
+                    to_compile.append((store.path_bottom, split_number, 0))
+                    store = store.path_top.store
+            code.append(CompiledTrail.END)
+        return CompiledTrail(code, mountains, splits, *starts)
+
+    def iter_mountains(self) -> Iterator[Mountain]:
+        """
+        Generate every mountain on the trail, in the order collect_all_mountains lists them:
+        a series' mountain before its following trail, and a split's top, then bottom, then following path.
+
+        Complexity:
+        - O(n), n being how many trails there are. Only the paths still to visit are kept, not the whole trail.
+        """
+        to_visit = [self]
+        while to_visit:
+            store = to_visit.pop().store
+            if isinstance(store, TrailSeries):
+                yield store.mountain
+                to_visit.append(store.following)
+            elif isinstance(store, TrailSplit):
+                to_visit.append(store.path_follow)
+                to_visit.append(store.path_bottom)
+                to_visit.append(store.path_top)
+
+    def fold(self, empty: T, series: Callable[[TrailSeries, T], T], split: Callable[[TrailSplit, T, T, T], T], memo_key=None) -> T:
+        """
+        Work a value out for the trail from the bottom up, without recursion.
+        Args:
+        - empty: the value of an empty trail.
+        - series: called with a TrailSeries and the value of its following trail.
+        - split: called with a TrailSplit and the values of its top, bottom and following paths.
+        - memo_key: if given, every trail remembers its value under this key, and remembered
+          values are used rather than worked out again. They are forgotten when the trail
+          or anything below it changes (see forget). Only pass one when the value depends
+          on nothing but the shape of the trail and its stores' mountains.
+
+        Returns: the value of the whole trail.
+
+        Complexity:
+        - O(n*(series+split)), n being how many trails there are.
+        - With memo_key, O(c*(series+split)), c being how many trails changed since the last
+        fold with that key. O(1) when nothing has.
+        """
+        values = []
+        to_visit = [(self, False)]
+        while to_visit:
+            trail, paths_done = to_visit.pop()
+            memo = trail.__dict__.get("_memo") if memo_key is not None else None
+            store = trail.store
+            if memo and not paths_done and memo_key in memo:
+                values.append(memo[memo_key])
+                continue
+            if store is None:
+                value = empty
+            elif paths_done:
+                if isinstance(store, TrailSeries):
+                    value = series(store, values.pop())
+                else:
+                    follow = values.pop()
+                    bottom = values.pop()
+                    value = split(store, values.pop(), bottom, follow)
+            else:
+                to_visit.append((trail, True))
+                if isinstance(store, TrailSeries):
+                    to_visit.append((store.following, False))
+                else:
+                    # Pushed in reverse so the values come out top, bottom, follow.
+                    to_visit.append((store.path_follow, False))
+                    to_visit.append((store.path_bottom, False))
+                    to_visit.append((store.path_top, False))
+                continue
+            if memo_key is not None:
+                if memo is None:
+                    memo = {}
+                    object.__setattr__(trail, "_memo", memo)
+                memo[memo_key] = value
+            values.append(value)
+        return values.pop()
+
     def collect_all_mountains(self) -> list[Mountain]:
         """Returns a list of all mountains on the trail."""
-        res=[]
-        if isinstance(self.store,TrailSplit):
-            res += self.store.path_top.collect_all_mountains()
-            res += self.store.path_bottom.collect_all_mountains()
-            res += self.store.path_follow.collect_all_mountains()
-        elif isinstance(self.store,TrailSeries):
-            if self.store.mountain not in res:
-                res += [self.store.mountain]+self.store.following.collect_all_mountains()
-        return res
+        return list(self.iter_mountains())
 
     def length_k_paths(self, k) -> list[list[Mountain]]: # Input to this should not exceed k > 50, at most 5 branches.
         """
@@ -134,33 +449,149 @@ class Trail:
         Paths are represented as lists of mountains.
 
         Paths are unique if they take a different branch, even if this results in the same set of mountains.
+        Paths taking the top branch of a split come before those taking the bottom branch.
+
+        Complexity: As iter_length_k_paths.
         """
-        all_paths_list = []
-        start_path_mountains = []
-        trail_split_stack = []
-        self.length_k_paths_aux(self.store, start_path_mountains, all_paths_list, trail_split_stack)
-        return [path for path in all_paths_list if len(path) == k]
+        return list(self.iter_length_k_paths(k))
 
-    def length_k_paths_aux(self, current_path: TrailStore, current_path_mountains: list[Mountain],all_paths_list: list[list[Mountain]], trail_split_stack):
+    def iter_length_k_paths(self, k: int) -> Iterator[list[Mountain]]:
+        """
+        Generate the paths containing exactly k mountains, in the order length_k_paths lists them.
 
-        if current_path is None:
-            if not trail_split_stack:
-                all_paths_list.append(current_path_mountains)
-            else:
-                following = trail_split_stack.pop()
-                self.length_k_paths_aux(following, current_path_mountains, all_paths_list, trail_split_stack)
-
-        elif isinstance(current_path, TrailSeries):
-            current_path_mountains.append(current_path.mountain)
-            self.length_k_paths_aux(current_path.following.store, current_path_mountains, all_paths_list,trail_split_stack)
-
-        elif isinstance(current_path, TrailSplit):
-            parent_trail_split = trail_split_stack[-1] if trail_split_stack else None
-            trail_split_stack.append(current_path.path_follow.store)
-            top_path_list = current_path_mountains.copy()
-            self.length_k_paths_aux(current_path.path_top.store, top_path_list, all_paths_list, trail_split_stack)
-
-            trail_split_stack.append(parent_trail_split)
-            trail_split_stack.append(current_path.path_follow.store)
-            bottom_path_list = current_path_mountains.copy()
-            self.length_k_paths_aux(current_path.path_bottom.store, bottom_path_list, all_paths_list, trail_split_stack)
\ No newline at end of file
+        The path so far is one list shared by every branch: when the walk comes back
+        to take the bottom branch of a split it is cut back to where it was at the split.
+        Each path is copied only when it is yielded. A branch is given up on as soon
+        as its path has more than k mountains.
+
+        Complexity:
+        - O(V + R*k), V being how many trails are visited while their path has at most k
+        mountains and R how many paths are yielded.
+        """
+        path = []
+        # Each entry is (trail, len(path) there, continuation), the continuation being the
+        # linked list (trail, rest) of the path_follows still to go once trail ends.
+        to_visit = [(self, 0, None)]
+        while to_visit:
+            trail, length, continuation = to_visit.pop()
+            del path[length:]
+            store = trail.store
+            while True:
+                if isinstance(store, TrailSeries):
+                    if len(path) == k:  # one more mountain is too many
+                        break
+                    path.append(store.mountain)
+                    store = store.following.store
+                elif isinstance(store, TrailSplit):
+                    continuation = (store.path_follow, continuation)
+                    to_visit.append((store.path_bottom, len(path), continuation))
+                    store = store.path_top.store
+                elif continuation is not None:
+                    trail, continuation = continuation
+                    store = trail.store
+                else:
+                    if len(path) == k:
+                        yield path.copy()
+                    break
+
+    def path_statistics(self) -> PathStatistics:
+        """
+        Statistics about every path through the trail, worked out from the bottom up
+        rather than by going through the paths, of which there can be exponentially many.
+
+        A mountain in series adds to the statistics of the trail following it, sharing its
+        mountain_counts. At a split the top and bottom paths' statistics are put together,
+        then combined with those of the following path: every branch path goes with every
+        following path.
+
+        Complexity:
+        - O(n + S*M^2), n being how many trails there are, S how many splits and M the
+        most mountains on a path.
+        """
+        def series(store: TrailSeries, following: PathStatistics) -> PathStatistics:
+            difficulty = store.mountain.difficulty_level
+            length = store.mountain.length
+            return PathStatistics(
+                following.paths,
+                following.min_mountains + 1,
+                following.mountain_counts,
+                following.min_difficulty + difficulty,
+                following.max_difficulty + difficulty,
+                following.total_difficulty + following.paths * difficulty,
+                following.min_length + length,
+                following.max_length + length,
+                following.total_length + following.paths * length,
+            )
+
+        def split(store: TrailSplit, top: PathStatistics, bottom: PathStatistics, follow: PathStatistics) -> PathStatistics:
+            branch_min_mountains = min(top.min_mountains, bottom.min_mountains)
+            branch_counts = [0] * (max(top.min_mountains + len(top.mountain_counts), bottom.min_mountains + len(bottom.mountain_counts)) - branch_min_mountains)
+            for branch in (top, bottom):
+                for i, count in enumerate(branch.mountain_counts, branch.min_mountains - branch_min_mountains):
+                    branch_counts[i] += count
+            mountain_counts = [0] * (len(branch_counts) + len(follow.mountain_counts) - 1)
+            for i, branch_count in enumerate(branch_counts):
+                if branch_count:
+                    for j, follow_count in enumerate(follow.mountain_counts):
+                        mountain_counts[i + j] += branch_count * follow_count
+            branch_paths = top.paths + bottom.paths
+            return PathStatistics(
+                branch_paths * follow.paths,
+                branch_min_mountains + follow.min_mountains,
+                mountain_counts,
+                min(top.min_difficulty, bottom.min_difficulty) + follow.min_difficulty,
+                max(top.max_difficulty, bottom.max_difficulty) + follow.max_difficulty,
+                (top.total_difficulty + bottom.total_difficulty) * follow.paths + follow.total_difficulty * branch_paths,
+                min(top.min_length, bottom.min_length) + follow.min_length,
+                max(top.max_length, bottom.max_length) + follow.max_length,
+                (top.total_length + bottom.total_length) * follow.paths + follow.total_length * branch_paths,
+            )
+
+        return self.fold(PathStatistics(1, 0, [1], 0, 0, 0, 0, 0, 0), series, split)
+
+    def count_length_k_paths(self, k: int) -> int:
+        """
+        Count the paths containing exactly k mountains, without going through them.
+
+        Each trail's paths are counted by length, from the bottom up, ignoring paths
+        longer than k. A trail's counts are kept as (offset, counts), counts[i] being
+        how many paths have offset+i mountains, so a mountain in series only adds 1 to
+        the offset. At a split the top and bottom counts are added together and combined
+        with every length of the following path's.
+
+        Complexity:
+        - O(n + S*k^2), n being how many trails there are and S how many splits.
+        """
+        no_paths = (0, [])
+
+        def series(store: TrailSeries, following: tuple[int, list[int]]) -> tuple[int, list[int]]:
+            offset, counts = following
+            if not counts or offset == k:
+                return no_paths
+            return offset + 1, counts
+
+        def split(store: TrailSplit, top: tuple[int, list[int]], bottom: tuple[int, list[int]], follow: tuple[int, list[int]]) -> tuple[int, list[int]]:
+            branches = [(offset, counts) for offset, counts in (top, bottom) if counts]
+            if not branches or not follow[1]:
+                return no_paths
+            branch_offset = min(offset for offset, _ in branches)
+            offset = branch_offset + follow[0]
+            if offset > k:
+                return no_paths
+            branch_counts = [0] * (k - offset + 1)
+            for start, counts in branches:
+                for i, count in enumerate(counts, start - branch_offset):
+                    if i >= len(branch_counts):
+                        break
+                    branch_counts[i] += count
+            combined = [0] * (k - offset + 1)
+            for i, branch_count in enumerate(branch_counts):
+                if branch_count:
+                    for j, follow_count in enumerate(follow[1][:len(combined) - i]):
+                        combined[i + j] += branch_count * follow_count
+            return offset, combined
+
+        offset, counts = self.fold((0, [1]), series, split)
+        if 0 <= k - offset < len(counts):
+            return counts[k - offset]
+        return 0
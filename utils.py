@@ -1,12 +1,50 @@
+from functools import lru_cache
+from math import comb
+
 def av(*args):
     return sum(args)/len(args)
 
+def bezier_coefficients(points) -> tuple[tuple[float, float], ...]:
+    """
+    The curve through control points P_0..P_n as a polynomial, B(t) = sum of c_j t^j, from
+    its Bernstein form: c_j = C(n, j) * sum over i <= j of (-1)^(j-i) C(j, i) P_i.
+
+    Complexity: O(n^2)
+    """
+    n = len(points) - 1
+    coefficients = []
+    for j in range(n + 1):
+        cx = cy = 0
+        for i in range(j + 1):
+            weight = (-1) ** (j - i) * comb(j, i)
+            cx += weight * points[i][0]
+            cy += weight * points[i][1]
+        coefficients.append((comb(n, j) * cx, comb(n, j) * cy))
+    return tuple(coefficients)
+
 def bezier(*points):
-    if len(points) == 1:
-        return lambda t: points[0]
-    p1 = bezier(*points[:-1])
-    p2 = bezier(*points[1:])
-    return lambda t: (
-        (1-t) * p1(t)[0] + t * p2(t)[0],
-        (1-t) * p1(t)[1] + t * p2(t)[1]
-    )
+    """
+    The bezier curve through the control points, as a function of t from 0 to 1.
+
+    Complexity: O(n^2) to make, then O(n) per point of the curve.
+    """
+    coefficients = bezier_coefficients(points)[::-1]
+    def curve(t):
+        x = y = 0
+        for cx, cy in coefficients:
+            x = x * t + cx
+            y = y * t + cy
+        return x, y
+    return curve
+
+def bezier_points(points, ts) -> list[tuple[float, float]]:
+    """The bezier curve through the control points at each t of ts. O(n^2 + n * len(ts))"""
+    return [*map(bezier(*points), ts)]
+
+@lru_cache(maxsize=4096)
+def bezier_polyline(points: tuple[tuple[float, float], ...], segments: int = 100) -> tuple[tuple[float, float], ...]:
+    """
+    segments + 1 points evenly spaced in t along the bezier curve through the control points.
+    Remembered for the last 4096 curves, so points must be a tuple of tuples.
+    """
+    return tuple(bezier_points(points, [i / segments for i in range(segments + 1)]))